@@ -0,0 +1,278 @@
+import json
+import os
+import platform
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from Connect import connect
+from Emulator import Emulator
+
+# Points of the traces read from the emulator
+READ_POINTS = (1000, 10000, 100000, 1000000)
+# Points of the traces saved by save_data
+SAVE_POINTS = (1001, 10001)
+# Binary formats of data_format_conversion
+CONVERSION_FORMATS = ("REAL,32", "REAL,64", "INT,32")
+
+
+class CountingTransport:
+    """ Socket that counts what the device sends and receives. A round trip
+    is a receive after something has been sent since the last receive
+    """
+
+    def __init__(self, connection, address: str):
+        self.Connection = connection
+        self.Address = address
+        self.reset()
+
+    def reset(self):
+        self.Sends = 0
+        self.Bytes_Sent = 0
+        self.Bytes_Received = 0
+        self.Round_Trips = 0
+        self.Waiting = False
+
+    def counts(self):
+        return {"sends": self.Sends, "round_trips": self.Round_Trips,
+                "bytes_sent": self.Bytes_Sent,
+                "bytes_received": self.Bytes_Received}
+
+    def sent(self, size: int):
+        self.Sends += 1
+        self.Bytes_Sent += size
+        self.Waiting = True
+
+    def received(self, size: int):
+        if self.Waiting:
+            self.Round_Trips += 1
+            self.Waiting = False
+        self.Bytes_Received += size
+
+    def send(self, data):
+        sent = self.Connection.send(data)
+        self.sent(sent)
+        return sent
+
+    def sendall(self, data):
+        self.Connection.sendall(data)
+        self.sent(len(data))
+
+    def recv(self, size: int):
+        data = self.Connection.recv(size)
+        self.received(len(data))
+        return data
+
+    def recv_into(self, buffer, size: int = 0):
+        received = self.Connection.recv_into(buffer, size)
+        self.received(received)
+        return received
+
+    def settimeout(self, timeout):
+        self.Connection.settimeout(timeout)
+
+    def gettimeout(self):
+        return self.Connection.gettimeout()
+
+    def close(self):
+        self.Connection.close()
+
+
+def open_device(emulator):
+    """ Connects the driver of the emulated instrument through a
+    CountingTransport
+    """
+    host, _, port = emulator.Address.partition(":")
+    connection = socket.create_connection((host, int(port)), 30)
+    connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return connect(CountingTransport(connection, emulator.Address))
+
+
+def measure(function, repeat: int):
+    """ Runs function repeat times and returns the best and mean seconds
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"runs": repeat, "best": min(times), "mean": sum(times) / repeat}
+
+
+def benchmark_reads(points_list, repeat: int):
+    """ ASCII and binary block read throughput of a spectrum analyzer trace
+    """
+    results = []
+    for points in points_list:
+        with Emulator("SA", port=0, points=points) as emulator:
+            emulator.start()
+            device = open_device(emulator)
+            for data_format, read in (
+                    ("ASC,0", lambda: device.read("TRAC:DATA", "TRACE1")),
+                    ("REAL,32", lambda: device.read_block("TRAC:DATA",
+                                                          "TRACE1"))):
+                device.write("FORM", data_format)
+                # The first read lets the emulator generate the trace
+                size = len(read())
+                device.Device.reset()
+                result = measure(read, repeat)
+                result.update({key: value // repeat for key, value
+                               in device.Device.counts().items()})
+                result.update({"benchmark": "read", "device": "SA",
+                               "format": data_format, "points": points,
+                               "bytes": size,
+                               "megabytes_per_second":
+                                   size / result["best"] / 1e6})
+                results.append(result)
+            device.close()
+    return results
+
+
+def benchmark_settings(repeat: int):
+    """ Round trips and time of get_all_settings and of send_all_settings
+    changing three settings of a phase noise analyzer
+    """
+    results = []
+    with Emulator("PNA", port=0) as emulator:
+        emulator.start()
+        device = open_device(emulator)
+        device.initialize_values()
+        settings = device.New_Settings["GeneralSettings"]
+
+        def send_all_settings():
+            settings["Sweep_Count"] += 1
+            settings["ResBW_Factor"] += 1
+            settings["XCorr_Factor"] += 1
+            device.send_all_settings()
+
+        for name, function in (("get_all_settings", device.get_all_settings),
+                               ("send_all_settings", send_all_settings)):
+            device.Device.reset()
+            result = measure(function, repeat)
+            result.update({"benchmark": name, "device": "PNA",
+                           "settings": sum(len(values) for values in
+                                           device.Settings.values())})
+            result.update({key: value // repeat for key, value
+                           in device.Device.counts().items()})
+            results.append(result)
+        device.close()
+    return results
+
+
+def benchmark_conversion(points_list, repeat: int):
+    """ Time of data_format_conversion for every binary format
+    """
+    results = []
+    with Emulator("SA", port=0, points=1001) as emulator:
+        emulator.start()
+        device = open_device(emulator)
+        device.get_all_settings()
+        for data_format in CONVERSION_FORMATS:
+            device.Settings["GeneralSettings"]["Data_Format"] = data_format
+            for points in points_list:
+                value = bytes(points * device.Data_Format[data_format] // 8)
+                result = measure(lambda: device.data_format_conversion(value),
+                                 repeat)
+                result.update({"benchmark": "data_format_conversion",
+                               "device": "SA", "format": data_format,
+                               "points": points, "bytes": len(value)})
+                results.append(result)
+        device.close()
+    return results
+
+
+def prepare_save(profile: str, device):
+    """ Reads a trace the way the scripts do and returns the function that
+    puts it back into the device before every save, as save_data changes it
+    """
+    device.get_all_settings()
+    if profile in ("SA", "PNA"):
+        data = device.read("TRAC:DATA", "TRACE1")
+        return lambda: setattr(device, "Data", data)
+    if profile == "VNA":
+        device.SParameters = ["S11", "S21", "S12", "S22"]
+        device.Stimulus = device.read("CALC1:DATA:STIM")
+        data = device.read("CALC1:DATA:CALL", "SDAT")
+        return lambda: setattr(device, "Data", data)
+    device.Measurements = ["CHAN1"]
+    device.get_time_data()
+    data = device.read("WAV:DATA")
+    return lambda: setattr(device, "Data", [data])
+
+
+def benchmark_save(points_list, repeat: int):
+    """ Time and file size of save_data and save_archive for the VNA, SA,
+    PNA and oscilloscope drivers
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in ("VNA", "SA", "PNA", "OSCOPE"):
+            for points in points_list:
+                with Emulator(profile, port=0, points=points) as emulator:
+                    emulator.start()
+                    device = open_device(emulator)
+                    restore = prepare_save(profile, device)
+                    for name in ("save_data", "save_archive"):
+                        files = []
+
+                        def save():
+                            restore()
+                            files.append(getattr(device, name)(
+                                os.path.join(directory, profile)))
+
+                        result = measure(save, repeat)
+                        result.update({"benchmark": name,
+                                       "device": profile, "points": points,
+                                       "driver": type(device).__name__,
+                                       "bytes": os.path.getsize(files[-1])})
+                        results.append(result)
+                        for filename in files:
+                            os.remove(filename)
+                    device.close()
+    return results
+
+
+def run(read_points=READ_POINTS, save_points=SAVE_POINTS, repeat: int = 5):
+    """ Runs every benchmark and returns the results with the environment
+    they were measured in
+    """
+    results = []
+    results += benchmark_reads(read_points, repeat)
+    results += benchmark_settings(repeat)
+    results += benchmark_conversion(read_points, repeat)
+    results += benchmark_save(save_points, repeat)
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results
+    }
+
+
+if __name__ == "__main__":
+    # Runs the benchmarks and writes the results as JSON
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser()
+    parser.add_argument('--output', default='benchmark.json',
+                        help='JSON file the results are written to')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs of every benchmark')
+    parser.add_argument('--read-points', type=int, nargs='+',
+                        default=READ_POINTS)
+    parser.add_argument('--save-points', type=int, nargs='+',
+                        default=SAVE_POINTS)
+    inputs = parser.parse_args()
+    report = run(inputs.read_points, inputs.save_points, inputs.repeat)
+    with open(inputs.output, "w") as file:
+        json.dump(report, file, indent=2)
+    for result in report["results"]:
+        print(f"{result['benchmark']:<24}{result['device']:<8}"
+              f"{result.get('format', ''):<10}{result.get('points', ''):>9}"
+              f"{result['best'] * 1e3:>12.3f} ms")
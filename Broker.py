@@ -0,0 +1,361 @@
+import base64
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from getpass import getuser
+
+from Connect import connect
+
+
+def default_socket():
+    """ Returns the path of the broker socket in the runtime directory of
+    the user, or in a directory of the user in the temporary directory that
+    only the user can enter
+    """
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if not directory:
+        directory = os.path.join(tempfile.gettempdir(),
+                                 f"scpi-broker-{getuser()}")
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, "scpi-broker.sock")
+
+
+DEFAULT_SOCKET = default_socket()
+
+
+def encode_response(value):
+    """ Makes a response of a device JSON serializable, binary blocks are
+    sent as base64
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"data": base64.b64encode(bytes(value)).decode()}
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+def decode_response(value):
+    """ Reverses encode_response
+    """
+    if isinstance(value, dict) and set(value) == {"data"}:
+        return base64.b64decode(value["data"])
+    return value
+
+
+class InstrumentWorker:
+    """ Owns the connection to one instrument and runs the requests of all
+    clients on it one at a time. Every client has its own queue and the
+    queues are served round robin, so a client sending many requests can not
+    starve the others.
+    """
+
+    def __init__(self, address: str):
+        self.Address = address
+        self.Device = connect(address)
+        # Generic devices without a driver have no settings, only their
+        # queries and commands are passed through
+        self.Has_Settings = isinstance(getattr(self.Device, "Settings", None),
+                                       dict)
+        if self.Has_Settings:
+            self.Device.initialize_values()
+        # Set when a command may have changed the cached settings
+        self.Settings_Stale = False
+        self.Queues = OrderedDict()
+        self.Condition = threading.Condition()
+        self.Thread = threading.Thread(target=self.run, daemon=True)
+        self.Thread.start()
+
+    def submit(self, client, request):
+        """ Queues the request of the client and waits for its response
+        """
+        done = threading.Event()
+        entry = {"request": request, "done": done}
+        with self.Condition:
+            self.Queues.setdefault(client, deque()).append(entry)
+            self.Condition.notify()
+        done.wait()
+        return entry["response"]
+
+    def next_entry(self):
+        """ Waits for a request and returns the one of the next client in
+        turn, that client then goes to the back of the line
+        """
+        with self.Condition:
+            while not self.Queues:
+                self.Condition.wait()
+            client, queue = next(iter(self.Queues.items()))
+            entry = queue.popleft()
+            del self.Queues[client]
+            if queue:
+                self.Queues[client] = queue
+            return entry
+
+    def run(self):
+        """ Runs the queued requests until the broker stops
+        """
+        while True:
+            entry = self.next_entry()
+            if entry["request"] is None:
+                return
+            try:
+                entry["response"] = {"result": self.execute(entry["request"])}
+            except Exception as error:
+                entry["response"] = {"error": f"{type(error).__name__}: "
+                                              f"{error}"}
+            entry["done"].set()
+
+    def identification(self):
+        """ Returns the cached response to *IDN?
+        """
+        device = self.Device
+        return f"{device.Make},{device.Model},{device.Serial_Number}," \
+               f"{device.Firmware_Version}"
+
+    def execute(self, request):
+        """ Runs one request on the device
+        """
+        operation = request["op"]
+        device = self.Device
+        if operation == "query":
+            command = request["command"].strip().upper().rstrip("?")
+            if command == device.Common_SCPI["IdentificationQuery"]:
+                return self.identification()
+            if command == device.Common_SCPI["OptionIdentificationQuery"]:
+                return ",".join(device.Options)
+            return encode_response(device.read(request["command"],
+                                               request.get("extra", ''),
+                                               request.get("channel", -1)))
+        if operation == "write":
+            device.write(request["command"], request.get("value"),
+                         request.get("channel", -1))
+            self.Settings_Stale = True
+            return None
+        if operation == "transaction":
+            return [self.execute(step) for step in request["steps"]]
+        if operation == "settings":
+            return self.settings(request.get("refresh"))
+        if operation == "send_settings":
+            return self.send_settings(request["settings"])
+        if operation == "identify":
+            return {"identification": self.identification(),
+                    "options": device.Options}
+        raise ValueError(f"Unknown operation {operation}")
+
+    def settings(self, refresh: bool = False):
+        """ Returns the cached settings, they are queried again with refresh
+        or after a command was written to the instrument
+        """
+        if not self.Has_Settings:
+            raise ValueError(f"{self.Address} has no driver with settings")
+        if refresh or self.Settings_Stale:
+            self.Device.get_all_settings()
+            self.Settings_Stale = False
+        return self.Device.Settings
+
+    def send_settings(self, settings):
+        """ Sends the settings given as {key: {setting: value}} with
+        send_all_settings and returns the updated cached settings
+        """
+        self.settings()
+        for key, values in settings.items():
+            self.Device.New_Settings[key].update(values)
+        self.Device.send_all_settings()
+        return self.Device.Settings
+
+    def close(self):
+        """ Stops the worker and closes the connection
+        """
+        with self.Condition:
+            self.Queues.setdefault(None, deque()).append(
+                {"request": None, "done": threading.Event()})
+            self.Condition.notify()
+        self.Thread.join()
+        self.Device.close()
+
+
+class Broker(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Local daemon that owns one connection per instrument and lets many
+    client processes share them over a Unix socket. Clients send one JSON
+    request per line and get one JSON response per line:
+
+    {"op": "query", "address": "192.168.0.10", "command": "FREQ:STAR"}
+    {"op": "write", "address": ..., "command": "FREQ:STAR", "value": 1e9}
+    {"op": "transaction", "address": ..., "steps": [<query or write>, ...]}
+    {"op": "settings", "address": ..., "refresh": false}
+    {"op": "send_settings", "address": ..., "settings": {key: {name: value}}}
+    {"op": "identify", "address": ...}
+
+    *IDN?, *OPT? and settings are answered from the cache without talking
+    to the instrument, the settings are queried again after a write. A
+    transaction runs without requests of other clients in between. The
+    socket can only be used by the user running the broker.
+    """
+    daemon_threads = True
+
+    def __init__(self, path: str = DEFAULT_SOCKET):
+        if os.path.exists(path):
+            remove_stale_socket(path)
+        self.Path = path
+        self.Workers = {}
+        self.Workers_Lock = threading.Lock()
+        super().__init__(path, BrokerHandler)
+        os.chmod(path, 0o600)
+
+    def worker(self, address: str):
+        """ Returns the worker of the instrument, connecting to it the first
+        time it is used. The connection is made outside of Workers_Lock, so
+        only the clients of this instrument wait for it
+        """
+        with self.Workers_Lock:
+            future = self.Workers.get(address)
+            connecting = future is None
+            if connecting:
+                future = self.Workers[address] = Future()
+        if connecting:
+            try:
+                future.set_result(self.create_worker(address))
+            except Exception as error:
+                # The next client tries to connect again
+                with self.Workers_Lock:
+                    del self.Workers[address]
+                future.set_exception(error)
+        return future.result()
+
+    def create_worker(self, address: str):
+        """ Connects to the instrument and returns its worker
+        """
+        return InstrumentWorker(address)
+
+    def server_close(self):
+        """ Closes every instrument and removes the socket
+        """
+        super().server_close()
+        for future in self.Workers.values():
+            if future.done() and future.exception() is None:
+                future.result().close()
+        self.Workers = {}
+        if os.path.exists(self.Path):
+            os.remove(self.Path)
+
+
+def remove_stale_socket(path: str):
+    """ Removes the socket of a broker that is no longer running, raises
+    OSError if a broker still accepts connections on it
+    """
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"A broker is already running on {path}")
+
+
+class BrokerHandler(socketserver.StreamRequestHandler):
+    """ Serves the requests of one client connection
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                worker = self.server.worker(request["address"])
+                response = worker.submit(self, request)
+            except Exception as error:
+                response = {"error": f"{type(error).__name__}: {error}"}
+            self.wfile.write(json.dumps(response, default=str).encode()
+                             + b"\n")
+            self.wfile.flush()
+
+
+class BrokerClient:
+    """ Uses an instrument through the broker instead of connecting to it.
+    Has the read and write functions of a device:
+
+    device = BrokerClient("192.168.0.10")
+    device.write("FREQ:STAR", 1e9)
+    start = device.read("FREQ:STAR")
+    """
+
+    def __init__(self, address: str, path: str = DEFAULT_SOCKET):
+        self.Address = address
+        self.Socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.Socket.connect(path)
+        self.File = self.Socket.makefile("rwb")
+
+    def request(self, request):
+        """ Sends a request for this instrument and returns the result
+        """
+        request["address"] = self.Address
+        self.File.write(json.dumps(request).encode() + b"\n")
+        self.File.flush()
+        response = json.loads(self.File.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def read(self, command: str, extra: str = '', channel: int = -1):
+        return decode_response(self.request({
+            "op": "query", "command": command, "extra": extra,
+            "channel": channel}))
+
+    def write(self, command: str, value=None, channel: int = -1):
+        self.request({"op": "write", "command": command, "value": value,
+                      "channel": channel})
+
+    def transaction(self, steps):
+        """ Runs a list of query and write requests without requests of other
+        clients in between, returns the result of every step
+        """
+        return [decode_response(result) for result in self.request(
+            {"op": "transaction", "steps": steps})]
+
+    def settings(self, refresh: bool = False):
+        """ Returns the cached settings of the instrument
+        """
+        return self.request({"op": "settings", "refresh": refresh})
+
+    def send_settings(self, settings):
+        """ Sends the settings given as {key: {setting: value}} with
+        send_all_settings and returns the updated settings
+        """
+        return self.request({"op": "send_settings", "settings": settings})
+
+    def identify(self):
+        """ Returns the cached identification and options
+        """
+        return self.request({"op": "identify"})
+
+    def close(self):
+        self.File.close()
+        self.Socket.close()
+
+
+if __name__ == "__main__":
+    """ Runs the broker until it is interrupted
+    """
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser()
+    parser.add_argument('--socket', default=DEFAULT_SOCKET,
+                        help='Path of the Unix socket clients connect to')
+    parser.add_argument('addresses', nargs='*',
+                        help='Addresses of devices to connect to at start')
+    inputs = parser.parse_args()
+    broker = Broker(inputs.socket)
+    for address in inputs.addresses:
+        broker.worker(address)
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        broker.server_close()
@@ -1,8 +1,11 @@
 import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from OOP.BaseDevice import BaseDevice
+from OOP.Utils.Trace import tracing
+from OOP.Utils.Transport import RecordingTransport, ReplayTransport
 from OOP.Utils.Utils import process_device, process_usb_device
 
 active_usb_connections = []
@@ -30,10 +33,16 @@ def usb_connect(address: str):
     return device
 
 
-def connect(address: str):
+def connect(address, record: str = None):
     """ Takes the adrress of the device and connects to it.
     Should be able to connect to TCP/IP v4, USB, and GPIB
+    With record everything sent to and received from the device is recorded
+    to that file, which replay can play back later without the device.
+    An open connection, see OOP.Utils.Transport, can be given instead of
+    an address
     """
+    if record is not None:
+        address = RecordingTransport.open(address, record)
     base_device = BaseDevice(address)
     device = process_device(base_device)
     generic_make_model = f"{base_device.Make}{base_device.Model}" \
@@ -50,6 +59,104 @@ def connect(address: str):
     return device
 
 
+def replay(filename: str, speed: float = None):
+    """ Plays back a recording of connect in place of the device. With speed
+    the device responds as fast as it did when recorded, divided by speed,
+    without it as fast as possible
+    """
+    return connect(ReplayTransport(filename, speed))
+
+
+class Bench:
+    """ Connects to several devices at once and keeps them by role.
+    The devices are connected, initialized and closed in parallel, so
+    bringing up the bench takes as long as the slowest device instead of
+    the sum of all of them. Use it as a context manager:
+
+    with Bench({"vna": "192.168.0.10", "sg": "TestSg"}) as bench:
+        bench["vna"].send_all_settings()
+    """
+
+    def __init__(self, addresses, initialize: bool = True):
+        """ addresses is either a dictionary of role to address, or a list of
+        addresses that are then also used as the roles
+        """
+        if isinstance(addresses, dict):
+            self.Addresses = dict(addresses)
+        else:
+            self.Addresses = {address: address for address in addresses}
+        self.Initialize = initialize
+        self.Devices = {}
+
+    def __getitem__(self, role):
+        """ Returns the device of the role
+        """
+        return self.Devices[role]
+
+    def __iter__(self):
+        return iter(self.Devices.values())
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def trace(self, filename: str):
+        """ Records every device of the bench while the with block runs and
+        writes the timeline to filename as a Chrome trace, see
+        OOP.Utils.Trace:
+
+        with bench.trace("session.json"):
+            bench["vna"].get_all_settings()
+        """
+        return tracing(self.Devices.values(), filename)
+
+    def open_device(self, address: str):
+        """ Connects to a device and initializes it if the bench does
+        """
+        device = connect(address)
+        if self.Initialize:
+            try:
+                device.initialize_device()
+            except Exception:
+                device.close()
+                raise
+        return device
+
+    def open(self):
+        """ Connects to every device in parallel. If any device fails, the
+        devices that did connect are closed again and the error is raised
+        """
+        with ThreadPoolExecutor(max_workers=max(1, len(self.Addresses))) \
+                as executor:
+            futures = {role: executor.submit(self.open_device, address)
+                       for role, address in self.Addresses.items()}
+        errors = []
+        for role, future in futures.items():
+            if future.exception() is None:
+                self.Devices[role] = future.result()
+            else:
+                errors.append(future.exception())
+        if errors:
+            self.close()
+            raise errors[0]
+        return self.Devices
+
+    def close(self):
+        """ Closes every device in parallel
+        """
+        if not self.Devices:
+            return
+        with ThreadPoolExecutor(max_workers=len(self.Devices)) as executor:
+            futures = [executor.submit(device.close)
+                       for device in self.Devices.values()]
+        self.Devices = {}
+        for future in futures:
+            future.result()
+
+
 if __name__ == "__main__":
     """ Allows for testing when run straight from this file, or allows
     arguments to be passed to confirm control from other applications
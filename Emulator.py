@@ -0,0 +1,435 @@
+import re
+import socket
+import socketserver
+import threading
+import time
+
+import numpy as np
+
+# Every profile has the response to *IDN? and *OPT?, the values of the
+# settings after a reset, the setting holding the number of points and the
+# one holding the data format, and the queries that return traces by the
+# kind of trace. Start, stop, center and span frequency change together
+# unless coupled_frequencies is False. Settings that are not listed read
+# back as 0 until they are written. Settings of a channel list, like
+# "VOLT 5, (@1,2)", are kept per channel as "VOLT (@1)" and "VOLT (@2)"
+Profiles = {
+    "SA": {
+        "identification": "Keysight Technologies,N9030A,MY00000001,A.26.05",
+        "options": "503,B25,P03",
+        "settings": {
+            "FEED:RF:PORT": "RFIN", "INIT:CONT": "1",
+            "FREQ:STAR": "10000000", "FREQ:STOP": "1000000000",
+            "SWE:POIN": "1001", "BAND": "1000000",
+            "DISP:WIND:TRAC:Y:RLEV": "0", "TRIG:SOUR": "IMM",
+            "TRIG:SLOP": "POS", "FORM": "ASC,0"
+        },
+        "points": "SWE:POIN",
+        "format": "FORM",
+        "traces": {r"TRAC(:DATA)?": "spectrum"}
+    },
+    "PNA": {
+        "identification": "Rohde&Schwarz,FSPN26-1322.8003K26,100001,1.20",
+        "options": "B1,B60",
+        "settings": {
+            "CONF:PNO:MEAS": "PNO", "INIT:CONT": "1",
+            "FREQ:CENT": "1000000000", "FREQ:STAR": "10",
+            "FREQ:STOP": "10000000", "DISP:TRAC:MODE": "WRIT",
+            "SWE:COUN": "1", "SWE:MODE": "NORM", "SWE:POIN": "1001",
+            "FORM:DATA": "ASC,0"
+        },
+        "points": "SWE:POIN",
+        "format": "FORM:DATA",
+        # The center frequency is the carrier, start and stop are offsets
+        "coupled_frequencies": False,
+        "traces": {r"TRAC(:DATA)?": "phase_noise"}
+    },
+    "VNA": {
+        "identification": "Rohde&Schwarz,ZVA24-4Port,100001,3.80",
+        "options": "K4,B16",
+        "settings": {
+            "INIT:CONT": "1", "SWE:POIN": "201", "FORM:DATA": "ASC,0",
+            "SENS1:FREQ:STAR": "10000000", "SENS1:FREQ:STOP": "24000000000",
+            "SENS1:BAND:RES": "10000", "SOUR1:POW": "0",
+            "CONF:CHAN:CAT": "'1,Ch1'",
+            "CALC1:PAR:CAT": "'Trc1,S11,Trc2,S21,Trc3,S12,Trc4,S22'",
+            "CALC1:DATA:CALL:CAT": "'S11,S21,S12,S22'"
+        },
+        "points": "SWE:POIN",
+        "format": "FORM:DATA",
+        "traces": {r"CALC(?P<channel>\d*):DATA(:CALL)?": "s_parameters",
+                   r"CALC(?P<channel>\d*):DATA:STIM": "stimulus"}
+    },
+    "OSCOPE": {
+        "identification": "Keysight Technologies,MSOS804A,MY00000001,6.30",
+        "options": "0",
+        "settings": {
+            "TIM:SCAL": "0.001", "TRIG:MODE": "EDGE", "TRIG:LEV": "0",
+            "SYST:HEAD": "0", "ACQ:MODE": "RTIM", "ACQ:COMP": "100",
+            "WAV:SOUR": "CHAN1", "WAV:FORM": "ASC", "ACQ:COUN": "8",
+            "ACQ:POIN": "1000"
+        },
+        "points": "ACQ:POIN",
+        "format": "WAV:FORM",
+        "traces": {r"WAV:DATA": "waveform"}
+    },
+    "SG": {
+        "identification": "Rohde&Schwarz,SMB100A,100001,3.1.19",
+        "options": "B103,B120",
+        "settings": {
+            "POW:POW": "0", "FREQ": "1000000000", "FREQ:STAR": "300000000",
+            "FREQ:STOP": "300000000", "SWE:MODE": "AUTO",
+            "SWE:SPAC": "LIN", "LFO": "0", "AM:STAT": "0", "FM:STAT": "0",
+            "PM:STAT": "0", "PGEN:STAT": "0", "DISP:PSAV": "1"
+        },
+        "traces": {}
+    },
+    "PG": {
+        "identification": "Keysight Technologies,EDU33211A,MY00000001,1.0",
+        "options": "0",
+        "settings": {
+            "FUNC": "SIN", "VOLT:LOW": "-0.05", "VOLT:HIGH": "0.05",
+            "FREQ": "1000", "INIT:CONT": "1", "TRIG:SOUR": "IMM",
+            "TRIG:DEL": "0", "OUTP:TRIG": "0", "TRIG:SLOP": "POS",
+            "BURS:NCYC": "1"
+        },
+        "traces": {}
+    },
+    "DMM": {
+        "identification": "Keysight Technologies,34465A,MY00000001,A.03.01",
+        "options": "DIG,MEM",
+        "settings": {
+            "FUNC": '"VOLT"', "TRIG:LEV": "0", "TRIG:DEL:AUTO": "1",
+            "FORM:DATA": "ASC,9", "VOLT:RANG:AUTO": "1", "VOLT:RANG": "10",
+            "SAMP:COUN": "1"
+        },
+        "points": "SAMP:COUN",
+        "format": "FORM:DATA",
+        "traces": {r"READ|FETC|DATA2|MEAS(:VOLT(:DC)?)?": "reading"}
+    },
+    "PM": {
+        "identification": "Keysight Technologies,N1912A,MY00000001,A2.01.06",
+        "options": "0",
+        "settings": {
+            "INIT:CONT": "0", "TRIG:SEQ:SLOP": "POS",
+            "TRIG:SEQ:LEV:AUTO": "1", "TRIG:SEQ:LEV": "0",
+            "TRIG:SOUR": "IMM", "TRIG:SEQ:DEL": "0",
+            "FORM:READ:DATA": "ASC", "FREQ:STAR": "50000000",
+            "FREQ:STOP": "50000000", "FREQ:STEP": "0", "TRIG:COUN": "1"
+        },
+        "points": "TRIG:COUN",
+        "format": "FORM:READ:DATA",
+        "traces": {r"(READ|FETC|MEAS)\d*(:POW(:AC)?)?|CALC\d*:DATA(:ALL)?":
+                   "power"}
+    },
+    "DCPS": {
+        "identification": "Keysight Technologies,N6700C,MY00000001,D.04.01",
+        "options": "0",
+        "settings": dict({
+            f"{header} (@{channel})": "0" for channel in range(1, 5)
+            for header in ("OUTP:STAT", "SOUR:VOLT:LEV:IMM:AMPL",
+                           "SOUR:CURR:LEV:IMM:AMPL")}, FORM="ASC"),
+        "format": "FORM",
+        "traces": {}
+    }
+}
+
+# Data type of the binary formats
+Binary_Formats = {
+    "REAL,32": "f4", "REAL,64": "f8", "INT,32": "i4", "REAL": "f8",
+    "BIN": "f8", "FLO": "f4", "FLOAT": "f4", "WORD": "i2", "BYTE": "i1"
+}
+# Values written as ON and OFF read back as 1 and 0
+Boolean_Values = {"ON": "1", "OFF": "0", "TRUE": "1", "FALSE": "0"}
+# Frequency settings that change together
+Frequency_Headers = ("STAR", "STOP", "CENT", "SPAN")
+
+
+class EmulatedInstrument:
+    """The state of an emulated instrument, answers the SCPI messages of the
+    profile. Traces are generated from the settings, so the frequencies and
+    number of points match what the driver has set up"""
+
+    def __init__(self, profile: str, points: int = None, seed: int = 0):
+        self.Profile = Profiles[profile.upper()]
+        self.Seed = seed
+        self.Lock = threading.Lock()
+        self.Traces = [(re.compile(pattern + r"$"), kind) for pattern, kind
+                       in self.Profile["traces"].items()]
+        # Last generated trace by the settings it was generated from
+        self.Trace_Cache = {}
+        self.Points = points
+        self.reset()
+
+    def reset(self):
+        """Returns the settings to the ones of the profile"""
+        self.State = dict(self.Profile["settings"])
+        if self.Points is not None:
+            self.State[self.Profile["points"]] = str(self.Points)
+        if self.Profile.get("coupled_frequencies", True):
+            for header in list(self.State):
+                if header.endswith("FREQ:STAR"):
+                    self.couple_frequencies(header[:-4], "STAR")
+
+    def handle(self, line: str):
+        """Runs every message of a line, returns the response to send, None
+        when the line has no queries"""
+        responses = []
+        with self.Lock:
+            for message in line.strip().split(";"):
+                message = message.strip().lstrip(":")
+                if not message:
+                    continue
+                header, _, argument = message.partition(" ")
+                header = header.upper()
+                if header.endswith("?"):
+                    responses.append(self.query(header[:-1],
+                                                argument.strip()))
+                else:
+                    self.command(header, argument.strip())
+        if not responses:
+            return None
+        if len(responses) == 1:
+            return responses[0]
+        return b";".join(responses)
+
+    def command(self, header: str, argument: str):
+        """Changes the state like the instrument would"""
+        if header == "*RST":
+            self.reset()
+            return
+        if header.startswith("*"):
+            return
+        argument, _, channels = argument.partition("(@")
+        value = argument.strip().rstrip(",").strip()
+        value = Boolean_Values.get(value.upper(), value)
+        if channels:
+            for channel in channels.rstrip(")").split(","):
+                self.State[f"{header} (@{channel.strip()})"] = value
+            return
+        self.State[header] = value
+        prefix, found, name = header.rpartition("FREQ:")
+        if found and name in Frequency_Headers \
+                and self.Profile.get("coupled_frequencies", True):
+            self.couple_frequencies(prefix + found, name)
+
+    def couple_frequencies(self, prefix: str, changed: str):
+        """Updates start/stop after center/span were written and the other
+        way around"""
+        values = {name: float(self.State.get(prefix + name, 0))
+                  for name in Frequency_Headers}
+        if changed in ("STAR", "STOP"):
+            values["CENT"] = (values["STAR"] + values["STOP"]) / 2
+            values["SPAN"] = values["STOP"] - values["STAR"]
+        else:
+            values["STAR"] = values["CENT"] - values["SPAN"] / 2
+            values["STOP"] = values["CENT"] + values["SPAN"] / 2
+        for name, value in values.items():
+            self.State[prefix + name] = f"{value:g}" if value != int(value) \
+                else str(int(value))
+
+    def query(self, header: str, argument: str):
+        """Returns the response to a query"""
+        if header == "*IDN":
+            return self.Profile["identification"].encode()
+        if header == "*OPT":
+            return self.Profile["options"].encode()
+        if header in ("*OPC", "*TST", "*ESR", "*STB"):
+            return b"1" if header == "*OPC" else b"0"
+        for pattern, kind in self.Traces:
+            match = pattern.match(header)
+            if match:
+                return self.trace(kind,
+                                  match.groupdict().get("channel") or "1")
+        if header in ("WAV:XOR", "WAV:XINC"):
+            scale = float(self.State.get("TIM:SCAL", 0.001))
+            points = self.points()
+            return str(-5 * scale if header == "WAV:XOR"
+                       else 10 * scale / max(points - 1, 1)).encode()
+        if argument.startswith("(@"):
+            return ",".join(self.State.get(f"{header} (@{channel.strip()})",
+                                           "0") for channel in
+                            argument[2:].rstrip(")").split(",")).encode()
+        return self.State.get(header, "0").encode()
+
+    def points(self):
+        return int(float(self.State.get(self.Profile.get("points"), 0)))
+
+    def frequency(self, name: str, channel: str):
+        for prefix in (f"SENS{channel}:", "SENS:", ""):
+            value = self.State.get(f"{prefix}FREQ:{name}")
+            if value is not None:
+                return float(value)
+        return 0.0
+
+    def trace(self, kind: str, channel: str):
+        """Returns the trace as comma separated ASCII or as a #NB block,
+        depending on the data format"""
+        data_format = self.State.get(self.Profile["format"], "ASC")
+        data_format = re.sub(r"\s", "", data_format).upper()
+        start = self.frequency("STAR", channel)
+        stop = self.frequency("STOP", channel)
+        key = (kind, channel, data_format, self.points(), start, stop,
+               self.State.get("TIM:SCAL"))
+        if key not in self.Trace_Cache:
+            values = self.trace_values(kind, self.points(), start, stop)
+            self.Trace_Cache = {key: format_values(values, data_format)}
+        return self.Trace_Cache[key]
+
+    def trace_values(self, kind: str, points: int, start: float,
+                     stop: float):
+        """Generates a trace of the kind, the same every time for the same
+        settings"""
+        random = np.random.default_rng(self.Seed)
+        frequencies = np.linspace(start, stop, points)
+        if kind == "spectrum":
+            center = (start + stop) / 2
+            width = max((stop - start) / 50, 1)
+            return -90 + random.normal(0, 1, points) \
+                + 70 * np.exp(-((frequencies - center) / width) ** 2)
+        if kind == "phase_noise":
+            offsets = np.geomspace(max(start, 1), max(stop, 10), points)
+            noise = -80 - 20 * np.log10(offsets / offsets[0]) \
+                + random.normal(0, 0.5, points)
+            return np.column_stack((offsets, noise)).ravel()
+        if kind == "reading":
+            return 1 + random.normal(0, 1e-6, points)
+        if kind == "power":
+            return -10 + random.normal(0, 0.01, points)
+        if kind == "stimulus":
+            return frequencies
+        if kind == "s_parameters":
+            phase = -2 * np.pi * frequencies / max(stop, 1)
+            s_parameters = [0.1 * np.exp(1j * 4 * phase),
+                            0.9 * np.exp(1j * phase),
+                            0.9 * np.exp(1j * phase),
+                            0.1 * np.exp(1j * 3 * phase)]
+            return np.concatenate([np.column_stack(
+                (s.real, s.imag)).ravel() for s in s_parameters])
+        # Waveform, a sine with noise at full scale
+        samples = np.sin(np.linspace(0, 10 * np.pi, points))
+        return samples + random.normal(0, 0.01, points)
+
+
+def format_values(values, data_format: str):
+    """Returns the values as the instrument sends them in data_format"""
+    dtype = Binary_Formats.get(data_format)
+    if dtype is None:
+        return ",".join(np.char.mod("%.9E", values)).encode()
+    if dtype == "i1":
+        values = np.clip(values * 127, -128, 127)
+    elif dtype == "i2":
+        values = np.clip(values * 32767, -32768, 32767)
+    data = np.asarray(values).astype("<" + dtype).tobytes()
+    length = str(len(data))
+    return f"#{len(length)}{length}".encode() + data
+
+
+class EmulatorHandler(socketserver.StreamRequestHandler):
+    """ Serves one connection to the emulated instrument
+    """
+
+    def setup(self):
+        super().setup()
+        # Responses to pipelined queries are sent straight away
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        server = self.server
+        for line in self.rfile:
+            response = server.Instrument.handle(line.decode(errors="replace"))
+            if response is None:
+                continue
+            if server.Latency:
+                time.sleep(server.Latency)
+            self.send(response + b"\n")
+
+    def send(self, data: bytes):
+        """Sends the data, no faster than the bandwidth of the server"""
+        bandwidth = self.server.Bandwidth
+        if not bandwidth:
+            self.wfile.write(data)
+            return
+        chunk_size = 65536
+        for index in range(0, len(data), chunk_size):
+            chunk = data[index:index + chunk_size]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / bandwidth)
+
+
+class Emulator(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """ Local SCPI instrument that the real drivers can connect to, for
+    benchmarking the socket, parsing and file code without hardware:
+
+    with Emulator("SA", port=0, latency=0.001) as emulator:
+        emulator.start()
+        device = connect(emulator.Address)
+
+    profile is one of Profiles. latency is the seconds before every
+    response, bandwidth the bytes per second responses are sent at, None is
+    as fast as possible, and points overrides the number of points of the
+    profile. Port 0 picks a free port, host can be an IPv6 address
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, profile: str, host: str = "127.0.0.1",
+                 port: int = 5025, latency: float = 0.0,
+                 bandwidth: float = None, points: int = None):
+        self.Instrument = EmulatedInstrument(profile, points)
+        self.Latency = latency
+        self.Bandwidth = bandwidth
+        self.Thread = None
+        if ":" in host:
+            self.address_family = socket.AF_INET6
+        super().__init__((host, port), EmulatorHandler)
+        host, port = self.server_address[:2]
+        self.Address = f"[{host}]:{port}" if ":" in host \
+            else f"{host}:{port}"
+
+    def start(self):
+        """ Serves connections in a background thread
+        """
+        self.Thread = threading.Thread(target=self.serve_forever,
+                                       args=(0.05,), daemon=True)
+        self.Thread.start()
+        return self.Address
+
+    def stop(self):
+        """ Stops serving and closes the server
+        """
+        if self.Thread is not None:
+            self.shutdown()
+            self.Thread.join()
+            self.Thread = None
+        self.server_close()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == "__main__":
+    """ Runs the emulator until it is interrupted
+    """
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser()
+    parser.add_argument('profile', choices=sorted(Profiles),
+                        help='Device type to emulate')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5025)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds before every response')
+    parser.add_argument('--bandwidth', type=float, default=None,
+                        help='Bytes per second responses are sent at')
+    parser.add_argument('--points', type=int, default=None,
+                        help='Number of points of the traces')
+    inputs = parser.parse_args()
+    emulator = Emulator(inputs.profile, inputs.host, inputs.port,
+                        inputs.latency, inputs.bandwidth, inputs.points)
+    try:
+        emulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.server_close()
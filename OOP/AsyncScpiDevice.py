@@ -0,0 +1,276 @@
+import asyncio
+
+from OOP.BaseDevice import BaseDevice
+from OOP.ScpiDevice import parse_identification, parse_options
+from OOP.Utils import Framing
+from OOP.Utils.Transport import parse_address
+from OOP.Utils.Utils import create_driver
+
+
+class AsyncOnlyConnection:
+    """Connection of the driver of an AsyncScpiDevice. Only the awaitable
+    methods of AsyncScpiDevice talk to the device, so the driver methods
+    that would use the connection themselves raise a RuntimeError instead of
+    treating the device as a test device or failing on a missing socket"""
+
+    def __init__(self, address: str = ""):
+        self.Address = address
+
+    def unavailable(self, *args, **kwargs):
+        raise RuntimeError("The driver of an AsyncScpiDevice can not talk "
+                           "to the device, await the methods of the "
+                           "AsyncScpiDevice instead")
+
+    send = sendall = recv = recv_into = unavailable
+
+    def settimeout(self, timeout):
+        pass
+
+    def gettimeout(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class AsyncScpiDevice:
+    """ Asyncio counterpart of ScpiDevice, so one event loop can wait on a
+    whole rack of instruments at once instead of one thread per instrument.
+
+    The instrument is still described by the usual driver class (VNAClass,
+    SAClass, OscopeClass, ...), which is created from the identification
+    like connect does. Only the communication is awaited here, the settings,
+    settings schema and setters of the driver are used unchanged. Attributes
+    that are not found on this object are looked up on the driver, so
+    device.set_points(401) followed by await device.send_all_settings()
+    works like it does on the driver itself. Driver methods that talk to
+    the device, which have no awaitable counterpart here, raise a
+    RuntimeError, see AsyncOnlyConnection.
+    """
+    # Port of the raw SCPI socket
+    Port = 5025
+    # Number of bytes requested from the stream for every receive
+    Receive_Size = 65536
+    # Seconds to wait for the device to send the next bytes of a response
+    Timeout = 2
+    # Seconds the device has to be silent after a termination character
+    # before an indefinite length block "#0" is complete
+    Indefinite_Block_Wait = 0.1
+
+    def __init__(self, reader, writer, address: str = ""):
+        """Initializes the device on an open connection, use open to connect
+        and identify the device"""
+        self.Reader = reader
+        self.Writer = writer
+        self.Address = address
+        self.Is_Usb_Connection = False
+        # Taken over by the driver, see AsyncOnlyConnection
+        self.Device = AsyncOnlyConnection(address)
+        # Bytes received from the device that belong to the next response
+        self.Receive_Buffer = bytearray()
+        self.TChar = "\n"
+        self.BinaryEndsWithTermination = True
+        self.DataHeader = "#0"
+        self.Make = ""
+        self.Model = ""
+        self.Serial_Number = ""
+        self.Firmware_Version = ""
+        self.Options = []
+        self.driver = None
+
+    def __getattr__(self, name):
+        """Looks up everything else on the driver"""
+        driver = self.__dict__.get("driver")
+        if driver is None:
+            raise AttributeError(name)
+        return getattr(driver, name)
+
+    @classmethod
+    async def open(cls, address: str, port: int = None, driver=None):
+        """Connects to the device, identifies it and creates its driver.
+        The address can include the port like the address of connect.
+        driver is the driver class to use, by default it is looked up from
+        the make and model like connect does"""
+        reader, writer = await asyncio.open_connection(
+            *parse_address(address, port or cls.Port))
+        device = cls(reader, writer, address.upper())
+        await device.identify(driver)
+        return device
+
+    async def identify(self, driver=None):
+        """Queries the identification and options of the device and creates
+        the driver, which falls back to BaseDevice for unknown devices"""
+        await self.send_message("*IDN?")
+        id_query = parse_identification(await self.receive_response())
+        self.Make = id_query[0]
+        self.Model = id_query[1]
+        self.Serial_Number = id_query[2]
+        self.Firmware_Version = id_query[3]
+        await self.send_message("*OPT?")
+        self.Options = parse_options(await self.receive_response())
+        receive_buffer = self.Receive_Buffer
+        if driver is not None:
+            self.driver = driver(self)
+        else:
+            self.driver = create_driver(self.Make, self.Model, self) \
+                or BaseDevice(self)
+        # The driver takes over the receive buffer, but only this object
+        # receives from the stream
+        self.Receive_Buffer = receive_buffer
+        self.TChar = self.driver.TChar
+        self.BinaryEndsWithTermination = self.driver.BinaryEndsWithTermination
+
+    async def close(self):
+        """Closes the connection with the device"""
+        self.Writer.close()
+        await self.Writer.wait_closed()
+
+    async def send_message(self, message: str):
+        """ Sends a formatted message followed by the termination
+        """
+        if self.driver is not None:
+            self.driver.log_debug("%s", message)
+        self.Writer.write(str.encode(f"{message}{self.TChar}"))
+        await self.Writer.drain()
+
+    async def receive_more(self):
+        """ Receives the next bytes of the device into the receive buffer,
+        raises asyncio.TimeoutError if the device sends nothing for Timeout
+        """
+        more_data = await asyncio.wait_for(
+            self.Reader.read(self.Receive_Size), self.Timeout)
+        if not more_data:
+            raise ConnectionError("Device closed the connection")
+        self.Receive_Buffer += more_data
+
+    async def receive_request(self, request):
+        """ Receives what a framing generator asks for, see OOP.Utils.Framing
+        """
+        if request is Framing.QUIET:
+            try:
+                more_data = await asyncio.wait_for(
+                    self.Reader.read(self.Receive_Size),
+                    self.Indefinite_Block_Wait)
+            except asyncio.TimeoutError:
+                return False
+            self.Receive_Buffer += more_data
+            return bool(more_data)
+        if request is Framing.MORE:
+            await self.receive_more()
+            return None
+        more_data = await asyncio.wait_for(
+            self.Reader.read(len(request)), self.Timeout)
+        if not more_data:
+            raise ConnectionError("Device closed the connection")
+        request[:len(more_data)] = more_data
+        return len(more_data)
+
+    async def run_framing(self, framing):
+        """ Answers the requests of a framing generator of OOP.Utils.Framing
+        with receives from the device and returns its result
+        """
+        try:
+            request = next(framing)
+            while True:
+                request = framing.send(await self.receive_request(request))
+        except StopIteration as stop:
+            return stop.value
+
+    async def receive_until(self, termination: bytes):
+        """ Returns the bytes from the device up to, but not including, the
+        termination
+        """
+        return await self.run_framing(Framing.until(self.Receive_Buffer,
+                                                    termination))
+
+    async def receive_response(self):
+        """ Receives one response, either a binary block or an ASCII string
+        without the termination
+        """
+        header, data = await self.run_framing(Framing.response(
+            self.Receive_Buffer, self.TChar.encode(),
+            self.BinaryEndsWithTermination))
+        if header is not None:
+            self.DataHeader = header
+        return data
+
+    async def read(self, command: str, extra: str = '', channel: int = -1):
+        """ Writes queries to the device and receives the response
+        """
+        await self.send_message(self.driver.format_query(command, extra,
+                                                         channel))
+        return await self.receive_response()
+
+    async def write(self, command: str, value=None, channel: int = -1):
+        """ Write the command directly to the hardware to execute
+        """
+        await self.send_message(self.driver.format_command(command, value,
+                                                           channel))
+
+    async def read_messages(self, messages):
+        """ Sends formatted queries and returns the responses in order,
+        keeping up to Max_Queries_In_Flight of the driver outstanding, or
+        as compound queries when the driver uses Compound_Queries
+        """
+        responses = []
+        if self.driver.Compound_Queries:
+            size = max(1, self.driver.Max_Queries_In_Flight)
+            for start in range(0, len(messages), size):
+                batch = messages[start:start + size]
+                await self.send_message(self.driver.join_commands(
+                    message.strip() for message in batch))
+                responses.extend(Framing.split_compound(
+                    (await self.receive_until(self.TChar.encode())).decode(),
+                    len(batch)))
+            return responses
+        for step, index in Framing.pipeline(
+                len(messages), self.driver.Max_Queries_In_Flight):
+            if step is Framing.SEND:
+                await self.send_message(messages[index])
+            else:
+                responses.append(await self.receive_response())
+        return responses
+
+    async def write_messages(self, messages):
+        """ Sends formatted commands as compound commands and waits for the
+        *OPC? at the end of the last one
+        """
+        for line in self.driver.command_lines(messages):
+            await self.send_message(line)
+        await self.receive_until(self.TChar.encode())
+
+    async def get_settings(self, names):
+        """Queries the settings given as a list of (key, setting) from the
+        device and applies these values to the Settings of the driver
+        """
+        settings = self.driver.compiled_settings(names)
+        self.driver.apply_settings(settings, await self.read_messages(
+            [setting.query for setting in settings]))
+
+    async def get_all_settings(self):
+        """Queries all values in Settings from the device"""
+        await self.get_settings(self.driver.all_setting_names())
+
+    async def initialize_values(self):
+        """Gets the current settings from the device and makes them the values
+        of Settings and New_Settings"""
+        await self.get_all_settings()
+        self.driver.track_settings()
+
+    async def check_settings(self, names=None):
+        """Queries the settings given as a list of (key, setting) and their
+        coupled settings, or all settings when names is None, and returns
+        the ones that are different from New_Settings
+        """
+        checked = self.driver.settings_to_check(names)
+        await self.get_settings(checked)
+        return self.driver.compare_settings(checked)
+
+    async def send_all_settings(self):
+        """Sends the changed values in New_Settings and confirms that they
+        have been applied to the device"""
+        changes = self.driver.settings_changes()
+        await self.write_messages([setting.serialize(value)
+                                   for setting, value in changes])
+        names = [(setting.key, setting.name) for setting, _ in changes]
+        self.driver.settings_sent(names, await self.check_settings(names))
@@ -1,15 +1,12 @@
 import sys
-from tkinter import messagebox, Tk
-from OOP.ScpiDevice import ScpiDevice
-import numpy as np
+from OOP.ScpiDevice import ScpiDevice, parse_ascii_values
+from OOP.Utils.OperatorPrompt import HeadlessPrompt, get_operator_prompt
+from OOP.Utils.TrackedSettings import TrackedSettings
 
 
 def string_to_list(string_to_convert: str):
-    """Changes a comma delimited string to a list"""
-    string_list = string_to_convert.split(',')
-    string_list = [i for i in string_list if i != '']
-    string_list = np.array([float(i) for i in string_list])
-    return string_list
+    """Changes a comma delimited string to an array of floats"""
+    return parse_ascii_values(string_to_convert)
 
 
 class BaseDevice(ScpiDevice):
@@ -25,15 +22,23 @@ class BaseDevice(ScpiDevice):
         self.Settings = None
         self.Extra_Setting = None
         self.Setting_Commands = None
+        # Prompt used to ask the operator, None uses the shared prompt
+        self.Operator_Prompt = None
 
     def initialize_values(self):
         """Gets the current settings from the device and makes them the values
-        of Settings and New_Settings"""
+        of Settings and New_Settings. New_Settings remembers which settings
+        are changed, so send_all_settings only sends and confirms those"""
         self.get_all_settings()
+        self.track_settings()
+
+    def track_settings(self):
+        """Makes New_Settings a copy of Settings that remembers which
+        settings are changed"""
         self.New_Settings = {}
         for key in self.Settings:
             # Sets a the two settings up with New_Settings
-            self.New_Settings[key] = self.Settings[key].copy()
+            self.New_Settings[key] = TrackedSettings(self.Settings[key])
 
     def set_sweep_continuous(self, continuous: bool):
         """Sets whether the measurement on the device will be continuous or not
@@ -172,23 +177,28 @@ class BaseDevice(ScpiDevice):
         """
         raise Exception("Not Implemented")
 
+    def operator_prompt(self):
+        """ Returns the prompt used to ask the operator. Test devices never
+        wait for an answer, other devices use Operator_Prompt if it is set and
+        the shared prompt otherwise
+        """
+        if self.Operator_Prompt is not None:
+            return self.Operator_Prompt
+        if self.Make == "TEST":
+            return HeadlessPrompt(self.logger)
+        return get_operator_prompt()
+
     def show_okay_gui(self, title=None, message=None):
         """ Creates an information message box
         """
-        tk = Tk()
-        tk.withdraw()
-        messagebox.showinfo(title=title, message=message)
+        self.operator_prompt().show_okay(title=title, message=message)
 
     def show_yes_no_gui(self, title=None, message=None):
-        """ Creates a response message box
+        """ Creates a response message box, returns 'yes' or 'no'
         """
-        tk = Tk()
-        tk.withdraw()
-        return messagebox.askquestion(title=title, message=message)
+        return self.operator_prompt().ask_yes_no(title=title, message=message)
 
     def show_warning_gui(self, title=None, message=None):
         """ Creates a warning message box
         """
-        tk = Tk()
-        tk.withdraw()
-        messagebox.showwarning(title=title, message=message)
+        self.operator_prompt().show_warning(title=title, message=message)
@@ -33,6 +33,9 @@ class DCPSClass(BaseDevice):
             "ASC": 0,
             "REAL": 32
         }
+        self.Data_Types = {
+            "REAL": "f4"
+        }
         self.Setting_Commands = {
             "Power_On": "OUTP:STAT {}, (@{})",
             "Voltage_Level": "SOUR:VOLT:LEV:IMM:AMPL {}, (@{})",
@@ -117,6 +117,7 @@ class DMMClass(BaseDevice):
                     "Measurement_Range": f"{function}:RANG"
                 }
             )
+            self.invalidate_schema()
             self.get_all_settings()
 
     def set_auto_measurement_level(self, auto: bool) -> None:
@@ -168,7 +168,8 @@ class KeysightInfiniiumScope(OscopeClass):
         self.TimingData = []
         origin = float(self.read("WAV:XOR"))  # time value at first datapoint
         increment = float(self.read("WAV:XINC"))  # time diff between consecutive datapoints
-        points = self.Settings["Acquisition_Points"]  # defined by user before aquisition, this is an integer
+        # defined by user before aquisition, this is an integer
+        points = self.Settings["GeneralSettings"]["Acquisition_Points"]
         for element in range(points):
             self.TimingData.append(origin + (increment * element))
         return self.TimingData
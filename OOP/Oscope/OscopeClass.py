@@ -8,8 +8,8 @@ import os
 import string
 import sys
 
-import numpy as np
 from OOP.BaseDevice import BaseDevice
+from OOP.ScpiDevice import parse_ascii_values
 
 
 class OscopeClass(BaseDevice):
@@ -67,6 +67,13 @@ class OscopeClass(BaseDevice):
             "WORD": 16,
             "FLO": 32
         }
+        # BYTE and WORD are signed integers
+        self.Data_Types = {
+            "BIN": "f8",
+            "BYTE": "i1",
+            "WORD": "i2",
+            "FLO": "f4"
+        }
         self.Setting_Commands = {
             "Time_per_Division": "TIM:SCAL",
             "Trigger_Mode": "TRIG:MODE",
@@ -107,8 +114,8 @@ class OscopeClass(BaseDevice):
             "Trigger_Delay_Time": "",
             "Trigger_Edge_Source": "",
             "Trigger_Edge_Edge": "",
-            "Trigger_Level": "{}".format(self.Settings["GeneralSettings"]
-                                         ["Trigger_Source"]),
+            # The trigger level is queried for the trigger source
+            "Trigger_Level": "",
             "Query_Headers": "",
             "Acquisition_Mode": "",
             "Acquisition_Complete": "",
@@ -146,6 +153,8 @@ class OscopeClass(BaseDevice):
                 "Acquisition_Points": 50
             }
         }
+        self.Extra_Setting["Trigger_Level"] = \
+            self.Settings["GeneralSettings"]["Trigger_Edge_Source"]
         self.Settings_Format = {
             "Time_per_Division": float,
             "Trigger_Mode": str,
@@ -674,42 +683,31 @@ class OscopeClass(BaseDevice):
                 self.TimingData.append(origin + (increment * element))
         return self.TimingData
 
-    def measurement_info(self):
+    def measurement_info(self, channel: str = ""):
         """Sets header information for the save file"""
         info_text = '\n!Measurements:'
         for element in range(len(self.Measurements)):
             info_text = '\t' + self.Measurements[element]
         return info_text
 
-    def create_data_text(self):
-        """Creates table of Data for save file, excludes header info"""
+    def data_table(self, channel: str = ""):
+        """Returns the table of Data for save file, excludes header info"""
         """Inputs self.Measurements as 1D list of strings and time as 1D list
-        of floats. Outputs string that is a tab delimited table of time and
-        measurement data. If the datatype is ascii, input self.Data as 1D list
-        of comma delimited strings. Otherwise, data_format_conversion turns raw
+        of floats. Returns columns of time and measurement data. If the
+        datatype is ascii, input self.Data as 1D list of comma delimited
+        strings. Otherwise, data_format_conversion turns every raw block of
         self.Data into an array."""
-        for block in range(len(self.Data)):
-            self.Data[block] = self.Data[block].translate(
-                {ord(i): None for i in string.whitespace})
-            self.Data[block] = self.Data[block].split(',')
-            self.Data[block] = [i for i in self.Data[block] if i != '']
-            self.Data[block] = np.array([float(i) for i in self.Data[block]])
-        data_text = "\n\n!Time"
         if self.Settings["GeneralSettings"]["Data_Format"] != "ASC":
-            # TODO handle oscope datatypes (use Data_Format_Bits)
-            data_list = self.data_format_conversion(self.Data)
-            self.TimingData = self.data_format_conversion(self.TimingData)
-            # TODO handle oscope datatypes (use Data_Format_Bits)
+            convert = self.data_format_conversion
         else:
-            data_list = self.Data
+            convert = parse_ascii_values
+        for block in range(len(self.Data)):
+            self.Data[block] = convert(self.Data[block])
+        title = "\n\n!Time"
         for measurement in self.Measurements:
-            data_text = "{}\t{}".format(data_text, measurement)
-        for timeElement in range(len(self.TimingData)):
-            data_text = "{}\n{}".format(
-                data_text, self.TimingData[timeElement])
-            for dataElement in range(len(self.Measurements)):
-                data_text = "{}\t{}".format(
-                    data_text, data_list[dataElement][timeElement])
-        return data_text
+            title = "{}\t{}".format(title, measurement)
+        return title, [self.TimingData] + [
+            self.Data[dataElement]
+            for dataElement in range(len(self.Measurements))]
 
     # endregion
@@ -1,8 +1,8 @@
 import os
-import string
 import sys
 
-from OOP.BaseDevice import BaseDevice, string_to_list
+from OOP.BaseDevice import BaseDevice
+from OOP.ScpiDevice import parse_ascii_values
 
 
 class PNAClass(BaseDevice):
@@ -38,6 +38,10 @@ class PNAClass(BaseDevice):
             "REAL,32": 32,
             "REAL,64": 64
         }
+        self.Data_Types = {
+            "REAL,32": "f4",
+            "REAL,64": "f8"
+        }
         self.Setting_Commands = {
             "Measurement_Select": "CONF:PNO:MEAS",
             "Sweep_Continuous": "INIT:CONT",
@@ -268,16 +272,14 @@ class PNAClass(BaseDevice):
     def get_spurs(self):
         """Queries the location and level of all spurs that have been detected.
         Returns the coordinates of detected spurs as a list of alternating
-        frequency and power values."""
+        frequency and power values. A response with an unpaired value raises
+        a ValueError."""
         if self.Address != "TEST":
             self.log_info(self.ND.format("get_Spurs"))
-        self.SpurData = self.SpurData.translate(
-            {ord(i): None for i in string.whitespace})
-        self.SpurData = string_to_list(self.SpurData)
-        spur_freq = self.SpurData[::2]
-        self.log_info(max(spur_freq))
-        spur_power = self.SpurData[1::2]
-        self.log_info(max(spur_power))
+        spurs = parse_ascii_values(self.SpurData, columns=2)
+        self.SpurData = spurs.ravel()
+        self.log_info(max(spurs[:, 0]))
+        self.log_info(max(spurs[:, 1]))
         return self.SpurData
 
     def get_data(self, channel: int = 0, datatype: str = ''):
@@ -288,24 +290,21 @@ class PNAClass(BaseDevice):
             self.log_info(self.ND.format('get_Data'))
         return self.Data
 
-    def measurement_info(self):
+    def measurement_info(self, channel: str = ""):
         """Sets header information for the save file"""
         # TODO could use this to display spur information
         info_text = '\n!Measurements:\t' + \
             self.Settings["GeneralSettings"]["Measurement_Select"]
         return info_text
 
-    def create_data_text(self):
-        """Creates table of Data for save file, excludes header info"""
-        """Formats trace data into tab delimited table."""
-        data_text = '\n\n!Frequency\tNoise'
+    def data_table(self, channel: str = ""):
+        """Returns the table of Data for save file, excludes header info"""
+        """Splits the trace data into frequency and noise columns."""
         if self.Settings["GeneralSettings"]["Data_Format"] != "ASC,0":
             self.Data = self.data_format_conversion(self.Data)
         else:
-            self.Data = self.Data.translate(
-                {ord(i): None for i in string.whitespace})
-            self.Data = string_to_list(self.Data)
-        for element in range(int(len(self.Data) / 2)):
-            data_text = "{}\n{}\t{}".format(
-                data_text, self.Data[element * 2], self.Data[element * 2 + 1])
-        return data_text
+            self.Data = parse_ascii_values(self.Data)
+        if len(self.Data) % 2:
+            raise ValueError(f"{len(self.Data)} values can not be split "
+                             f"into frequency and noise pairs")
+        return '\n\n!Frequency\tNoise', [self.Data[0::2], self.Data[1::2]]
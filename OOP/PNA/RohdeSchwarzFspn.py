@@ -1,13 +1,13 @@
-import string
 import sys
 
-from .PNAClass import PNAClass, string_to_list
+from OOP.ScpiDevice import parse_ascii_values
+from .PNAClass import PNAClass
 
 # See FSPN_UserManual_en_02.pdf
 # Data and frequencies will be passed as two lists of numbers
 
 
-class RohdeSchwarzFspn(PNAClass):
+class RohdeSchwarzFSPN(PNAClass):
 
     def __init__(self, address: str, is_usb_connection=False):
         super().__init__(address, is_usb_connection)
@@ -50,13 +50,10 @@ class RohdeSchwarzFspn(PNAClass):
     # Returns the coordinates of detected spurs as a list of alternating frequency and power values.
     def get_spurs(self):
         self.SpurData = self.read("FETC:PNO:SPUR")
-        self.SpurData = self.SpurData.translate(
-            {ord(i): None for i in string.whitespace})
-        self.SpurData = string_to_list(self.SpurData)
-        spur_freq = self.SpurData[::2]
-        self.log_info(max(spur_freq))
-        spur_power = self.SpurData[1::2]
-        self.log_info(max(spur_power))
+        spurs = parse_ascii_values(self.SpurData, columns=2)
+        self.SpurData = spurs.ravel()
+        self.log_info(max(spurs[:, 0]))
+        self.log_info(max(spurs[:, 1]))
         return self.SpurData
 
     # Gets the number of points in the current trace
@@ -1,10 +1,10 @@
 import os
-import string
 import sys
 
 import numpy as np
 
-from OOP.BaseDevice import BaseDevice, string_to_list
+from OOP.BaseDevice import BaseDevice
+from OOP.ScpiDevice import parse_ascii_values
 
 
 class SAClass(BaseDevice):
@@ -34,6 +34,11 @@ class SAClass(BaseDevice):
             "REAL,32": 32,
             "REAL,64": 64
         }
+        self.Data_Types = {
+            "INT,32": "i4",
+            "REAL,32": "f4",
+            "REAL,64": "f8"
+        }
         self.Extra_Setting = {
             "Measurement_Source": "",
             "Sweep_Continuous": "",
@@ -97,7 +102,8 @@ class SAClass(BaseDevice):
             "Trigger_Source": "TRIG:SOUR",
             "Trigger_Edge": "TRIG:SLOP",
             "Trigger_Level": "TRIG:{}:LEV".format(
-                self.Settings["Trigger_Source"]),  # TODO Ensure dynamic
+                self.Settings["GeneralSettings"]
+                ["Trigger_Source"]),  # TODO Ensure dynamic
             "Trigger_Delay": "TRIG:DEL",
             "Data_Format": "FORM"
         }
@@ -292,7 +298,7 @@ class SAClass(BaseDevice):
         """Returns the frequency corresponding to the max amplitude and the max
         amplitude of the most recent data obtained
         """
-        data_list = string_to_list(self.Data)
+        data_list = parse_ascii_values(self.Data)
         amplitude = max(data_list)
         index = np.where(data_list == amplitude)[0]
         frequency = self.Frequencies[index[0]]
@@ -303,7 +309,7 @@ class SAClass(BaseDevice):
         """Returns the frequency corresponding to the min amplitude and the min
         amplitude of the most recent data obtained
         """
-        data_list = string_to_list(self.Data)
+        data_list = parse_ascii_values(self.Data)
         amplitude = min(data_list)
         index = np.where(data_list == amplitude)[0]
         frequency = self.Frequencies[index[0]]
@@ -314,7 +320,7 @@ class SAClass(BaseDevice):
         """Returns the specified frequency and the corresponding amplitude of
         the most recent data obtained
         """
-        data_list = string_to_list(self.Data)
+        data_list = parse_ascii_values(self.Data)
         amplitude = np.interp(frequency, self.Frequencies, data_list)
         self.log_info("({}, {})".format(frequency, amplitude))
         return frequency, amplitude
@@ -326,7 +332,7 @@ class SAClass(BaseDevice):
         """
         frequencies = []
         new_data = []
-        data_list = string_to_list(self.Data)
+        data_list = parse_ascii_values(self.Data)
         for element in range(len(self.Frequencies)):
             if (self.Frequencies[element] >= min_freq) and \
                     (self.Frequencies[element] <= max_freq):
@@ -338,7 +344,7 @@ class SAClass(BaseDevice):
         self.log_info("({}, {})".format(frequency, amplitude))
         return frequency, amplitude
 
-    def measurement_info(self):
+    def measurement_info(self, channel: str = ""):
         """Sets header information for the save file
         """
         # self.Measurements must be defined in script calling library
@@ -347,25 +353,20 @@ class SAClass(BaseDevice):
             info_text = "{}\t{}".format(info_text, Measurement)
         return info_text
 
-    def create_data_text(self):
-        """Creates table of Data for save file, excludes header info"""
-        """Outputs string that is a tab delimited table of frequency and power
-        data. If the datatype is ascii, input self.Data as a comma delimited
-        string. Otherwise, data_format_conversion turns raw self.Data into an
-        array.
+    def data_table(self, channel: str = ""):
+        """Returns the table of Data for save file, excludes header info"""
+        """Columns of frequency and power data. If the datatype is ascii,
+        input self.Data as a comma delimited string. Otherwise,
+        data_format_conversion turns raw self.Data into an array.
         """
         self.get_frequencies()
-        data_text = '\n\n!Frequency\tPower'
         if self.Settings["GeneralSettings"]["Data_Format"] != "ASC,0":
             data_list = self.data_format_conversion(self.Data)
         else:
-            self.Data = self.Data.translate(
-                {ord(i): None for i in string.whitespace})
-            data_list = string_to_list(self.Data)
-        for dataElement in range(len(data_list)):
-            data_text = "{}\n{}\t{}".format(data_text,
-                                            self.Frequencies[dataElement],
-                                            data_list[dataElement])
-        return data_text
+            data_list = parse_ascii_values(self.Data)
+        if len(self.Frequencies) != len(data_list):
+            raise ValueError(f"{len(data_list)} values were read for "
+                             f"{len(self.Frequencies)} frequencies")
+        return '\n\n!Frequency\tPower', [self.Frequencies, data_list]
 
 # endregion
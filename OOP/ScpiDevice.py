@@ -1,11 +1,151 @@
+import atexit
 import os
 import sys
 import re
 import socket
+import threading
+import warnings
+from contextlib import nullcontext
 from datetime import datetime
 
 import numpy as np
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from OOP.Utils import Archive, Framing
+from OOP.Utils.SettingsSchema import SettingsSchema
+from OOP.Utils.Stats import (DeviceStats, instrumented, messages_size,
+                             response_size, responses_size)
+from OOP.Utils.Transport import parse_address
+
+
+# File handlers of initialize_logger by log file, a QueueHandler while the
+# file is written in the background
+Log_Handlers = {}
+# Background threads writing the log files of Log_Handlers, as
+# (listener, QueueHandler, file handler)
+Log_Listeners = []
+# Handler showing errors of every device on the console, it is added to the
+# loggers of the devices, not to the root logger
+Console_Handler = None
+# Format of the log files
+Log_Format = logging.BASIC_FORMAT
+# Held while the handlers above are created or changed, devices can be
+# initialized in parallel, see Connect.Bench
+Log_Lock = threading.Lock()
+
+
+def start_background_logging(handler):
+    """ Starts a background thread that passes the records of the returned
+    QueueHandler to handler
+    """
+    if not Log_Listeners:
+        atexit.register(stop_background_logging)
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    queue_handler = QueueHandler(log_queue)
+    Log_Listeners.append((listener, queue_handler, handler))
+    return queue_handler
+
+
+def stop_background_logging():
+    """ Writes the remaining records of the background threads and stops
+    them. The loggers that used them write their files directly from then on
+    """
+    loggers = [logger for logger in logging.Logger.manager.loggerDict.values()
+               if isinstance(logger, logging.Logger)]
+    with Log_Lock:
+        while Log_Listeners:
+            listener, queue_handler, handler = Log_Listeners.pop()
+            for logger in loggers:
+                if queue_handler in logger.handlers:
+                    logger.removeHandler(queue_handler)
+                    logger.addHandler(handler)
+            for log_path, log_handler in Log_Handlers.items():
+                if log_handler is queue_handler:
+                    Log_Handlers[log_path] = handler
+            listener.stop()
+
+
+def parse_identification(id_query: str):
+    """ Splits the response to *IDN? into
+    [Make, Model, Serial_Number, Firmware_Version]
+    """
+    id_query = id_query.split(',')
+    for i in range(0, len(id_query)):
+        id_query[i] = re.sub(r"\s", "", id_query[i])
+        if '&' in id_query[i] and i < 2:
+            id_query[i] = id_query[i].replace('&', '')
+        if '-' in id_query[i] and i < 2:
+            id_query[i] = id_query[i].replace('-', '')
+    return id_query
+
+
+def parse_options(option_query: str):
+    """ Returns the list of installed options from the response to *OPT?
+    """
+    option_query = option_query.replace(' ', '')
+    option_query = option_query.split(',')
+    return [i for i in option_query if i != '0' and i != '']
+
+
+# An empty or whitespace only entry of a comma separated response, which
+# np.fromstring would read as -1
+Blank_Value = re.compile(r"(?:^|,)\s*(?:,|$)")
+
+
+def parse_ascii_values(data, dtype=float, columns: int = 1):
+    """ Converts an ASCII response of comma separated numbers, as str or
+    bytes, to a NumPy array of dtype. Whitespace around the numbers, empty
+    entries and notation like +1.0E+09 are accepted. With columns the array
+    is returned as a (N, columns) view, for interleaved data like frequency
+    and value or real and imaginary pairs. A ValueError is raised if the
+    number of values is not a multiple of columns
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("ascii")
+    data = data.strip()
+    if not data:
+        values = np.empty(0)
+    elif Blank_Value.search(data):
+        values = np.array([value for value in data.split(",")
+                           if value.strip()], dtype=float)
+    else:
+        try:
+            # Parses in C, but stops at other separators
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", DeprecationWarning)
+                values = np.fromstring(data, sep=",")
+        except (ValueError, DeprecationWarning):
+            values = np.array(data.split(","), dtype=float)
+    values = values.astype(dtype, copy=False)
+    if columns > 1:
+        if values.size % columns:
+            raise ValueError(f"{values.size} values can not be split into "
+                             f"{columns} columns")
+        return values.reshape(-1, columns)
+    return values
+
+
+def format_table(title: str, columns, chunk_rows: int = 65536):
+    """ Yields the text of a save file data table: the title, then a line
+    of tab separated values for every row of columns, chunk_rows rows at a
+    time so the whole table is never held in memory. The values are written
+    like str of the Python number, as the save files have always had them.
+    Columns of different lengths raise ValueError before anything is yielded
+    """
+    lengths = [len(column) for column in columns]
+    if len(set(lengths)) > 1:
+        raise ValueError(f"The columns of {title.strip()!r} have "
+                         f"different lengths {lengths}")
+    yield title
+    rows = lengths[0] if lengths else 0
+    for start in range(0, rows, chunk_rows):
+        text_columns = [map(str, np.asarray(column[start:start + chunk_rows])
+                            .tolist()) for column in columns]
+        yield "\n" + "\n".join(map("\t".join, zip(*text_columns)))
 
 
 class ScpiDevice:
@@ -24,7 +164,59 @@ class ScpiDevice:
     Data = ""
     BinaryEndsWithTermination = True
     Data_Format = {}
+    # NumPy type of every binary data format, without the byte order, which
+    # is taken from Endian
+    Data_Types = {}
     TrueFalseString = ["1", "0"]
+    # Rows of the data table save_data formats and writes at a time
+    Save_Chunk_Rows = 65536
+    # Level of the device loggers, the commands sent to the device are
+    # logged at DEBUG
+    Log_Level = logging.INFO
+    # Whether initialize_logger writes the log files from a background thread
+    Background_Logging = False
+    # Port of the raw SCPI socket, an address of the form "host:port" uses
+    # its own port
+    Port = 5025
+    # Number of bytes requested from the socket for every receive
+    Receive_Size = 65536
+    # Seconds the device has to be silent after a termination character
+    # before an indefinite length block "#0" is complete. A socket has no
+    # END message, and the data of the block can contain the termination
+    Indefinite_Block_Wait = 0.1
+    # Number of queries sent by read_all before their responses are read
+    Max_Queries_In_Flight = 16
+    # Whether read_all joins the queries into compound queries
+    Compound_Queries = False
+    # Longest compound command write_all sends in one line
+    Max_Command_Length = 256
+    # Optional (minimum, maximum) of settings, checked before they are sent
+    Settings_Range = {}
+    # Settings that the device changes when one of them is written, these are
+    # queried again along with the written setting by check_settings
+    Coupled_Settings = {
+        "Start_Frequency": ["Stop_Frequency", "Center_Frequency",
+                            "Frequency_Span"],
+        "Stop_Frequency": ["Start_Frequency", "Center_Frequency",
+                           "Frequency_Span"],
+        "Center_Frequency": ["Start_Frequency", "Stop_Frequency",
+                             "Frequency_Span"],
+        "Frequency_Span": ["Start_Frequency", "Stop_Frequency",
+                           "Center_Frequency"]
+    }
+
+    # Functions of the device classes that acquire data, they are reported to
+    # the recorders as the "acquire" phase
+    Acquisition_Functions = ("get_data", "get_all_data")
+
+    def __init_subclass__(cls, **kwargs):
+        """Instruments the acquisition functions defined by a device class"""
+        super().__init_subclass__(**kwargs)
+        for name in cls.Acquisition_Functions:
+            function = cls.__dict__.get(name)
+            if callable(function):
+                setattr(cls, name,
+                        instrumented("acquire", by_command=False)(function))
 
     def connect(self):
         """ Checks if the connect file and module exist and will run properly.
@@ -37,9 +229,12 @@ class ScpiDevice:
             # self.Device.connect((self.Address, 5025))
         elif self.Address[0:4] != "TEST" and self.Address is not None:
             self.log_info("Device is connecting via socket")
-            self.Device = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.Device.settimeout(2)
-            self.Device.connect((self.Address, 5025))
+            self.Device = socket.create_connection(
+                parse_address(self.Address, self.Port), 2)
+            # Pipelined queries are sent without waiting for the ACK of the
+            # previous one
+            self.Device.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.Receive_Buffer = bytearray()
         else:
             self.log_info("Device is None or Test Device")
             self.Device = None
@@ -56,14 +251,31 @@ class ScpiDevice:
         if self.Device:
             self.Device.close()
 
-    def __init__(self, address: str, is_usb_connection = False):
+    def __init__(self, address, is_usb_connection=False):
         """Initializes a SCPI Device with the given address:
-        IP Adress
+        IP Adress, optionally followed by ":port", IPv6 addresses with a
+        port in brackets like "[fd00::1]:5025"
         TEST<DeviceTypeShortHand>
         USB/PortNumber Address (TODO)
-        GPIB (TODO)"""
+        GPIB (TODO)
+        An already identified ScpiDevice can be given instead of an address,
+        its open connection and identification are then taken over without
+        connecting or querying the device again. An open connection with the
+        socket functions, see OOP.Utils.Transport, can be given as well and
+        is identified like a new connection"""
         self.logger = logging.getLogger("Base")
         self.Device = None
+        # Bytes received from the device that belong to the next response
+        self.Receive_Buffer = bytearray()
+        # Held while a query or transaction is in progress, does nothing
+        # unless enable_locking is used
+        self.Lock = nullcontext()
+        # Recorders the instrumented functions report their calls to
+        self.Recorders = []
+        self.Stats = None
+        # dtypes of the binary data formats by byte order and Data_Types,
+        # see data_types
+        self.Dtypes = {}
         self.TChar = "\n"  # Termination Character
         self.Make = ""
         self.Model = ""
@@ -75,6 +287,8 @@ class ScpiDevice:
         self.mode_to_command = {}
         self.Extra_Setting = {}
         self.Settings_Format = {}
+        # Compiled from the setting dictionaries by settings_schema
+        self.Schema = None
         self.Common_SCPI = {
             "ClearStatus": "*CLS",
             "EventStatusEnable": "*ESE",
@@ -94,9 +308,19 @@ class ScpiDevice:
             "WaitToContinue": "*WAI"
         }
 
-        self.Address = address.upper()
-        self.Is_Usb_Connection = is_usb_connection
-        self.connect()
+        if hasattr(address, "Make"):
+            # An identified device, like a ScpiDevice or AsyncScpiDevice
+            self.adopt(address)
+            return
+        if isinstance(address, str):
+            self.Address = address.upper()
+            self.Is_Usb_Connection = is_usb_connection
+            self.connect()
+        else:
+            # An open connection, like a RecordingTransport or ReplayTransport
+            self.Address = getattr(address, "Address", "")
+            self.Is_Usb_Connection = False
+            self.Device = address
         id_query = self.get_identification_query()
 
         self.Make = id_query[0]
@@ -106,6 +330,81 @@ class ScpiDevice:
 
         self.Options = self.get_option_identification_query()
 
+    def adopt(self, device):
+        """Takes over the connection, receive buffer and identification of
+        another device, usually the generic device that identified the
+        instrument. The other device no longer owns the connection afterwards
+        """
+        self.Address = device.Address
+        self.Is_Usb_Connection = device.Is_Usb_Connection
+        self.Device = device.Device
+        self.Receive_Buffer = device.Receive_Buffer
+        self.Lock = getattr(device, "Lock", self.Lock)
+        self.Make = device.Make
+        self.Model = device.Model
+        self.Serial_Number = device.Serial_Number
+        self.Firmware_Version = device.Firmware_Version
+        self.Options = device.Options
+        device.Device = None
+        device.Receive_Buffer = bytearray()
+
+    def enable_locking(self):
+        """Makes every query, write and settings sync atomic, so several
+        threads can share the connection to the device. Locking is off by
+        default because a device is usually used from one thread
+        """
+        if isinstance(self.Lock, nullcontext):
+            self.Lock = threading.RLock()
+
+    def add_recorder(self, recorder):
+        """Reports every write, read, settings sync, acquisition, data format
+        conversion and save of the device to recorder.record(device, phase,
+        command, start, end, bytes), with the start and end from
+        time.perf_counter. The reads and writes of read_all, write_all and
+        read_stream are reported too, so they show up inside the settings
+        sync that made them
+        """
+        if recorder not in self.Recorders:
+            self.Recorders.append(recorder)
+
+    def remove_recorder(self, recorder):
+        """Stops reporting to recorder"""
+        if recorder in self.Recorders:
+            self.Recorders.remove(recorder)
+
+    def enable_stats(self):
+        """Starts keeping latency histograms of every command, see stats"""
+        if self.Stats is None:
+            self.Stats = DeviceStats()
+            self.add_recorder(self.Stats)
+        return self.Stats
+
+    def stats(self):
+        """Returns the count, bytes, total and p50/p95/p99 seconds of every
+        command by phase ("write", "read", "send", "sync", "acquire",
+        "convert", "save"), and the total seconds of every phase except
+        "sync" and "acquire", which contain the reads and writes made during
+        them, and "send", which is part of the pipelined and compound reads,
+        since enable_stats. Pipelined and compound reads and writes are
+        counted under their function name. print(device.Stats) shows the
+        same as a table
+        """
+        if self.Stats is None:
+            return {"commands": {}, "phases": {}}
+        return self.Stats.report()
+
+    def transaction(self):
+        """Returns a context manager that keeps other threads from using the
+        device until it exits, for sequences of commands that have to run
+        together:
+
+        with device.transaction():
+            device.write("INIT:IMM")
+            data = device.read("TRAC:DATA")
+        Only locks after enable_locking
+        """
+        return self.Lock
+
     def __str__(self):
         """Sets the string of the class to the identification of the device"""
         if self.Make != "":
@@ -118,32 +417,34 @@ class ScpiDevice:
 
     "Common Methods"
 
+    def data_types(self):
+        """ Returns the dtype of every binary data format in the byte order
+        of the device. The table is built from Data_Types the first time it
+        is needed and again only if Endian or Data_Types change
+        """
+        key = (self.Endian, tuple(self.Data_Types.items()))
+        dtypes = self.Dtypes.get(key)
+        if dtypes is None:
+            dtypes = self.Dtypes[key] = {
+                data_format: np.dtype(data_type).newbyteorder(self.Endian)
+                for data_format, data_type in self.Data_Types.items()}
+        return dtypes
+
+    @instrumented("convert", by_command=False)
     def data_format_conversion(self, value):
-        """ Converts binary data into the specified data format
-        """
-        # TODO REAL => Floating point numbers; INT => 32 bit integer;
-        #  also, all binary oscope formats are signed integers, not floats
-        data_format = self.Data_Format[
-            self.Settings["GeneralSettings"]["Data_Format"]]
-        if data_format != 0:
-            if data_format == 8:
-                dt = np.dtype(np.byte)
-            elif data_format == 16:
-                dt = np.dtype(np.half)
-            elif data_format == 32:
-                dt = np.dtype(np.single)
-            elif data_format == 64:
-                dt = np.dtype(np.double)
-            else:
-                return f"Data type bit value '{data_format}' wasn't programmed"
-            np.set_printoptions(precision=50, floatmode='maxprec')
-            dt = dt.newbyteorder(self.Endian)
-            return np.frombuffer(value, dtype=dt)
-        return value
+        """ Converts binary data into the specified data format, data in a
+        format without a dtype, like ASCII, is returned unchanged
+        The returned array shares memory with value, so blocks returned by
+        read or read_block are not copied
+        """
+        dtype = self.data_types().get(
+            self.Settings["GeneralSettings"]["Data_Format"])
+        if dtype is None:
+            return value
+        return np.frombuffer(value, dtype=dtype)
 
-    def write(self, command: str, value=None, channel: int = -1):
-        """ Write the command directly to the hardware to execute
-        TODO possibility of channel and mode at same time
+    def format_command(self, command: str, value=None, channel: int = -1):
+        """ Returns the command with its value, without the termination
         """
         if value is not None:
             if isinstance(value, bool):
@@ -152,115 +453,536 @@ class ScpiDevice:
                 elif not value:
                     value = self.TrueFalseString[1]
             if channel == -1:
-                self.Device.send(str.encode(
-                    f"{command} {value}{self.TChar}"))
+                return f"{command} {value}"
+            return f"{command} {value}".format(channel)
+        return command
+
+    @instrumented("write", lambda args, kwargs, result: sum(
+        response_size(argument) for argument in args[:2]))
+    def write(self, command: str, value=None, channel: int = -1):
+        """ Write the command directly to the hardware to execute
+        TODO possibility of channel and mode at same time
+        """
+        with self.Lock:
+            self.Device.send(str.encode(
+                f"{self.format_command(command, value, channel)}{self.TChar}"))
+
+    def write_all(self, commands):
+        """ Sends a list of (command, value, channel) commands as compound
+        commands joined with ";", each at most Max_Command_Length characters
+        long, and waits for the device to finish them with a single *OPC?
+        at the end of the last line. Devices without a connection, like the
+        test devices, use write for every command
+        """
+        if self.Device is None:
+            for command in commands:
+                self.write(*command)
+            return
+        self.write_messages([self.format_command(*command)
+                             for command in commands])
+
+    @instrumented("write", messages_size, by_command=False)
+    def write_messages(self, messages):
+        """ Sends already formatted commands the way write_all does
+        """
+        with self.Lock:
+            lines = self.command_lines(messages)
+            for line in lines:
+                self.log_debug("%s", line)
+            self.Device.send(str.encode(
+                "".join(f"{line}{self.TChar}" for line in lines)))
+            self.receive_until(self.TChar.encode())
+
+    def command_lines(self, messages):
+        """ Joins formatted commands into compound commands of at most
+        Max_Command_Length characters, the last one ending with *OPC?
+        """
+        barrier = f"{self.Common_SCPI['OperationComplete']}?"
+        lines = []
+        batch = []
+        length = 0
+        for message in messages:
+            # Every command after the first one adds a ";" and maybe a ":"
+            if batch and length + len(message) + 2 > self.Max_Command_Length:
+                lines.append(self.join_commands(batch))
+                batch = []
+                length = 0
+            batch.append(message)
+            length += len(message) + 2
+        if batch and length + len(barrier) + 1 > self.Max_Command_Length:
+            lines.append(self.join_commands(batch))
+            batch = []
+        lines.append(self.join_commands(batch + [barrier]))
+        return lines
+
+    def run_framing(self, framing):
+        """ Answers the requests of a framing generator of OOP.Utils.Framing
+        with receives from the device and returns its result
+        """
+        try:
+            request = next(framing)
+            while True:
+                request = framing.send(self.receive_request(request))
+        except StopIteration as stop:
+            return stop.value
+
+    def receive_request(self, request):
+        """ Receives what a framing generator asks for, see OOP.Utils.Framing
+        """
+        if request is Framing.QUIET:
+            return self.receive_more_within(self.Indefinite_Block_Wait)
+        if request is Framing.MORE:
+            more_data = self.Device.recv(self.Receive_Size)
+            if not more_data:
+                raise ConnectionError("Device closed the connection")
+            self.Receive_Buffer += more_data
+            return None
+        received = self.Device.recv_into(request)
+        if not received:
+            raise ConnectionError("Device closed the connection")
+        return received
+
+    def receive_more_within(self, seconds: float):
+        """ Receives more bytes into the receive buffer if the device sends
+        any within seconds, returns whether it did
+        """
+        timeout = self.Device.gettimeout()
+        self.Device.settimeout(seconds)
+        try:
+            more_data = self.Device.recv(self.Receive_Size)
+        except socket.timeout:
+            return False
+        finally:
+            self.Device.settimeout(timeout)
+        self.Receive_Buffer += more_data
+        return bool(more_data)
+
+    def receive_bytes(self, length: int):
+        """ Returns exactly length bytes from the device, using the bytes left
+        over in the receive buffer before asking the socket for more
+        """
+        return self.run_framing(Framing.take(self.Receive_Buffer, length))
+
+    def receive_until(self, termination: bytes):
+        """ Returns the bytes from the device up to, but not including, the
+        termination. Bytes after the termination are kept in the receive
+        buffer for the next response
+        """
+        return self.run_framing(Framing.until(self.Receive_Buffer,
+                                              termination))
+
+    def receive_into(self, view: memoryview):
+        """ Fills the writable view with bytes from the device, copying any
+        bytes left over in the receive buffer first and then letting the
+        socket write straight into the view
+        """
+        self.run_framing(Framing.fill(self.Receive_Buffer, view))
+
+    def receive_block(self, buffer=None):
+        """ Receives an IEEE 488.2 definite "#NB" or indefinite "#0" length
+        block after the "#" has already been read. The data is written into
+        buffer when one is given (bytearray, memoryview or NumPy array),
+        otherwise a new bytearray of the exact size is allocated
+        """
+        self.DataHeader, data = self.run_framing(Framing.block(
+            self.Receive_Buffer, self.TChar.encode(),
+            self.BinaryEndsWithTermination, buffer))
+        if isinstance(buffer, np.ndarray):
+            return buffer.reshape(-1)[:data.nbytes // buffer.itemsize]
+        return data
+
+    def receive_stream(self, framing):
+        """ Yields the data of a chunks or block_chunks framing generator of
+        OOP.Utils.Framing, receiving from the device when it asks for it
+        """
+        try:
+            item = next(framing)
+            while True:
+                if isinstance(item, (bytes, bytearray)):
+                    yield item
+                    item = next(framing)
+                else:
+                    item = framing.send(self.receive_request(item))
+        except StopIteration:
+            return
+
+    def receive_chunks(self, chunk_size: int, indefinite: bool = False):
+        """ Yields a terminated response in pieces of chunk_size bytes, the
+        last piece may be shorter. An ASCII response ends at the first
+        termination character. The indefinite length block "#0" can contain
+        the termination character, so it ends at a termination character
+        after which the device stays silent for Indefinite_Block_Wait
+        """
+        return self.receive_stream(Framing.chunks(
+            self.Receive_Buffer, self.TChar.encode(), chunk_size, indefinite))
+
+    def receive_block_chunks(self, data_length: int, chunk_size: int):
+        """ Yields the data of a definite length block in pieces of
+        chunk_size bytes, then receives the termination after the block
+        """
+        return self.receive_stream(Framing.block_chunks(
+            self.Receive_Buffer, data_length, chunk_size,
+            self.BinaryEndsWithTermination))
+
+    @instrumented("read")
+    def read_stream(self, command: str, chunk_size: int = 65536,
+                    extra: str = '', channel: int = -1):
+        """ Queries the device and yields the response in pieces of
+        chunk_size bytes as they arrive, so large traces can be written to a
+        file or reduced without holding the whole response in memory.
+        Handles ASCII responses, definite length blocks "#NB" and indefinite
+        length blocks "#0". If the caller stops early, the rest of the
+        response is received and discarded to keep the connection usable.
+        With enable_locking the device stays locked from the first chunk
+        until the generator is exhausted or closed, so other threads using
+        the device wait for it. A caller that stops early should close the
+        generator, for example with contextlib.closing, from the thread
+        that read from it instead of leaving it to the garbage collector
+        """
+        with self.Lock:
+            self.send_query(command, extra, channel)
+            start_of_message = self.receive_bytes(1)
+            if start_of_message != b'#':
+                self.Receive_Buffer[:0] = start_of_message
+                chunks = self.receive_chunks(chunk_size)
             else:
-                self.Device.send(str.encode(
-                    f"{command} {value}{self.TChar}".format(channel)))
-        else:
-            self.Device.send(str.encode(f"{command}{self.TChar}"))
+                number_length = int(self.receive_bytes(1).decode())
+                if number_length == 0:
+                    self.DataHeader = "#0"
+                    chunks = self.receive_chunks(chunk_size, True)
+                else:
+                    data_length = int(
+                        self.receive_bytes(number_length).decode())
+                    self.DataHeader = f"#{number_length}{data_length}"
+                    chunks = self.receive_block_chunks(data_length,
+                                                       chunk_size)
+            try:
+                for chunk in chunks:
+                    yield chunk
+            finally:
+                for _ in chunks:
+                    pass
+
+    def format_query(self, command: str, extra: str = '', channel: int = -1):
+        """ Returns the query form of the command, without the termination
+        """
+        if channel == -1:
+            return f"{command}? {extra}"
+        return f"{command}? {extra}".format(channel)
+
+    def send_query(self, command: str, extra: str = '', channel: int = -1):
+        """ Sends the query form of the command to the device
+        """
+        self.log_debug("%s?%s", command, extra)
+        self.Device.send(str.encode(
+            f"{self.format_query(command, extra, channel)}{self.TChar}"))
 
+    def receive_response(self):
+        """ Receives one response, either a binary block or an ASCII string
+        without the termination
+        """
+        header, data = self.run_framing(Framing.response(
+            self.Receive_Buffer, self.TChar.encode(),
+            self.BinaryEndsWithTermination))
+        if header is not None:
+            self.DataHeader = header
+        return data
+
+    @instrumented("read")
     def read(self, command: str, extra: str = '', channel: int = -1):
         """ Writes queries to the device and recieves the response
         TODO possibility of channel and mode at same time
         """
-        # Below commented code is good for debugging, but annoyin in actual use
-        # print(str.encode(f"{command}? {extra}{self.TChar}"))
-        self.log_info(str.encode(f"{command}?{extra}{self.TChar}"))
-        if channel == -1:
-            self.Device.send(str.encode(f"{command}? {extra}{self.TChar}"))
-        else:
-            self.Device.send(str.encode(
-                f"{command}? {extra}{self.TChar}".format(channel)))
-        start_of_message = self.Device.recv(1).decode()
-        if start_of_message == '#':
-            number_length = int(self.Device.recv(1).decode())
-            data_length = int(self.Device.recv(number_length).decode())
-            self.DataHeader = f"{start_of_message}{number_length}{data_length}"
-            data = self.Device.recv(data_length)
-            # data_to_write = data
-            while len(data) < data_length:
-                more_data = self.Device.recv(data_length - len(data))
-                data = data + more_data
-            if self.BinaryEndsWithTermination:
-                self.Device.recv(1)
-            data_to_write = data
-        else:
-            data_to_write = f"{start_of_message}" \
-                            + f"{self.Device.recv(1024).decode()}"
-            while data_to_write[len(data_to_write) - 1] != "\n":
-                data_to_write = f"{data_to_write}" \
-                                + f"{self.Device.recv(1).decode()}"
-                # print(data_to_write)
-            data_to_write = data_to_write[:len(data_to_write) - 1]
-        return data_to_write
+        with self.Lock:
+            self.send_query(command, extra, channel)
+            return self.receive_response()
+
+    def read_all(self, queries):
+        """ Sends a list of (command, extra, channel) queries and returns the
+        responses in the same order. Up to Max_Queries_In_Flight queries are
+        sent before the first response is read, so reading many settings
+        takes about one round trip instead of one per query. With
+        Compound_Queries the queries are joined with ";" into one message
+        per Max_Queries_In_Flight queries instead, for devices that can not
+        buffer several messages. Devices without a connection, like the test
+        devices, use read for every query
+        """
+        if self.Device is None:
+            return [self.read(*query) for query in queries]
+        return self.read_messages([self.format_query(*query)
+                                   for query in queries])
+
+    def read_messages(self, messages):
+        """ Sends already formatted queries and reads their responses the way
+        read_all does
+        """
+        if self.Compound_Queries:
+            return self.read_compound(messages)
+        return self.read_pipelined(messages)
+
+    @instrumented("read", responses_size, by_command=False)
+    def read_pipelined(self, messages):
+        """ Sends up to Max_Queries_In_Flight queries before reading the
+        first response and returns the responses in the same order
+        """
+        with self.Lock:
+            responses = []
+            for step, index in Framing.pipeline(len(messages),
+                                                self.Max_Queries_In_Flight):
+                if step is Framing.SEND:
+                    self.send_message(messages[index])
+                else:
+                    responses.append(self.receive_response())
+            return responses
+
+    @instrumented("send", lambda args, kwargs, result: len(args[0]),
+                  by_command=False)
+    def send_message(self, message: str):
+        """ Sends a formatted message followed by the termination
+        """
+        self.log_debug("%s", message)
+        self.Device.send(str.encode(f"{message}{self.TChar}"))
+
+    def join_commands(self, commands):
+        """ Joins commands into one compound command. Every command except
+        common commands starts from the root of the command tree, so the
+        path of one command does not change the meaning of the next
+        """
+        return ";".join(command if command[0] in "*:" else f":{command}"
+                        for command in commands)
+
+    @instrumented("read", responses_size, by_command=False)
+    def read_compound(self, messages):
+        """ Sends the queries as compound queries of up to
+        Max_Queries_In_Flight queries and splits the responses, which the
+        device separates with ";". Only ASCII responses can be read this way
+        """
+        size = max(1, self.Max_Queries_In_Flight)
+        responses = []
+        with self.Lock:
+            for start in range(0, len(messages), size):
+                batch = messages[start:start + size]
+                self.send_message(self.join_commands(
+                    message.strip() for message in batch))
+                responses.extend(Framing.split_compound(
+                    self.receive_until(self.TChar.encode()).decode(),
+                    len(batch)))
+        return responses
 
+    @instrumented("read")
+    def read_block(self, command: str, extra: str = '', channel: int = -1,
+                   buffer=None):
+        """ Queries the device for binary block data and receives it without
+        intermediate copies. Pass a preallocated bytearray or NumPy array as
+        buffer to reuse it between acquisitions; the part of the buffer that
+        was filled is returned
+        """
+        with self.Lock:
+            self.send_query(command, extra, channel)
+            start_of_message = self.receive_bytes(1)
+            if start_of_message != b'#':
+                self.receive_until(self.TChar.encode())
+                raise ValueError(f"{command}? did not return a binary block")
+            return self.receive_block(buffer)
+
+    def setting_channels(self):
+        """Returns the channel used for the settings of every key of
+        self.Settings, -1 if the settings do not belong to a channel
+        """
+        channels = {}
+        channel = -1
+        for key in self.Settings:
+            if key != "GeneralSettings":
+                if "channel" in self.Settings[key]:
+                    channel = self.Settings[key]['channel']
+            channels[key] = channel
+        return channels
+
+    @instrumented("sync", by_command=False)
     def get_all_settings(self):
         """Queries all values in self.Settings from the device and applies
         these values to self.Settings
         """
-        channel = -1
-        for key in self.New_Settings:
-            if key != "GeneralSettings":
-                if "channel" in self.New_Settings[key]:
-                    channel = self.New_Settings[key]['channel']
+        self.get_settings(self.all_setting_names())
 
-            for setting in self.New_Settings[key]:
-                try:
-                    if channel > -1:
-                        value = self.read(self.Setting_Commands[setting],
-                                          self.Extra_Setting[setting], channel)
-                    else:
-                        value = self.read(self.Setting_Commands[setting],
-                                          self.Extra_Setting[setting])
-                except KeyError:
-                    sys.exit(
-                        f'KeyError was thrown. The setting, "{key}: {setting}"'
-                        ' does not exist in get_all_settings.')
-                if self.Settings_Format[setting] == bool:
-                    if isinstance(value, bool):
-                        value = bool(value)
-                    elif isinstance(value, str):
-                        if value[0] == "1" or value.upper() == "ON":
-                            value = True
-                        elif value[0] == "0" or value.upper() == "OFF":
-                            value = False
-                        else:
-                            self.log_info(f'{key}:{setting} is a Value Error.')
-                    else:
-                        self.log_info(f'{key}:{setting} is a Type Error.')
-                self.Settings[key][setting] \
-                    = self.Settings_Format[setting](value)
-
-    def check_settings(self):
+    def all_setting_names(self):
+        """Returns every setting in self.Settings as (key, setting)"""
+        return [(key, setting) for key in self.Settings
+                for setting in self.Settings[key]]
+
+    def settings_schema(self):
+        """Returns the compiled schema of the settings, compiling it again
+        when the setting dictionaries were replaced or settings or channels
+        were added, removed or changed. Call invalidate_schema after
+        changing the commands, formats or ranges in place
+        """
+        signature = ((self.Settings, self.Setting_Commands,
+                      self.Extra_Setting, self.Settings_Format,
+                      self.Settings_Range),
+                     tuple((key, tuple(self.Settings[key]))
+                           for key in self.Settings),
+                     tuple(self.setting_channels().items()))
+        if self.Schema is None or not self.Schema.compiled_from(signature):
+            try:
+                self.Schema = SettingsSchema(self, signature)
+            except KeyError as error:
+                sys.exit(
+                    f'KeyError was thrown. The setting, "{error.args[0]}"'
+                    ' does not exist in get_all_settings.')
+        return self.Schema
+
+    def invalidate_schema(self):
+        """Compiles the settings schema again the next time it is used"""
+        self.Schema = None
+
+    def get_settings(self, names):
+        """Queries the settings given as a list of (key, setting) from the
+        device and applies these values to self.Settings
+        """
+        with self.Lock:
+            settings = self.compiled_settings(names)
+            if self.Device is None:
+                values = [self.read(setting.command, setting.extra,
+                                    setting.channel) for setting in settings]
+            else:
+                values = self.read_messages([setting.query
+                                             for setting in settings])
+            self.apply_settings(settings, values)
+
+    def compiled_settings(self, names):
+        """Returns the compiled Setting of every (key, setting) in names"""
+        schema = self.settings_schema()
+        return [schema[name] for name in names]
+
+    def apply_settings(self, settings, values):
+        """Puts the values read from the device for the compiled settings
+        into self.Settings
+        """
+        for setting, value in zip(settings, values):
+            self.Settings[setting.key][setting.name] = setting.parse(value)
+
+    def bool_parser(self, key: str, setting: str):
+        """Returns the function that converts a value read from the device
+        to a bool setting
+        """
+        def parse(value):
+            if isinstance(value, bool):
+                value = bool(value)
+            elif isinstance(value, str):
+                if value[0] == "1" or value.upper() == "ON":
+                    value = True
+                elif value[0] == "0" or value.upper() == "OFF":
+                    value = False
+                else:
+                    self.log_info(f'{key}:{setting} is a Value Error.')
+            else:
+                self.log_info(f'{key}:{setting} is a Type Error.')
+            return bool(value)
+        return parse
+
+    def parse_setting(self, key: str, setting: str, value):
+        """Converts a value read from the device to the format of the setting
+        """
+        return self.settings_schema()[(key, setting)].parse(value)
+
+    def check_settings(self, names=None):
         """Compares self.Settings and self.New_Settings
         returns a list of values that are different
+        Only the settings given as a list of (key, setting) and the settings
+        coupled to them in Coupled_Settings are queried again, all settings
+        are queried when names is None
         """
-        self.get_all_settings()
-        failed_settings = []
-        for key in self.Settings:
-            for setting in self.Settings[key]:
-                if self.Settings[key][setting] \
-                        != self.New_Settings[key][setting]:
-                    failed_settings.append(f"{key}: {setting}")
-        return failed_settings
+        checked = self.settings_to_check(names)
+        if names is None:
+            self.get_all_settings()
+        else:
+            self.get_settings(checked)
+        return self.compare_settings(checked)
 
+    def settings_to_check(self, names=None):
+        """Returns the settings check_settings queries for the settings
+        given as a list of (key, setting): those settings and the settings
+        coupled to them, all settings when names is None
+        """
+        if names is None:
+            return self.all_setting_names()
+        return self.coupled_settings(names)
+
+    def compare_settings(self, names):
+        """Returns the settings given as a list of (key, setting) whose value
+        in self.Settings is different from self.New_Settings
+        """
+        return [f"{key}: {setting}"
+                for key, setting in self.different_settings(names)]
+
+    def different_settings(self, names):
+        """Returns the (key, setting) of the settings given as a list of
+        (key, setting) whose value in self.Settings is different from
+        self.New_Settings
+        """
+        return [(key, setting) for key, setting in names
+                if self.Settings[key][setting]
+                != self.New_Settings[key][setting]]
+
+    def coupled_settings(self, names):
+        """Returns the settings given as a list of (key, setting) together
+        with the settings of the same key that the device changes along with
+        them, without duplicates
+        """
+        schema = self.settings_schema()
+        coupled = []
+        for name in names:
+            for coupled_name in (name,) + schema[name].coupling:
+                if coupled_name not in coupled:
+                    coupled.append(coupled_name)
+        return coupled
+
+    @instrumented("sync", by_command=False)
     def send_all_settings(self):
         """Send all values in self.New_Settings that are different than the
         values in self.Settings, then confirms that the new settings have been
         applied to the device
+        Settings kept in a TrackedSettings are only compared when they were
+        modified since the last send_all_settings, and only the settings
+        that were sent are queried again to confirm them
+        """
+        with self.Lock:
+            changes = self.settings_changes()
+            if self.Device is None:
+                for setting, value in changes:
+                    self.write(setting.command, value, setting.channel)
+            else:
+                self.write_messages([setting.serialize(value)
+                                     for setting, value in changes])
+            names = [(setting.key, setting.name) for setting, _ in changes]
+            self.settings_sent(names, self.check_settings(names))
+
+    def settings_sent(self, names, failed_settings):
+        """Marks the settings given as a list of (key, setting) as sent once
+        send_all_settings has checked them, failed_settings is the result of
+        check_settings
+        """
+        # The settings that did not set up are sent again next time
+        self.clear_modified(
+            self.different_settings(self.coupled_settings(names)))
+        if len(failed_settings) > 0:
+            self.log_info("These settings didn't setup properly: %s\n",
+                          failed_settings)
+
+    def settings_changes(self):
+        """Returns the settings send_all_settings has to send as a list of
+        (Setting, value). Raises a ValueError if a value is out of range
         """
+        schema = self.settings_schema()
+        changes = []
         start_stop_diff = []
         center_span_diff = []
-        channel = -1
         for key in self.New_Settings:
-            # Checks if there is a channel in the device that will be used
-            # and set in setting commands
-            if key != "GeneralSettings":
-                if "channel" in self.New_Settings[key]:
-                    channel = self.New_Settings[key]['channel']
-
+            modified = getattr(self.New_Settings[key], "Modified", None)
             for setting in self.New_Settings[key]:
+                if modified is not None and setting not in modified \
+                        and setting != "Frequency_Span":
+                    continue
                 same = self.New_Settings[key][setting] \
                     == self.Settings[key][setting]
                 if setting == "Start_Frequency" and not same:
@@ -274,28 +996,35 @@ class ScpiDevice:
                         center_span_diff.append(setting)
                     if len(start_stop_diff) > len(center_span_diff):
                         for diff in start_stop_diff:
-                            self.write(self.Setting_Commands[diff],
-                                       self.New_Settings[key][diff])
+                            changes.append((schema[(key, diff)],
+                                            self.New_Settings[key][diff]))
                     elif len(start_stop_diff) < len(center_span_diff):
                         for diff in center_span_diff:
-                            self.write(self.Setting_Commands[diff],
-                                       self.New_Settings[key][diff])
+                            changes.append((schema[(key, diff)],
+                                            self.New_Settings[key][diff]))
                     elif len(start_stop_diff) == len(center_span_diff) and \
                             len(start_stop_diff) > 0:
                         for diff in center_span_diff:
-                            self.write(self.Setting_Commands[diff],
-                                       self.New_Settings[key][diff])
+                            changes.append((schema[(key, diff)],
+                                            self.New_Settings[key][diff]))
                 elif not same:
-                    if channel > -1:
-                        self.write(self.Setting_Commands[setting],
-                                   self.New_Settings[key][setting], channel)
-                    else:
-                        self.write(self.Setting_Commands[setting],
-                                   self.New_Settings[key][setting])
-        failed_settings = self.check_settings()
-        if len(failed_settings) > 0:
-            self.log_info(
-                f"These settings didn't setup properly: {failed_settings}\n")
+                    changes.append((schema[(key, setting)],
+                                    self.New_Settings[key][setting]))
+        for setting, value in changes:
+            setting.validate(value)
+        return changes
+
+    def clear_modified(self, failed=()):
+        """Marks all settings in self.New_Settings as sent, except the
+        settings given as a list of (key, setting) that failed, which stay
+        modified
+        """
+        for key in self.New_Settings:
+            modified = getattr(self.New_Settings[key], "Modified", None)
+            if modified is not None:
+                modified.clear()
+                modified.update(setting for failed_key, setting in failed
+                                if failed_key == key)
 
     def vna_option_line(self):
         """ Sets the option line of the save file for a s*p formatted file.
@@ -323,11 +1052,21 @@ class ScpiDevice:
         """
         return ""
 
+    def data_table(self, channel: str):
+        """ Needs to be updated per Device Type with trace data
+        Returns the title of the data table and its columns, which save_data
+        writes in chunks, or None when the device saves create_data_text
+        """
+        return None
+
     def create_data_text(self, channel: str):
         """ Needs to be updated per Device Type, may not be required for all
         Creates Header and Data Table
         """
-        return ""
+        table = self.data_table(channel)
+        if table is None:
+            return ""
+        return "".join(format_table(*table))
 
     def create_extension(self, channel: str):
         """ Sets file extension of save file.
@@ -340,12 +1079,15 @@ class ScpiDevice:
         """
         return
 
+    @instrumented("save", lambda args, kwargs, result: os.path.getsize(result),
+                  False)
     def save_data(self, filename: str, comments: str = "", channel: str = "",
                   append: bool = False):
         """ Creates a standardized save file that saves all of the device
         information as well as data and comments
         Filename should be without the extension
         Ex. "filename" not "filename.txt"
+        Returns the name of the file that was written
         """
         settings = ""
         version = "!Version:\t0.1\n"
@@ -384,7 +1126,14 @@ class ScpiDevice:
             # TODO Maybe make the file be a separate file?
             # CAG-"if there is a microsecond timestamp,
             # there will never be two of the same files"
-        data = self.create_data_text(channel)
+        table = self.data_table(channel)
+        if table is None:
+            data = self.create_data_text(channel)
+            chunks = [data]
+        else:
+            # Written as it is formatted, see format_table
+            data = None
+            chunks = format_table(*table, self.Save_Chunk_Rows)
         if data == "":
             dataStartLine = ""
         else:
@@ -402,8 +1151,49 @@ class ScpiDevice:
                 file.write(comments)
                 if measurement:
                     file.write(measurement)
-            file.write(data)
+            for chunk in chunks:
+                file.write(chunk)
             self.log_info(f'data has been written to {filename} successfully')
+        return filename
+
+    @instrumented("save", lambda args, kwargs, result: os.path.getsize(result),
+                  False)
+    def save_archive(self, filename: str, comments: str = "",
+                     channel: str = ""):
+        """ Saves the device information, settings, comments and data like
+        save_data, but as a binary archive, see OOP.Utils.Archive
+        The columns of data_table are written as raw arrays without
+        formatting and read_archive memory maps them
+        Filename should be without the extension
+        Returns the name of the file that was written
+        """
+        self.select_channel_to_save(channel)
+        now = datetime.now()
+        filename = f"{filename}{now.strftime('-%Y%m%d-%H%M%S%f')}." \
+                   f"{Archive.EXTENSION}"
+        header = {
+            "version": 1,
+            "make": self.Make,
+            "model": self.Model,
+            "firmware": self.Firmware_Version,
+            "serial_number": self.Serial_Number,
+            "date": now.isoformat(),
+            "options": list(self.Options),
+            "settings": self.Settings,
+            "comments": comments,
+            "measurement": self.measurement_info(channel)
+        }
+        table = self.data_table(channel)
+        if table is None:
+            header["data_text"] = self.create_data_text(channel)
+            names, columns = [], []
+        else:
+            title, columns = table
+            names = Archive.column_names(title, len(columns))
+        Archive.write_archive(filename, header, names, columns,
+                              self.Save_Chunk_Rows)
+        self.log_info(f'data has been written to {filename} successfully')
+        return filename
 
     "Common SCPI Commands"
 
@@ -454,14 +1244,7 @@ class ScpiDevice:
             self.Address = self.Address[:4]
         else:
             id_query = self.read(self.Common_SCPI["IdentificationQuery"])
-        id_query = id_query.split(',')
-        for i in range(0, len(id_query)):
-            id_query[i] = re.sub(r"\s", "", id_query[i])
-            if '&' in id_query[i] and i < 2:
-                id_query[i] = id_query[i].replace('&', '')
-            if '-' in id_query[i] and i < 2:
-                id_query[i] = id_query[i].replace('-', '')
-        return id_query
+        return parse_identification(id_query)
 
     def get_individual_status_query(self):
         """ Returns the contents of the IST flag in decimal form (0 | 1).
@@ -502,11 +1285,8 @@ class ScpiDevice:
         if self.Address == "TEST":
             option_query = ['Options', 'for', 'test', 'device']
         else:
-            option_query = self.read(
-                self.Common_SCPI["OptionIdentificationQuery"])
-            option_query = option_query.replace(' ', '')
-            option_query = option_query.split(',')
-            option_query = [i for i in option_query if i != '0' and i != '']
+            option_query = parse_options(self.read(
+                self.Common_SCPI["OptionIdentificationQuery"]))
         return option_query
 
     def send_pass_control_back(self):
@@ -608,35 +1388,49 @@ class ScpiDevice:
         if self.Address != "TEST":
             self.write(self.Common_SCPI["WaitToContinue"])
 
-    def initialize_logger(self, path: str, name: str):
-        if not os.path.exists(path):
-            os.mkdir(path)
+    def initialize_logger(self, path: str, name: str, background=None):
+        """Logs the device to the file name in the directory path. Every log
+        file is opened once, however many devices log to it. With background
+        (Background_Logging by default) the file is written by a background
+        thread through a QueueHandler, so logging does not wait on the disk.
+        Errors of the device are also shown on the console
+        """
+        global Console_Handler
         log_path = path + "/" + name
-        logging.basicConfig(filename=log_path,
-                            filemode="w", level=logging.DEBUG)
-
-        # console handler
-        console = logging.StreamHandler()
-        console.setLevel(logging.ERROR)
-        logging.getLogger("").addHandler(console)
         self.logger = logging.getLogger(name)
+        self.logger.setLevel(self.Log_Level)
+        with Log_Lock:
+            if not os.path.exists(path):
+                os.mkdir(path)
+            if log_path not in Log_Handlers:
+                handler = logging.FileHandler(log_path, mode="w")
+                handler.setFormatter(logging.Formatter(Log_Format))
+                if self.Background_Logging if background is None \
+                        else background:
+                    handler = start_background_logging(handler)
+                Log_Handlers[log_path] = handler
+            if Log_Handlers[log_path] not in self.logger.handlers:
+                self.logger.addHandler(Log_Handlers[log_path])
+
+            # console handler
+            if Console_Handler is None:
+                Console_Handler = logging.StreamHandler()
+                Console_Handler.setLevel(logging.ERROR)
+            if Console_Handler not in self.logger.handlers:
+                self.logger.addHandler(Console_Handler)
         self.logger.info(name)
 
-    def log_error(self, message):
-        print(message)
-        self.logger.error(message)
+    def log_error(self, message, *args):
+        self.logger.error(message, *args)
 
-    def log_info(self, message):
-        print(message)
-        self.logger.info(message)
+    def log_info(self, message, *args):
+        self.logger.info(message, *args)
 
-    def log_debug(self, message):
-        print(message)
-        self.logger.debug(message)
+    def log_debug(self, message, *args):
+        self.logger.debug(message, *args)
 
-    def log_warning(self, message):
-        self.logger.warning(message)
+    def log_warning(self, message, *args):
+        self.logger.warning(message, *args)
 
-    def log_critical(self, message):
-        print(message)
-        self.logger.critical(message)
+    def log_critical(self, message, *args):
+        self.logger.critical(message, *args)
@@ -0,0 +1,74 @@
+import json
+import struct
+
+import numpy as np
+
+# An archive starts with MAGIC and the length of the JSON header as an
+# unsigned 64 bit little endian integer, followed by the header. The
+# header has the device information, settings and comments of save_data and
+# the name, dtype, number of values and offset of every column. The columns
+# follow as raw arrays in the byte order the instrument sent them, each
+# starting at a multiple of ALIGNMENT bytes from the end of the header
+MAGIC = b"SCPIARC1"
+LENGTH = struct.Struct("<Q")
+ALIGNMENT = 64
+EXTENSION = "scpa"
+
+
+def aligned(size: int):
+    """Returns size rounded up to a multiple of ALIGNMENT"""
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def column_names(title: str, count: int):
+    """Returns the names of the columns from the title of a save_data table,
+    like "\\n\\n!Frequency\\tPower" """
+    names = title.strip().lstrip("!").split("\t")
+    if len(names) != count:
+        names = [f"column{index}" for index in range(count)]
+    return names
+
+
+def write_archive(filename: str, header: dict, names, columns,
+                  chunk_rows: int = 65536):
+    """Writes header and the columns to filename, chunk_rows values of a
+    column at a time. The values are written without formatting, columns
+    that are not arrays are converted with np.asarray first"""
+    columns = [np.asarray(column) for column in columns]
+    header = dict(header, columns=[])
+    offset = 0
+    for name, column in zip(names, columns):
+        header["columns"].append({"name": name, "dtype": column.dtype.str,
+                                  "length": len(column), "offset": offset})
+        offset = aligned(offset + column.nbytes)
+    encoded = json.dumps(header, default=str).encode()
+    start = len(MAGIC) + LENGTH.size + len(encoded)
+    with open(filename, "wb") as file:
+        file.write(MAGIC + LENGTH.pack(len(encoded)) + encoded)
+        file.write(bytes(aligned(start) - start))
+        for column in columns:
+            for first in range(0, len(column), chunk_rows):
+                file.write(np.ascontiguousarray(
+                    column[first:first + chunk_rows]).data)
+            file.write(bytes(aligned(column.nbytes) - column.nbytes))
+    return filename
+
+
+def read_archive(filename: str):
+    """Returns the header of an archive and its columns by name, memory
+    mapped, so only the parts of the columns that are used are read"""
+    with open(filename, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename} is not a SCPI archive")
+        length, = LENGTH.unpack(file.read(LENGTH.size))
+        header = json.loads(file.read(length))
+    start = aligned(len(MAGIC) + LENGTH.size + length)
+    columns = {}
+    for column in header["columns"]:
+        if column["length"]:
+            columns[column["name"]] = np.memmap(
+                filename, dtype=column["dtype"], mode="r",
+                offset=start + column["offset"], shape=(column["length"],))
+        else:
+            columns[column["name"]] = np.empty(0, dtype=column["dtype"])
+    return header, columns
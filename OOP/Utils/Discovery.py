@@ -0,0 +1,153 @@
+import errno
+import ipaddress
+import itertools
+import selectors
+import socket
+import time
+
+from OOP.ScpiDevice import parse_identification
+from OOP.Utils.Utils import find_driver
+
+
+class DiscoveredDevice:
+    """An instrument that answered *IDN? during discovery"""
+
+    def __init__(self, address: str, identification: str):
+        self.Address = address
+        self.Identification = identification
+        id_query = parse_identification(identification) + [""] * 4
+        self.Make = id_query[0]
+        self.Model = id_query[1]
+        self.Serial_Number = id_query[2]
+        self.Firmware_Version = id_query[3]
+        # Driver class from the registry, None if the device is not supported
+        self.Driver = find_driver(self.Make, self.Model)
+
+    def __repr__(self):
+        driver = self.Driver.__name__ if self.Driver else None
+        return f"{self.Address}: {self.Make}, {self.Model}, " \
+               f"{self.Serial_Number} ({driver})"
+
+    def connect(self):
+        """Connects to the device like Connect.connect"""
+        from Connect import connect
+        return connect(self.Address)
+
+
+def discover(network: str, port: int = 5025, timeout: float = 0.5,
+             max_connections: int = 256, max_hosts: int = 65536):
+    """Scans every host of the network, given in CIDR notation like
+    "192.168.0.0/24" or "fd00::/120", for instruments listening on port. Up
+    to max_connections hosts are tried at the same time with non-blocking
+    connects, every host that accepts is asked *IDN? and has timeout seconds
+    to connect and timeout seconds to answer. Returns a DiscoveredDevice
+    for every answer, sorted by address. The addresses include the port
+    when it is not the default one, so they can be given to connect. A
+    network of more than max_hosts addresses raises ValueError
+    """
+    network = ipaddress.ip_network(network, strict=False)
+    if network.num_addresses > max_hosts:
+        raise ValueError(f"{network} has {network.num_addresses} addresses, "
+                         f"more than max_hosts={max_hosts}")
+    family = socket.AF_INET6 if network.version == 6 else socket.AF_INET
+    hosts = iter(network.hosts())
+    # A /32 or /128 network has no hosts apart from its address
+    hosts = itertools.chain([next(hosts, network.network_address)], hosts)
+    selector = selectors.DefaultSelector()
+    found = []
+    pending = 0
+    retry = None
+    while True:
+        while pending < max_connections:
+            host = next(hosts, None) if retry is None else retry
+            retry = None
+            if host is None:
+                break
+            try:
+                started = start_connection(selector, str(host), port,
+                                           timeout, family)
+            except OSError:
+                # Out of sockets, the host is tried again once one of the
+                # pending connections is done
+                if pending == 0:
+                    selector.close()
+                    raise
+                retry = host
+                break
+            if started:
+                pending += 1
+        if pending == 0:
+            break
+        for key, _ in selector.select(timeout / 4):
+            device = handle_event(selector, key, timeout)
+            if device is not None:
+                found.append(device)
+            if key.data["done"]:
+                pending -= 1
+        now = time.monotonic()
+        for key in list(selector.get_map().values()):
+            if key.data["deadline"] < now:
+                close_connection(selector, key)
+                pending -= 1
+    selector.close()
+    addresses = [(ipaddress.ip_address(host), identification)
+                 for host, identification in found]
+    default_port = port == 5025
+    return [DiscoveredDevice(str(host) if default_port else
+                             f"[{host}]:{port}" if host.version == 6 else
+                             f"{host}:{port}", identification)
+            for host, identification in sorted(addresses)]
+
+
+def start_connection(selector, host: str, port: int, timeout: float,
+                     family: int = socket.AF_INET):
+    """Starts a non-blocking connect to the host, returns False if it failed
+    straight away. OSError is raised if no socket can be made"""
+    connection = socket.socket(family, socket.SOCK_STREAM)
+    connection.setblocking(False)
+    result = connection.connect_ex((host, port))
+    if result not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK,
+                      getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)):
+        connection.close()
+        return False
+    selector.register(connection, selectors.EVENT_WRITE, {
+        "host": host, "response": b"", "done": False,
+        "deadline": time.monotonic() + timeout})
+    return True
+
+
+def handle_event(selector, key, timeout: float):
+    """Sends *IDN? once the connection is made and collects the answer.
+    Returns (host, identification) when the answer is complete"""
+    connection = key.fileobj
+    data = key.data
+    try:
+        if key.events & selectors.EVENT_WRITE:
+            error = connection.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                close_connection(selector, key)
+                return None
+            connection.send(b"*IDN?\n")
+            data["deadline"] = time.monotonic() + timeout
+            selector.modify(connection, selectors.EVENT_READ, data)
+            return None
+        more_data = connection.recv(4096)
+    except OSError:
+        close_connection(selector, key)
+        return None
+    if not more_data:
+        close_connection(selector, key)
+        return None
+    data["response"] += more_data
+    if b"\n" not in data["response"]:
+        return None
+    close_connection(selector, key)
+    return data["host"], data["response"].split(b"\n")[0].decode(
+        errors="replace")
+
+
+def close_connection(selector, key):
+    """Stops watching the connection and closes it"""
+    key.data["done"] = True
+    selector.unregister(key.fileobj)
+    key.fileobj.close()
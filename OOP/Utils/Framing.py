@@ -0,0 +1,178 @@
+# Framing of SCPI responses without I/O, shared by ScpiDevice and
+# AsyncScpiDevice. The functions are generators that take the bytes they
+# need from the receive buffer of the device and yield a request whenever
+# the buffer runs out, the device answers the request by receiving from its
+# connection and sending the result back into the generator:
+# MORE      receive more bytes into the buffer, the reply is ignored
+# QUIET     receive more bytes only if the device sends any within its
+#           Indefinite_Block_Wait, the reply is whether it did
+# a memoryview
+#           receive bytes straight into the view, the reply is the number
+#           of bytes written to it
+# A closed connection raises ConnectionError in the device. The result of a
+# generator is its return value, chunks and block_chunks yield their data
+# as bytes or bytearray instead
+MORE = "more"
+QUIET = "quiet"
+# Steps of pipeline
+SEND = "send"
+RECEIVE = "receive"
+
+
+def take(buffer: bytearray, length: int):
+    """Returns exactly length bytes"""
+    while len(buffer) < length:
+        yield MORE
+    data = bytes(buffer[:length])
+    del buffer[:length]
+    return data
+
+
+def until(buffer: bytearray, termination: bytes):
+    """Returns the bytes up to, but not including, the termination. Bytes
+    after the termination are kept in the buffer for the next response"""
+    index = buffer.find(termination)
+    while index == -1:
+        start = max(len(buffer) - len(termination) + 1, 0)
+        yield MORE
+        index = buffer.find(termination, start)
+    data = bytes(buffer[:index])
+    del buffer[:index + len(termination)]
+    return data
+
+
+def fill(buffer: bytearray, view: memoryview):
+    """Fills the writable view, copying the bytes in the buffer first and
+    then asking for the rest to be received straight into the view"""
+    position = min(len(buffer), len(view))
+    if position:
+        view[:position] = buffer[:position]
+        del buffer[:position]
+    while position < len(view):
+        position += yield view[position:]
+
+
+def indefinite_block(buffer: bytearray, termination: bytes):
+    """Returns the data of an indefinite length block "#0" after its header.
+    The data can contain the termination, so the block ends at a termination
+    after which the device stays silent"""
+    while True:
+        if not buffer.endswith(termination):
+            yield MORE
+        elif not (yield QUIET):
+            data = bytearray(buffer[:-len(termination)])
+            buffer.clear()
+            return data
+
+
+def block(buffer: bytearray, termination: bytes,
+          ends_with_termination: bool, into=None):
+    """Returns the header and data of an IEEE 488.2 definite "#NB" or
+    indefinite "#0" length block after the "#" has been taken. The data is
+    written into the writable buffer into when one is given and returned as
+    a memoryview of the part that was filled, otherwise it is returned as a
+    new bytearray of the exact size. A ValueError is raised if into is too
+    small, after the block has been taken"""
+    number_length = int((yield from take(buffer, 1)).decode())
+    if number_length == 0:
+        data = yield from indefinite_block(buffer, termination)
+        if into is None:
+            return "#0", data
+        view = memoryview(into).cast('B')
+        if view.nbytes < len(data):
+            raise ValueError(f"Buffer of {view.nbytes} bytes is too small "
+                             f"for a block of {len(data)} bytes")
+        view[:len(data)] = data
+        return "#0", view[:len(data)]
+    data_length = int((yield from take(buffer, number_length)).decode())
+    header = f"#{number_length}{data_length}"
+    if into is None:
+        data = bytearray(data_length)
+        view = memoryview(data)
+    else:
+        view = memoryview(into).cast('B')
+        if view.nbytes < data_length:
+            # Takes the block so the next response is read correctly
+            yield from take(buffer,
+                            data_length + int(ends_with_termination))
+            raise ValueError(f"Buffer of {view.nbytes} bytes is too small "
+                             f"for a block of {data_length} bytes")
+        data = view = view[:data_length]
+    yield from fill(buffer, view)
+    if ends_with_termination:
+        yield from take(buffer, 1)
+    return header, data
+
+
+def response(buffer: bytearray, termination: bytes,
+             ends_with_termination: bool):
+    """Returns the header and data of one response, either a binary block
+    or an ASCII string without the termination, whose header is None"""
+    start_of_message = yield from take(buffer, 1)
+    if start_of_message == b'#':
+        return (yield from block(buffer, termination, ends_with_termination))
+    return None, (start_of_message
+                  + (yield from until(buffer, termination))).decode()
+
+
+def chunks(buffer: bytearray, termination: bytes, chunk_size: int,
+           indefinite: bool = False):
+    """Yields a terminated response in pieces of chunk_size bytes, the last
+    piece may be shorter. An ASCII response ends at the first termination,
+    with indefinite the data of a "#0" block ends like in indefinite_block"""
+    while True:
+        end = -1
+        if indefinite:
+            if buffer.endswith(termination) and not (yield QUIET):
+                end = len(buffer) - len(termination)
+        else:
+            end = buffer.find(termination)
+        if end != -1:
+            for index in range(0, end, chunk_size):
+                yield bytes(buffer[index:min(index + chunk_size, end)])
+            del buffer[:end + len(termination)]
+            return
+        # Everything in the buffer is data, except for the start of a
+        # termination that may be completed by the next receive
+        while len(buffer) - len(termination) >= chunk_size:
+            chunk = bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+            yield chunk
+        if not (indefinite and buffer.endswith(termination)):
+            yield MORE
+
+
+def block_chunks(buffer: bytearray, data_length: int, chunk_size: int,
+                 ends_with_termination: bool):
+    """Yields the data of a definite length block in pieces of chunk_size
+    bytes, then takes the termination after the block"""
+    remaining = data_length
+    while remaining > 0:
+        chunk = bytearray(min(chunk_size, remaining))
+        yield from fill(buffer, memoryview(chunk))
+        remaining -= len(chunk)
+        yield chunk
+    if ends_with_termination:
+        yield from take(buffer, 1)
+
+
+def pipeline(count: int, in_flight: int):
+    """Yields (SEND, index) and (RECEIVE, index) for count queries in the
+    order that keeps up to in_flight of them waiting for their response"""
+    in_flight = max(1, in_flight)
+    for index in range(min(in_flight, count)):
+        yield SEND, index
+    for index in range(count):
+        yield RECEIVE, index
+        if index + in_flight < count:
+            yield SEND, index + in_flight
+
+
+def split_compound(line: str, count: int):
+    """Returns the responses to a compound query of count queries, which the
+    device separates with ";" """
+    responses = line.split(";")
+    if len(responses) != count:
+        raise ValueError(f"{count} queries returned "
+                         f"{len(responses)} responses")
+    return responses
@@ -0,0 +1,170 @@
+import logging
+import os
+import sys
+
+# Environment variable that selects the operator prompt, one of "headless",
+# "unattended", "console" or "gui". When it is not set the prompt is chosen
+# from the environment the program runs in, which never selects headless
+PROMPT_VARIABLE = "SCPI_OPERATOR_PROMPT"
+
+
+class OperatorPrompt:
+    """Asks the operator to confirm something before a measurement continues,
+    for example that the cables of a device are connected. Every device uses
+    the prompt returned by get_operator_prompt unless it is given its own"""
+
+    def show_okay(self, title=None, message=None):
+        """Shows an information message and waits for the operator"""
+        raise Exception("Not Implemented")
+
+    def ask_yes_no(self, title=None, message=None):
+        """Asks the operator a question and returns 'yes' or 'no'"""
+        raise Exception("Not Implemented")
+
+    def show_warning(self, title=None, message=None):
+        """Shows a warning message and waits for the operator"""
+        raise Exception("Not Implemented")
+
+
+class HeadlessPrompt(OperatorPrompt):
+    """Confirms every prompt without waiting, for rack servers and automated
+    tests that are set up so nobody has to answer. It is only used when it is
+    selected with the environment variable or set_operator_prompt. The
+    messages are logged"""
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger("Base")
+
+    def show_okay(self, title=None, message=None):
+        self.logger.info(f"{title}: {message}")
+
+    def ask_yes_no(self, title=None, message=None):
+        self.logger.info(f"{title}: {message} Answered yes")
+        return 'yes'
+
+    def show_warning(self, title=None, message=None):
+        self.logger.warning(f"{title}: {message}")
+
+
+class UnattendedPrompt(OperatorPrompt):
+    """Refuses every prompt without waiting, used when nobody can answer
+    and confirming was not selected, so nothing that needs the operator runs
+    unconfirmed. The messages are logged"""
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger("Base")
+
+    def show_okay(self, title=None, message=None):
+        self.logger.info(f"{title}: {message}")
+
+    def ask_yes_no(self, title=None, message=None):
+        self.logger.warning(f"{title}: {message} Answered no, nobody can "
+                            f"answer, see {PROMPT_VARIABLE}")
+        return 'no'
+
+    def show_warning(self, title=None, message=None):
+        self.logger.warning(f"{title}: {message}")
+
+
+class ConsolePrompt(OperatorPrompt):
+    """Asks the operator on the terminal"""
+
+    def __init__(self, input_stream=None, output_stream=None):
+        self.input_stream = input_stream or sys.stdin
+        self.output_stream = output_stream or sys.stdout
+
+    def ask(self, text):
+        """Writes the text and returns the line typed by the operator, None
+        at the end of the input"""
+        self.output_stream.write(text)
+        self.output_stream.flush()
+        line = self.input_stream.readline()
+        if not line:
+            return None
+        return line.strip()
+
+    def show_okay(self, title=None, message=None):
+        self.ask(f"{title}\n{message}\nPress Enter to continue ")
+
+    def ask_yes_no(self, title=None, message=None):
+        while True:
+            answer = self.ask(f"{title}\n{message}\n[yes/no] ")
+            if answer is None:
+                # Nobody is left to answer
+                return 'no'
+            answer = answer.lower()
+            if answer in ('y', 'yes'):
+                return 'yes'
+            if answer in ('n', 'no'):
+                return 'no'
+
+    def show_warning(self, title=None, message=None):
+        self.ask(f"WARNING {title}\n{message}\nPress Enter to continue ")
+
+
+class GuiPrompt(OperatorPrompt):
+    """Asks the operator with tkinter message boxes. tkinter is only imported
+    when the first message box is shown"""
+
+    def message_box(self, box: str, title=None, message=None):
+        """Shows the box function of the tkinter messagebox module in a
+        hidden root window, which is destroyed afterwards, and returns the
+        answer"""
+        from tkinter import messagebox, Tk
+        root = Tk()
+        try:
+            root.withdraw()
+            return getattr(messagebox, box)(title=title, message=message,
+                                            parent=root)
+        finally:
+            root.destroy()
+
+    def show_okay(self, title=None, message=None):
+        self.message_box("showinfo", title, message)
+
+    def ask_yes_no(self, title=None, message=None):
+        return self.message_box("askquestion", title, message)
+
+    def show_warning(self, title=None, message=None):
+        self.message_box("showwarning", title, message)
+
+
+Prompts = {
+    "headless": HeadlessPrompt,
+    "unattended": UnattendedPrompt,
+    "console": ConsolePrompt,
+    "gui": GuiPrompt
+}
+Operator_Prompt = None
+
+
+def default_prompt_name():
+    """Returns the name of the prompt selected by the environment variable,
+    otherwise gui when a display is available, console when running in a
+    terminal, and unattended when nobody can answer"""
+    name = os.environ.get(PROMPT_VARIABLE, "").lower()
+    if name in Prompts:
+        return name
+    if os.name == "nt" or sys.platform == "darwin" \
+            or os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"):
+        return "gui"
+    if sys.stdin is not None and sys.stdin.isatty():
+        return "console"
+    return "unattended"
+
+
+def get_operator_prompt():
+    """Returns the operator prompt shared by all devices"""
+    global Operator_Prompt
+    if Operator_Prompt is None:
+        Operator_Prompt = Prompts[default_prompt_name()]()
+    return Operator_Prompt
+
+
+def set_operator_prompt(prompt):
+    """Sets the operator prompt shared by all devices, either a prompt object
+    or one of the names "headless", "unattended", "console" or "gui" """
+    global Operator_Prompt
+    if isinstance(prompt, str):
+        prompt = Prompts[prompt.lower()]()
+    Operator_Prompt = prompt
@@ -0,0 +1,84 @@
+class Setting:
+    """One setting of a device, compiled from the setting dictionaries of the
+    device. Everything that does not depend on the value, like the command
+    with its channel and the query message, is worked out once when the
+    schema is compiled"""
+    __slots__ = ("key", "name", "command", "extra", "channel", "query",
+                 "prefix", "parse", "true_false", "minimum", "maximum",
+                 "coupling")
+
+    def __init__(self, key, name, command, extra, channel, parse, true_false,
+                 value_range=None, coupling=()):
+        self.key = key
+        self.name = name
+        self.command = command
+        self.extra = extra
+        self.channel = channel
+        if channel == -1:
+            self.query = f"{command}? {extra}"
+            self.prefix = f"{command} "
+        else:
+            self.query = f"{command}? {extra}".format(channel)
+            self.prefix = f"{command} ".format(channel)
+        self.parse = parse
+        self.true_false = true_false
+        self.minimum, self.maximum = value_range or (None, None)
+        self.coupling = coupling
+
+    def serialize(self, value):
+        """Returns the command that sets the setting to value"""
+        if isinstance(value, bool):
+            value = self.true_false[0] if value else self.true_false[1]
+        return f"{self.prefix}{value}"
+
+    def validate(self, value):
+        """Raises a ValueError if value is outside the range of the setting"""
+        if self.minimum is not None and value < self.minimum or \
+                self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.key}: {self.name} must be between "
+                             f"{self.minimum} and {self.maximum}, not {value}")
+
+
+class SettingsSchema:
+    """The compiled settings of a device, looked up by (key, setting)"""
+    __slots__ = ("settings", "signature")
+
+    def __init__(self, device, signature):
+        """Compiles every setting in device.Settings from Setting_Commands,
+        Extra_Setting, Settings_Format, Settings_Range and Coupled_Settings.
+        signature identifies what the schema was compiled from, see
+        compiled_from"""
+        self.signature = signature
+        self.settings = {}
+        channels = dict(signature[-1])
+        value_ranges = getattr(device, "Settings_Range", None) or {}
+        for key in device.Settings:
+            for name in device.Settings[key]:
+                if device.Settings_Format[name] == bool:
+                    parse = device.bool_parser(key, name)
+                else:
+                    parse = device.Settings_Format[name]
+                coupling = tuple(
+                    (key, coupled) for coupled in
+                    device.Coupled_Settings.get(name, [])
+                    if coupled in device.Settings[key])
+                self.settings[(key, name)] = Setting(
+                    key, name, device.Setting_Commands[name],
+                    device.Extra_Setting[name], channels[key], parse,
+                    device.TrueFalseString, value_ranges.get(name), coupling)
+
+    def compiled_from(self, signature):
+        """Returns whether the schema was compiled from signature, which is
+        (dictionaries, setting names by key, channels by key). The
+        dictionaries are compared by identity and kept alive by the schema,
+        so a replaced dictionary is never mistaken for the old one"""
+        dictionaries, names, channels = signature
+        return all(dictionary is compiled for dictionary, compiled
+                   in zip(dictionaries, self.signature[0])) \
+            and (names, channels) == self.signature[1:]
+
+    def __getitem__(self, name):
+        return self.settings[name]
+
+    def __iter__(self):
+        return iter(self.settings.values())
@@ -0,0 +1,187 @@
+import functools
+import inspect
+import math
+import time
+
+# Buckets per doubling of the latency, the percentiles are accurate to
+# within 2 ** (1 / 8), about 9 %
+BUCKETS_PER_DOUBLING = 8
+# Latencies below this many seconds share the first bucket
+SMALLEST_LATENCY = 1e-6
+# Phases that are left out of the total time by phase, "sync" and "acquire"
+# contain the reads and writes made during them and "send" is the sending
+# of the messages of pipelined and compound reads
+NESTED_PHASES = ("sync", "acquire", "send")
+
+
+def response_size(value):
+    """Returns the number of bytes of a response or command"""
+    if value is None:
+        return 0
+    if hasattr(value, "nbytes"):
+        return value.nbytes
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return len(str(value))
+
+
+def instrumented(phase: str, size=None, by_command: bool = True):
+    """Decorates a function of ScpiDevice so every call is passed to the
+    recorders of the device, see add_recorder. With by_command the first
+    argument of the call is recorded as the command, otherwise the name of
+    the function. size(args, kwargs, result) returns the number of bytes of
+    the call, by default the size of the result. A generator function is
+    recorded from the first to the last item it yields, its size is the sum
+    of the sizes of the items. Without recorders the call costs one
+    attribute check"""
+    def decorator(function):
+        def command_of(args, kwargs):
+            if by_command and args and isinstance(args[0], str):
+                return args[0]
+            return kwargs.get("command", function.__name__) \
+                if by_command else function.__name__
+
+        def record(self, args, kwargs, start, end, nbytes):
+            for recorder in self.Recorders:
+                recorder.record(self, phase, command_of(args, kwargs),
+                                start, end, nbytes)
+
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator_wrapper(self, *args, **kwargs):
+                if not self.Recorders:
+                    return (yield from function(self, *args, **kwargs))
+                start = time.perf_counter()
+                nbytes = 0
+                items = function(self, *args, **kwargs)
+                try:
+                    for item in items:
+                        nbytes += response_size(item)
+                        yield item
+                finally:
+                    items.close()
+                    record(self, args, kwargs, start, time.perf_counter(),
+                           nbytes)
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            if not self.Recorders:
+                return function(self, *args, **kwargs)
+            start = time.perf_counter()
+            result = function(self, *args, **kwargs)
+            end = time.perf_counter()
+            if size is None:
+                nbytes = response_size(result)
+            else:
+                nbytes = size(args, kwargs, result)
+            record(self, args, kwargs, start, end, nbytes)
+            return result
+        return wrapper
+    return decorator
+
+
+def responses_size(args, kwargs, result):
+    """Returns the number of bytes of a list of responses"""
+    return sum(response_size(response) for response in result)
+
+
+def messages_size(args, kwargs, result):
+    """Returns the number of bytes of the list of messages of a call"""
+    return sum(len(message) for message in args[0])
+
+
+class LatencyHistogram:
+    """Counts latencies in logarithmic buckets, so recording is a few
+    arithmetic operations and the memory does not grow with the calls"""
+    __slots__ = ("counts", "count", "total", "bytes", "maximum")
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.bytes = 0
+        self.maximum = 0.0
+
+    def add(self, seconds: float, nbytes: int = 0):
+        bucket = 0
+        if seconds > SMALLEST_LATENCY:
+            bucket = int(math.log2(seconds / SMALLEST_LATENCY)
+                         * BUCKETS_PER_DOUBLING) + 1
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.bytes += nbytes
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def percentile(self, percent: float):
+        """Returns the upper edge of the bucket holding the percentile, at
+        most the largest latency seen"""
+        if self.count == 0:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                edge = SMALLEST_LATENCY * 2 ** (bucket / BUCKETS_PER_DOUBLING)
+                return min(edge, self.maximum)
+        return self.maximum
+
+
+class DeviceStats:
+    """Recorder keeping a latency histogram per phase and command of a
+    device, see ScpiDevice.enable_stats"""
+
+    def __init__(self):
+        self.Histograms = {}
+
+    def record(self, device, phase: str, command: str, start: float,
+               end: float, nbytes: int):
+        key = (phase, command)
+        histogram = self.Histograms.get(key)
+        if histogram is None:
+            histogram = self.Histograms[key] = LatencyHistogram()
+        histogram.add(end - start, nbytes)
+
+    def reset(self):
+        self.Histograms = {}
+
+    def report(self):
+        """Returns the count, bytes, total and p50/p95/p99 seconds of every
+        command by phase, and the total seconds of every phase except the
+        NESTED_PHASES"""
+        commands = {}
+        phases = {}
+        for (phase, command), histogram in self.Histograms.items():
+            commands.setdefault(phase, {})[command] = {
+                "count": histogram.count,
+                "bytes": histogram.bytes,
+                "total": histogram.total,
+                "p50": histogram.percentile(50),
+                "p95": histogram.percentile(95),
+                "p99": histogram.percentile(99)
+            }
+            if phase not in NESTED_PHASES:
+                phases[phase] = phases.get(phase, 0.0) + histogram.total
+        return {"commands": commands, "phases": phases}
+
+    def __str__(self):
+        """Formats the report as a table in milliseconds"""
+        report = self.report()
+        lines = [f"{'Phase':<8}{'Command':<32}{'Count':>8}{'Bytes':>12}"
+                 f"{'p50':>10}{'p95':>10}{'p99':>10}{'Total':>12}"]
+        for phase, commands in report["commands"].items():
+            for command, values in sorted(commands.items(),
+                                          key=lambda item: -item[1]["total"]):
+                lines.append(
+                    f"{phase:<8}{command[:31]:<32}{values['count']:>8}"
+                    f"{values['bytes']:>12}{values['p50'] * 1e3:>10.3f}"
+                    f"{values['p95'] * 1e3:>10.3f}"
+                    f"{values['p99'] * 1e3:>10.3f}"
+                    f"{values['total'] * 1e3:>12.3f}")
+        for phase, total in report["phases"].items():
+            lines.append(f"{phase:<8}{'total':<32}{'':>50}"
+                         f"{total * 1e3:>12.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TraceRecorder:
+    """Recorder keeping every write, read, settings sync, acquisition and
+    save of the devices it is added to, see ScpiDevice.add_recorder. save
+    writes them as a Chrome trace event file, which chrome://tracing and
+    ui.perfetto.dev show as a timeline with one process per instrument and
+    one track per thread that used it. The pipelined and compound reads and
+    batched writes of a settings sync are shown nested in its span"""
+
+    def __init__(self):
+        self.Events = []
+        self.Lock = threading.Lock()
+        # Process id of every device and thread id of every thread
+        self.Processes = {}
+        self.Threads = {}
+        # (process id, thread id) of the tracks that have been named
+        self.Tracks = set()
+        # Timestamps are time.perf_counter, which is monotonic, relative to
+        # the start of the trace
+        self.Start = time.perf_counter()
+
+    def attach(self, devices):
+        """Adds the recorder to every device"""
+        for device in devices:
+            device.add_recorder(self)
+
+    def detach(self, devices):
+        """Removes the recorder from every device"""
+        for device in devices:
+            device.remove_recorder(self)
+
+    def process_id(self, device):
+        """Returns the process id of the device, naming the process after the
+        device the first time it is seen"""
+        process_id = self.Processes.get(id(device))
+        if process_id is None:
+            process_id = self.Processes[id(device)] = len(self.Processes) + 1
+            name = f"{device.Make} {device.Model} {device.Address}".strip()
+            self.Events.append({"name": "process_name", "ph": "M",
+                                "pid": process_id,
+                                "args": {"name": name or str(process_id)}})
+        return process_id
+
+    def thread_id(self, process_id: int):
+        """Returns the thread id of the current thread, naming the thread in
+        the process the first time it is seen there"""
+        thread = threading.current_thread()
+        thread_id = self.Threads.get(thread.ident)
+        if thread_id is None:
+            thread_id = self.Threads[thread.ident] = len(self.Threads) + 1
+        if (process_id, thread_id) not in self.Tracks:
+            self.Tracks.add((process_id, thread_id))
+            self.Events.append({"name": "thread_name", "ph": "M",
+                                "pid": process_id, "tid": thread_id,
+                                "args": {"name": thread.name}})
+        return thread_id
+
+    def record(self, device, phase: str, command: str, start: float,
+               end: float, nbytes: int):
+        with self.Lock:
+            process_id = self.process_id(device)
+            self.Events.append({
+                "name": command, "cat": phase, "ph": "X",
+                "ts": (start - self.Start) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": process_id, "tid": self.thread_id(process_id),
+                "args": {"bytes": nbytes}})
+
+    def trace(self):
+        """Returns the trace as a Chrome trace event dictionary"""
+        with self.Lock:
+            return {"traceEvents": list(self.Events),
+                    "displayTimeUnit": "ms"}
+
+    def save(self, filename: str):
+        """Writes the trace to filename as JSON"""
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, "w") as file:
+            json.dump(self.trace(), file)
+        return filename
+
+
+@contextmanager
+def tracing(devices, filename: str):
+    """Records the devices while the with block runs and writes the trace
+    to filename when it exits, also when it exits with an error:
+
+    with tracing([vna, sg], "session.json"):
+        ...
+    """
+    devices = list(devices)
+    recorder = TraceRecorder()
+    recorder.attach(devices)
+    try:
+        yield recorder
+    finally:
+        recorder.detach(devices)
+        recorder.save(filename)
@@ -0,0 +1,25 @@
+class TrackedSettings(dict):
+    """Dictionary of settings that remembers which settings were assigned
+    since Modified was last cleared, so send_all_settings only has to look
+    at, send and confirm the settings that were changed"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.Modified = set()
+
+    def __setitem__(self, setting, value):
+        super().__setitem__(setting, value)
+        self.Modified.add(setting)
+
+    def __delitem__(self, setting):
+        super().__delitem__(setting)
+        self.Modified.discard(setting)
+
+    def update(self, *args, **kwargs):
+        for setting, value in dict(*args, **kwargs).items():
+            self[setting] = value
+
+    def setdefault(self, setting, value=None):
+        if setting not in self:
+            self[setting] = value
+        return self[setting]
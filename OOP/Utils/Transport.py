@@ -0,0 +1,204 @@
+import gzip
+import socket
+import struct
+import threading
+import time
+
+# First bytes of a recording, followed by the length and the address
+MAGIC = b"SCPIREC1"
+# Every record is the direction, the seconds since the recording started and
+# the number of bytes, followed by the bytes
+RECORD = struct.Struct("<cdI")
+SENT = b">"
+RECEIVED = b"<"
+
+
+def parse_address(address: str, port: int = 5025):
+    """Splits an address into (host, port). The port is optional:
+    "192.168.0.10", "192.168.0.10:5025", "fd00::1", "[fd00::1]:5025"."""
+    if address.startswith("["):
+        host, _, rest = address[1:].partition("]")
+        return host, int(rest.lstrip(":") or port)
+    if address.count(":") > 1:
+        # An IPv6 address without brackets can not have a port
+        return address, port
+    host, _, address_port = address.partition(":")
+    return host, int(address_port or port)
+
+
+def open_log(filename: str, mode: str):
+    """Opens a recording, compressed when the name ends with .gz"""
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode)
+    return open(filename, mode)
+
+
+class RecordingTransport:
+    """Wraps the socket of a device and records every byte sent to and
+    received from the instrument with its time. Give it to ScpiDevice or
+    connect instead of an address:
+
+    device = connect(RecordingTransport.open("192.168.0.10", "vna.rec"))
+    """
+
+    def __init__(self, connection, filename: str, address: str = ""):
+        self.Connection = connection
+        self.Address = address
+        self.Lock = threading.Lock()
+        self.Log = open_log(filename, "wb")
+        encoded_address = address.encode()
+        self.Log.write(MAGIC + struct.pack("<H", len(encoded_address))
+                       + encoded_address)
+        self.Start = time.perf_counter()
+
+    @classmethod
+    def open(cls, address: str, filename: str, port: int = 5025,
+             timeout: float = 2):
+        """Connects to the address, optionally followed by ":port", see
+        parse_address, and records the connection to filename"""
+        connection = socket.create_connection(parse_address(address, port),
+                                              timeout)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(connection, filename, address.upper())
+
+    def record(self, direction: bytes, data):
+        with self.Lock:
+            self.Log.write(RECORD.pack(direction,
+                                       time.perf_counter() - self.Start,
+                                       len(data)))
+            self.Log.write(data)
+
+    def send(self, data):
+        sent = self.Connection.send(data)
+        self.record(SENT, data[:sent])
+        return sent
+
+    def sendall(self, data):
+        self.Connection.sendall(data)
+        self.record(SENT, data)
+
+    def recv(self, size: int):
+        data = self.Connection.recv(size)
+        self.record(RECEIVED, data)
+        return data
+
+    def recv_into(self, buffer, size: int = 0):
+        received = self.Connection.recv_into(buffer, size)
+        self.record(RECEIVED, bytes(memoryview(buffer)[:received]))
+        return received
+
+    def settimeout(self, timeout):
+        self.Connection.settimeout(timeout)
+
+    def gettimeout(self):
+        return self.Connection.gettimeout()
+
+    def close(self):
+        self.Connection.close()
+        with self.Lock:
+            self.Log.close()
+
+
+class ReplayTransport:
+    """Plays a recording of RecordingTransport back in place of the
+    instrument, so scripts run without hardware through the real parsing
+    code. The bytes sent have to be the ones recorded, otherwise a
+    ValueError is raised. A response is only received once everything sent
+    before it was recorded has been sent again, until then receiving times
+    out like a silent instrument. With speed the responses take as long
+    after the query as they did when recorded, divided by speed, without it
+    they are returned as fast as possible:
+
+    device = connect(ReplayTransport("vna.rec"))
+    """
+
+    def __init__(self, filename: str, speed: float = None):
+        self.Speed = speed
+        self.Timeout = None
+        sent = []
+        # Received bytes with the seconds since the last send and the number
+        # of bytes sent before them
+        self.Responses = []
+        sent_length = 0
+        with open_log(filename, "rb") as log:
+            if log.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{filename} is not a SCPI recording")
+            length, = struct.unpack("<H", log.read(2))
+            self.Address = log.read(length).decode()
+            last_send = 0.0
+            header = log.read(RECORD.size)
+            while len(header) == RECORD.size:
+                direction, seconds, length = RECORD.unpack(header)
+                data = log.read(length)
+                if direction == SENT:
+                    sent.append(data)
+                    sent_length += len(data)
+                    last_send = seconds
+                elif data:
+                    self.Responses.append((data, seconds - last_send,
+                                           sent_length))
+                header = log.read(RECORD.size)
+        self.Expected = b"".join(sent)
+        self.Sent_Position = 0
+        self.Response_Index = 0
+        # Part of the current response that has not been received yet
+        self.Pending = memoryview(b"")
+        self.Last_Send = time.perf_counter()
+
+    def send(self, data):
+        data = bytes(data)
+        end = self.Sent_Position + len(data)
+        expected = self.Expected[self.Sent_Position:end]
+        if data != expected:
+            raise ValueError(f"Sent {data!r} at byte {self.Sent_Position} "
+                             f"of the recording, which has {expected!r}")
+        self.Sent_Position = end
+        self.Last_Send = time.perf_counter()
+        return len(data)
+
+    def sendall(self, data):
+        self.send(data)
+
+    def next_response(self):
+        """Returns the rest of the current response, waiting for the next
+        one when it is used up. Empty when the recording has ended, raises
+        socket.timeout when the next response was recorded after something
+        that has not been sent yet"""
+        if not self.Pending:
+            if self.Response_Index == len(self.Responses):
+                return self.Pending
+            data, delay, sent_length = self.Responses[self.Response_Index]
+            if sent_length > self.Sent_Position:
+                raise socket.timeout("The next response was recorded after "
+                                     "a message that has not been sent")
+            self.Response_Index += 1
+            if self.Speed:
+                remaining = self.Last_Send + delay / self.Speed \
+                    - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+            self.Pending = memoryview(data)
+        return self.Pending
+
+    def recv(self, size: int):
+        pending = self.next_response()
+        data = bytes(pending[:size])
+        self.Pending = pending[size:]
+        return data
+
+    def recv_into(self, buffer, size: int = 0):
+        pending = self.next_response()
+        view = memoryview(buffer).cast("B")
+        size = min(size or len(view), len(view), len(pending))
+        view[:size] = pending[:size]
+        self.Pending = pending[size:]
+        return size
+
+    def settimeout(self, timeout):
+        self.Timeout = timeout
+
+    def gettimeout(self):
+        return self.Timeout
+
+    def close(self):
+        self.Pending = memoryview(b"")
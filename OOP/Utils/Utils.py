@@ -1,76 +1,142 @@
-from OOP.DCPS import KeysightTechnologiesN6700, KeysightTechnologiesN6700c, TestDcps
-from OOP.DMM import KeysightTruevolt, KeysightTruevolt34465A, TestDmm
-from OOP.Oscope import KeysightTechnologiesMSOS804A, TestOscope
-from OOP.SA import KeysightTechnologiesN9030a, TestSa
-from OOP.PG import KeysightEDU, KeysightTechnologiesEDU33211A, TestPg
-from OOP.PNA import RohdeSchwarzFSPN, RohdeSchwarzFSPN26, TestPna
-from OOP.VNA import RohdeSchwarzZva244port, RohdeSchwarzZvaZvbZvt, TestVna
-from OOP.SG import RohdeSchwarzSMB, RohdeSchwarzSMB100A, TestSg
-from OOP.PM import KeysightPSeriesPowerMeter, KeysightTechnologiesN1912A, TestPm
-from OOP.BaseDevice import BaseDevice
-
-
-def process_keysight_technologies_makes(model: str, address: str, is_usb_connection=False):
-    if model == "N6700":
-        return KeysightTechnologiesN6700(address, is_usb_connection)
-    elif model == "N6700c":
-        return KeysightTechnologiesN6700c(address, is_usb_connection)
-    elif model == "MSOS804A":
-        return KeysightTechnologiesMSOS804A(address, is_usb_connection)
-    elif model == "N9030a":
-        return KeysightTechnologiesN9030a(address, is_usb_connection)
-    elif model == "EDU":
-        return KeysightEDU(address, is_usb_connection)
-    elif model == "EDU33211A":
-        return KeysightTechnologiesEDU33211A(address, is_usb_connection)
-
-
-def process_rohde_schwarz_makes(model: str, address: str, is_usb_connection=False):
-    if model == "FSPN":
-        return RohdeSchwarzFSPN(address, is_usb_connection)
-    elif model == "FSPN26":
-        return RohdeSchwarzFSPN26(address, is_usb_connection)
-    elif model == "Zva244port":
-        return RohdeSchwarzZva244port(address, is_usb_connection)
-    elif model == "ZvaZvbZvt":
-        return RohdeSchwarzZvaZvbZvt(address, is_usb_connection)
-    elif model == "SMB":
-        return RohdeSchwarzSMB(address, is_usb_connection)
-    elif model == "SMB100A":
-        return RohdeSchwarzSMB100A(address, is_usb_connection)
-
-
-def process_test_devices(device: BaseDevice):
-    test_device_address = str.format("{}{}", device.Make, device.Model).upper()
-    if device.Model == "DCPS":
-        return TestDcps(test_device_address)
-    elif device.Model == "OSCOPE":
-        return TestOscope(test_device_address)
-    elif device.Model == "PG":
-        return TestPg(test_device_address)
-    elif device.Model == "PNA":
-        return TestPna(test_device_address)
-    elif device.Model == "SA":
-        return TestSa(test_device_address)
-    elif device.Model == "VNA":
-        return TestVna(test_device_address)
-    elif device.Model == "SG":
-        return TestSg(test_device_address)
-    elif device.Model == "PM":
-        return TestPm(test_device_address)
-    elif device.Model == "DMM":
-        return TestDmm(test_device_address)
-
-
-def process_device(device: BaseDevice):
-    if device.Make == "KeysightTechnologies":
-        device.Device.close()
-        return process_keysight_technologies_makes(device)
-    elif device.Make == "RohdeSchwarz":
-        device.Device.close()
-        return process_rohde_schwarz_makes(device)
-    elif device.Make == "TEST":
-        return process_test_devices(device)
+import importlib
+import threading
+from importlib import metadata
+
+# Entry point group that other packages can use to register drivers.
+# The entry point name is "<Make>:<ModelPrefix>" and its value the driver
+# class as "module:Class", for example
+# "KeysightTechnologies:N5222" = "my_drivers.pna:KeysightN5222B"
+ENTRY_POINT_GROUP = "scpi_devices.drivers"
+
+# Drivers keyed by (make, model prefix). The value is the driver class as
+# "module:Class", the module is only imported once an instrument with a
+# matching make and model is found
+Drivers = {
+    ("KeysightTechnologies", "N6700"):
+        "OOP.DCPS.KeysightTechnologiesN6700:KeysightTechnologiesN6700",
+    ("KeysightTechnologies", "N6700c"):
+        "OOP.DCPS.KeysightTechnologiesN6700c:KeysightTechnologiesN6700c",
+    ("KeysightTechnologies", "MSOS804A"):
+        "OOP.Oscope.KeysightTechnologiesMSOS804A:KeysightTechnologiesMSOS804A",
+    ("KeysightTechnologies", "N9030a"):
+        "OOP.SA.KeysightTechnologiesN9030a:KeysightTechnologiesN9030a",
+    ("KeysightTechnologies", "EDU"): "OOP.PG.KeysightEDU:KeysightEDU",
+    ("KeysightTechnologies", "EDU33211A"):
+        "OOP.PG.KeysightTechnologiesEDU33211A:KeysightTechnologiesEDU33211A",
+    ("RohdeSchwarz", "FSPN"): "OOP.PNA.RohdeSchwarzFspn:RohdeSchwarzFSPN",
+    ("RohdeSchwarz", "FSPN26"):
+        "OOP.PNA.RohdeSchwarzFspn26:RohdeSchwarzFSPN26",
+    ("RohdeSchwarz", "Zva244port"):
+        "OOP.VNA.RohdeSchwarzZva244port:RohdeSchwarzZva244port",
+    ("RohdeSchwarz", "ZvaZvbZvt"):
+        "OOP.VNA.RohdeSchwarzZvaZvbZvt:RohdeSchwarzZvaZvbZvt",
+    ("RohdeSchwarz", "SMB"): "OOP.SG.RohdeSchwarzSMB:RohdeSchwarzSMB",
+    ("RohdeSchwarz", "SMB100A"):
+        "OOP.SG.RohdeSchwarzSMB100A:RohdeSchwarzSMB100A",
+    ("TEST", "DCPS"): "OOP.DCPS.TestDcps:TestDcps",
+    ("TEST", "OSCOPE"): "OOP.Oscope.TestOscope:TestOscope",
+    ("TEST", "PG"): "OOP.PG.TestPg:TestPg",
+    ("TEST", "PNA"): "OOP.PNA.TestPna:TestPna",
+    ("TEST", "SA"): "OOP.SA.TestSa:TestSa",
+    ("TEST", "VNA"): "OOP.VNA.TestVna:TestVna",
+    ("TEST", "SG"): "OOP.SG.TestSg:TestSg",
+    ("TEST", "PM"): "OOP.PM.TestPm:TestPm",
+    ("TEST", "DMM"): "OOP.DMM.TestDmm:TestDmm",
+}
+Entry_Points_Loaded = False
+# Keeps other threads from finding a driver while the entry points load
+Entry_Points_Lock = threading.Lock()
+
+
+def register_driver(make: str, model_prefix: str, driver):
+    """Registers a driver for every instrument of the make whose model starts
+    with model_prefix. driver is either the driver class or "module:Class",
+    which is imported the first time a matching instrument is found"""
+    Drivers[(make, model_prefix)] = driver
+
+
+def load_entry_points():
+    """Registers the drivers of installed packages that advertise them in the
+    entry point group. Only the entry point names are read, the driver
+    modules are imported when they are needed"""
+    global Entry_Points_Loaded
+    if Entry_Points_Loaded:
+        return
+    with Entry_Points_Lock:
+        if Entry_Points_Loaded:
+            return
+        try:
+            entry_points = metadata.entry_points(group=ENTRY_POINT_GROUP)
+        except TypeError:
+            # Python 3.9 and older return a dictionary of groups
+            entry_points = metadata.entry_points().get(ENTRY_POINT_GROUP,
+                                                       [])
+        for entry_point in entry_points:
+            make, _, model_prefix = entry_point.name.partition(":")
+            Drivers.setdefault((make, model_prefix), entry_point.value)
+        Entry_Points_Loaded = True
+
+
+def find_driver(make: str, model: str):
+    """Returns the driver class registered for the make with the longest
+    model prefix matching the model, ignoring case, or None if there is no
+    such driver"""
+    load_entry_points()
+    make = make.upper()
+    model = model.upper()
+    best_key = None
+    for key in Drivers:
+        if key[0].upper() == make and model.startswith(key[1].upper()):
+            if best_key is None or len(key[1]) > len(best_key[1]):
+                best_key = key
+    if best_key is None:
+        return None
+    driver = Drivers[best_key]
+    if isinstance(driver, str):
+        module_name, _, class_name = driver.partition(":")
+        driver = getattr(importlib.import_module(module_name), class_name)
+        Drivers[best_key] = driver
+    return driver
+
+
+def create_driver(make: str, model: str, address, is_usb_connection=False):
+    """Creates the driver registered for the make and model. address is
+    either an address to connect to, or an identified device whose
+    connection the driver takes over. Returns None if there is no driver"""
+    driver = find_driver(make, model)
+    if driver is None:
+        return None
+    if not isinstance(address, str):
+        return driver(address)
+    return driver(address, is_usb_connection)
+
+
+def process_keysight_technologies_makes(model: str, address,
+                                        is_usb_connection=False):
+    """Creates the Keysight Technologies driver for the model. address is
+    either an address to connect to, or an identified device whose
+    connection the driver takes over"""
+    return create_driver("KeysightTechnologies", model, address,
+                         is_usb_connection)
+
+
+def process_rohde_schwarz_makes(model: str, address, is_usb_connection=False):
+    """Creates the Rohde & Schwarz driver for the model. address is either an
+    address to connect to, or an identified device whose connection the
+    driver takes over"""
+    return create_driver("RohdeSchwarz", model, address, is_usb_connection)
+
+
+def process_test_devices(device):
+    """Creates the test driver for the device type given as the model"""
+    return create_driver("TEST", device.Model, device)
+
+
+def process_device(device):
+    """Creates the driver for an identified device. The driver takes over
+    the connection and identification of the device, so the instrument is
+    not connected to or queried a second time"""
+    return create_driver(device.Make, device.Model, device)
 
 
 def process_usb_device(id_vendor: str, id_product: str):
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from OOP.Utils.Archive import (ALIGNMENT, column_names, read_archive,
+                               write_archive)
+
+
+class ArchiveUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the binary archive of
+    save_archive
+    """
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "trace.scpa")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """ Test if the header and the columns, written in chunks in their
+        own byte order, are read back memory mapped and aligned
+        """
+        frequencies = [1e9 + 1e6 * point for point in range(1001)]
+        power = np.arange(-1001, 0, dtype='>i4')
+        header = {"make": "Keysight", "settings": {"GeneralSettings": {
+            "Points": 1001, "Data_Format": "INT,32"}}}
+        write_archive(self.filename, header, ["Frequency", "Power"],
+                      [frequencies, power], 100)
+        read_header, columns = read_archive(self.filename)
+        self.assertEqual(read_header["make"], "Keysight")
+        self.assertEqual(read_header["settings"], header["settings"])
+        self.assertIsInstance(columns["Power"], np.memmap)
+        self.assertEqual(columns["Power"].dtype, np.dtype('>i4'))
+        np.testing.assert_array_equal(columns["Power"], power)
+        np.testing.assert_array_equal(columns["Frequency"], frequencies)
+        for column in columns.values():
+            self.assertEqual(column.offset % ALIGNMENT, 0)
+
+    def test_column_names(self):
+        """ Test if the columns are named after the save_data table title
+        """
+        self.assertEqual(column_names("\n\n!Frequency\tPower", 2),
+                         ["Frequency", "Power"])
+        self.assertEqual(column_names("\n\n!Time", 2),
+                         ["column0", "column1"])
+
+    def test_not_an_archive(self):
+        with open(self.filename, "wb") as file:
+            file.write(b"!Version:\t0.1\n")
+        with self.assertRaises(ValueError):
+            read_archive(self.filename)
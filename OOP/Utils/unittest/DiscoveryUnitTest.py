@@ -0,0 +1,91 @@
+import socket
+import time
+import unittest
+from unittest import mock
+
+from Emulator import Emulator
+from OOP.Utils.Discovery import discover
+
+
+class DiscoveryUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the LAN discovery
+    """
+
+    def setUp(self) -> None:
+        """ Starts an emulated phase noise analyzer on a free port
+        """
+        self.emulator = Emulator("PNA", port=0)
+        self.emulator.start()
+        self.port = self.emulator.server_address[1]
+
+    def tearDown(self) -> None:
+        self.emulator.stop()
+
+    def test_discover_emulated_instrument(self):
+        """ Test if the emulated instrument is found, mapped to its driver
+        and can be connected to from the inventory
+        """
+        start = time.monotonic()
+        devices = discover("127.0.0.0/29", self.port, timeout=0.5)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(len(devices), 1)
+        device = devices[0]
+        self.assertEqual(device.Address, f"127.0.0.1:{self.port}")
+        self.assertEqual((device.Make, device.Model),
+                         ("RohdeSchwarz", "FSPN261322.8003K26"))
+        self.assertEqual(device.Driver.__name__, "RohdeSchwarzFSPN26")
+        connected = device.connect()
+        self.assertEqual(type(connected).__name__, "RohdeSchwarzFSPN26")
+        self.assertEqual(connected.Options, ["B1", "B60"])
+        connected.close()
+
+    def test_silent_host_times_out(self):
+        """ Test if a host that accepts the connection but never answers is
+        left out after the timeout
+        """
+        silent = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        silent.bind(("127.0.0.1", 0))
+        silent.listen()
+        start = time.monotonic()
+        devices = discover("127.0.0.1/32", silent.getsockname()[1],
+                           timeout=0.2)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(devices, [])
+        silent.close()
+
+    def test_large_network_is_refused(self):
+        """ Test if a network with more addresses than max_hosts raises
+        instead of listing all of them
+        """
+        with self.assertRaises(ValueError):
+            discover("10.0.0.0/8", self.port)
+        with self.assertRaises(ValueError):
+            discover("fd00::/64", self.port)
+
+    def test_ipv6_network(self):
+        """ Test if an IPv6 network is scanned with IPv6 sockets and the
+        instruments found can be connected to
+        """
+        if not socket.has_ipv6:
+            self.skipTest("IPv6 is not available")
+        try:
+            emulator = Emulator("PNA", host="::1", port=0)
+        except OSError:
+            self.skipTest("IPv6 is not available")
+        with emulator:
+            emulator.start()
+            port = emulator.server_address[1]
+            devices = discover("::1/128", port, timeout=0.5)
+            self.assertEqual([device.Address for device in devices],
+                             [f"[::1]:{port}"])
+            connected = devices[0].connect()
+            self.assertEqual(type(connected).__name__, "RohdeSchwarzFSPN26")
+            connected.close()
+
+    def test_out_of_sockets(self):
+        """ Test if failing to make a socket raises instead of leaving the
+        host out
+        """
+        with mock.patch("socket.socket", side_effect=OSError(24, "EMFILE")):
+            with self.assertRaises(OSError):
+                discover("127.0.0.0/30", self.port)
@@ -0,0 +1,68 @@
+import unittest
+
+from OOP.Utils import Framing
+
+
+def run(framing, buffer, pieces):
+    """ Answers the requests of a framing generator on buffer with the
+    pieces, as if they were received one after the other, and returns its
+    result. The device stays silent once the pieces are used up
+    """
+    pieces = list(pieces)
+    try:
+        request = next(framing)
+        while True:
+            if request is Framing.QUIET:
+                reply = bool(pieces)
+                if reply:
+                    buffer.extend(pieces.pop(0))
+            elif request is Framing.MORE:
+                buffer.extend(pieces.pop(0))
+                reply = None
+            else:
+                piece = pieces.pop(0)
+                reply = min(len(piece), len(request))
+                request[:reply] = piece[:reply]
+                if piece[reply:]:
+                    pieces.insert(0, piece[reply:])
+            request = framing.send(reply)
+    except StopIteration as stop:
+        return stop.value
+
+
+class FramingUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the framing of responses
+    without a connection
+    """
+
+    def test_response(self):
+        """ Test if ASCII responses and blocks are framed across receives
+        and the bytes of the next response are kept
+        """
+        buffer = bytearray(b"1.5")
+        self.assertEqual(run(Framing.response(buffer, b"\n", True), buffer,
+                             [b",2\n+3"]), (None, "1.5,2"))
+        self.assertEqual(buffer, bytearray(b"+3"))
+        buffer = bytearray(b"#15ab")
+        self.assertEqual(run(Framing.response(buffer, b"\n", True), buffer,
+                             [b"c", b"de\n"]), ("#15", bytearray(b"abcde")))
+        self.assertEqual(buffer, bytearray())
+
+    def test_indefinite_block(self):
+        """ Test if a #0 block only ends when nothing follows a termination
+        """
+        buffer = bytearray(b"#0a\n")
+        self.assertEqual(run(Framing.response(buffer, b"\n", True), buffer,
+                             [b"b\n"]), ("#0", bytearray(b"a\nb")))
+
+    def test_pipeline(self):
+        """ Test if at most in_flight queries wait for their response
+        """
+        self.assertEqual(list(Framing.pipeline(3, 2)), [
+            (Framing.SEND, 0), (Framing.SEND, 1), (Framing.RECEIVE, 0),
+            (Framing.SEND, 2), (Framing.RECEIVE, 1), (Framing.RECEIVE, 2)])
+
+    def test_split_compound(self):
+        self.assertEqual(Framing.split_compound("1;2", 2), ["1", "2"])
+        with self.assertRaises(ValueError):
+            Framing.split_compound("1;2", 3)
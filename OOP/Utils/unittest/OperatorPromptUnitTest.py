@@ -0,0 +1,70 @@
+import io
+import os
+import subprocess
+import sys
+import unittest
+
+from OOP.Utils import OperatorPrompt
+
+
+class OperatorPromptUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the operator prompts
+    """
+
+    def test_console_prompt(self):
+        """ Test if the console prompt asks again until it gets yes or no
+        """
+        output = io.StringIO()
+        prompt = OperatorPrompt.ConsolePrompt(io.StringIO("maybe\nN\n"),
+                                              output)
+        self.assertEqual(prompt.ask_yes_no("Title", "Question?"), 'no')
+        self.assertEqual(output.getvalue().count("Question?"), 2)
+
+    def test_console_prompt_end_of_input(self):
+        """ Test if the console prompt answers no at the end of the input
+        instead of asking again
+        """
+        prompt = OperatorPrompt.ConsolePrompt(io.StringIO("maybe\n"),
+                                              io.StringIO())
+        self.assertEqual(prompt.ask_yes_no("Title", "Question?"), 'no')
+
+    def test_headless_prompt(self):
+        """ Test if the headless prompt confirms without waiting
+        """
+        prompt = OperatorPrompt.HeadlessPrompt()
+        self.assertEqual(prompt.ask_yes_no("Title", "Question?"), 'yes')
+
+    def test_unattended_prompt(self):
+        """ Test if nobody being able to answer refuses instead of
+        confirming
+        """
+        code = ("import sys\n"
+                "from OOP.Utils.OperatorPrompt import get_operator_prompt\n"
+                "prompt = get_operator_prompt()\n"
+                "print(type(prompt).__name__, prompt.ask_yes_no('Cal', "
+                "'Did you connect a 50 Ohm termination?'))\n")
+        environment = {key: value for key, value in os.environ.items()
+                       if key not in (OperatorPrompt.PROMPT_VARIABLE,
+                                      "DISPLAY", "WAYLAND_DISPLAY")}
+        output = subprocess.run([sys.executable, "-c", code], env=environment,
+                                stdin=subprocess.DEVNULL, capture_output=True,
+                                text=True, check=True)
+        if os.name != "nt" and sys.platform != "darwin":
+            self.assertEqual(output.stdout.split("\n")[-2],
+                             "UnattendedPrompt no")
+
+    def test_prompt_from_environment(self):
+        """ Test if the environment variable selects the shared prompt, and
+        creating a device does not import tkinter
+        """
+        code = ("import sys\n"
+                "from OOP.Utils.OperatorPrompt import get_operator_prompt\n"
+                "from Connect import connect\n"
+                "connect('TestDmm').initialize_device()\n"
+                "print(type(get_operator_prompt()).__name__, "
+                "'tkinter' in sys.modules)\n")
+        environment = dict(os.environ,
+                           **{OperatorPrompt.PROMPT_VARIABLE: "HEADLESS"})
+        output = subprocess.run([sys.executable, "-c", code], env=environment,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.split("\n")[-2], "HeadlessPrompt False")
@@ -0,0 +1,100 @@
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+from Connect import connect, replay
+from Emulator import Emulator
+from OOP.ScpiDevice import ScpiDevice
+from OOP.Utils.Transport import (RecordingTransport, ReplayTransport,
+                                 parse_address)
+
+
+class TransportUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on recording and replaying
+    the connection to a device
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """ Records a session with an emulated phase noise analyzer that
+        takes 0.2 seconds to answer
+        """
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.filename = os.path.join(cls.directory.name, "session.rec.gz")
+        with Emulator("PNA", port=0, latency=0.2, points=2) as emulator:
+            emulator.start()
+            device = connect(emulator.Address, cls.filename)
+            cls.frequency = device.read("FREQ:CENT")
+            device.write("FORM:DATA", "REAL,32")
+            cls.trace = bytes(device.read_block("TRAC"))
+            device.close()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.directory.cleanup()
+
+    def test_replay(self):
+        """ Test if the replayed device is identified and responds like the
+        recorded one, as fast as possible
+        """
+        device = replay(self.filename)
+        self.assertEqual(type(device).__name__, "RohdeSchwarzFSPN26")
+        self.assertEqual(device.Options, ["B1", "B60"])
+        start = time.perf_counter()
+        self.assertEqual(device.read("FREQ:CENT"), self.frequency)
+        self.assertLess(time.perf_counter() - start, 0.1)
+        device.write("FORM:DATA", "REAL,32")
+        self.assertEqual(bytes(device.read_block("TRAC")), self.trace)
+        self.assertEqual(self.frequency, "1000000000")
+        self.assertEqual(len(self.trace), 16)
+        device.close()
+
+    def test_replay_at_recorded_speed(self):
+        """ Test if the response takes as long as it did when recorded
+        """
+        device = replay(self.filename, speed=1)
+        start = time.perf_counter()
+        device.read("FREQ:CENT")
+        self.assertGreater(time.perf_counter() - start, 0.15)
+        device.close()
+
+    def test_replay_other_command(self):
+        """ Test if sending something that was not recorded is an error
+        """
+        device = replay(self.filename)
+        with self.assertRaises(ValueError):
+            device.read("POW")
+        device.close()
+
+    def test_replay_indefinite_block(self):
+        """ Test if waiting for the end of a "#0" block does not receive the
+        response to the next query before that query is sent
+        """
+        filename = os.path.join(self.directory.name, "block.rec")
+        connection, instrument = socket.socketpair()
+        instrument.sendall(b"TEST,DEV,1,1\nNone\n")
+        device = ScpiDevice(RecordingTransport(connection, filename))
+        instrument.sendall(b"#0\x01\x02\x03\n")
+        self.assertEqual(bytes(device.read_block("TRAC")), b"\x01\x02\x03")
+        instrument.sendall(b"1\n")
+        self.assertEqual(device.read("FREQ"), "1")
+        device.close()
+        instrument.close()
+        device = ScpiDevice(ReplayTransport(filename))
+        self.assertEqual(bytes(device.read_block("TRAC")), b"\x01\x02\x03")
+        self.assertEqual(device.read("FREQ"), "1")
+        device.close()
+
+    def test_parse_address(self):
+        """ Test if IPv4 and IPv6 addresses are split into host and port
+        """
+        self.assertEqual(parse_address("192.168.0.10"),
+                         ("192.168.0.10", 5025))
+        self.assertEqual(parse_address("192.168.0.10:5026"),
+                         ("192.168.0.10", 5026))
+        self.assertEqual(parse_address("fd00::1", 5026), ("fd00::1", 5026))
+        self.assertEqual(parse_address("[fd00::1]"), ("fd00::1", 5025))
+        self.assertEqual(parse_address("[fd00::1]:37835"),
+                         ("fd00::1", 37835))
@@ -0,0 +1,88 @@
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from OOP.ScpiDevice import ScpiDevice
+from OOP.Utils import Utils
+
+
+class UtilsUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the driver registry
+    """
+
+    def setUp(self) -> None:
+        """ Function in unittest.TestCase that is initialized
+        everytime a test case function is executed.
+        Keeps a copy of the registry so registered drivers do not leak into
+        other test cases.
+        """
+        self.drivers = dict(Utils.Drivers)
+
+    def tearDown(self) -> None:
+        """ Restores the registry
+        """
+        Utils.Drivers.clear()
+        Utils.Drivers.update(self.drivers)
+
+    def test_longest_model_prefix(self):
+        """ Test if the driver with the longest matching model prefix is used
+        """
+        Utils.register_driver("Make", "AB", str)
+        Utils.register_driver("Make", "ABC", int)
+        self.assertIs(Utils.find_driver("Make", "ABCD"), int)
+        self.assertIs(Utils.find_driver("Make", "ABD"), str)
+        self.assertIsNone(Utils.find_driver("Make", "A"))
+        self.assertIsNone(Utils.find_driver("Other", "ABC"))
+
+    def test_case_is_ignored(self):
+        """ Test if make and model are matched regardless of case
+        """
+        driver = Utils.find_driver("rohdeschwarz", "smb100a-1406.6000")
+        self.assertEqual(driver.__name__, "RohdeSchwarzSMB100A")
+
+    def test_driver_is_imported_lazily(self):
+        """ Test if importing the registry does not import any driver, and
+        finding a driver only imports its own device type
+        """
+        code = ("import sys\n"
+                "from OOP.Utils import Utils\n"
+                "print(any(name.startswith(('OOP.VNA', 'OOP.SA')) "
+                "for name in sys.modules))\n"
+                "Utils.find_driver('TEST', 'VNA')\n"
+                "print('OOP.VNA' in sys.modules, 'OOP.SA' in sys.modules)\n")
+        output = subprocess.run([sys.executable, "-c", code],
+                                capture_output=True, text=True,
+                                check=True).stdout.split("\n")
+        self.assertEqual(output[:2], ["False", "True False"])
+
+    def test_entry_points_load_once(self):
+        """ Test if threads finding a driver while the entry points load
+        wait for them instead of missing the drivers they register
+        """
+        def entry_points(**kwargs):
+            time.sleep(0.1)
+            return [SimpleNamespace(name="Plugin:X1",
+                                    value="builtins:dict")]
+
+        found = []
+        with mock.patch.object(Utils, "Entry_Points_Loaded", False), \
+                mock.patch.object(Utils.metadata, "entry_points",
+                                  side_effect=entry_points) as loader:
+            threads = [threading.Thread(target=lambda: found.append(
+                Utils.find_driver("Plugin", "X100"))) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(found, [dict] * 4)
+        self.assertEqual(loader.call_count, 1)
+
+    def test_test_device(self):
+        """ Test if a test device is created from its device type
+        """
+        device = Utils.process_test_devices(ScpiDevice("TestVna"))
+        self.assertEqual(type(device).__name__, "TestVna")
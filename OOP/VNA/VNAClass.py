@@ -2,6 +2,7 @@ import os
 import sys
 
 from OOP.BaseDevice import BaseDevice
+from OOP.ScpiDevice import parse_ascii_values
 
 
 class VNAClass(BaseDevice):
@@ -96,6 +97,10 @@ class VNAClass(BaseDevice):
             "REAL,32": 32,
             "REAL,64": 64
         }
+        self.Data_Types = {
+            "REAL,32": "f4",
+            "REAL,64": "f8"
+        }
 
     def set_start_frequency(self, frequency: float):
         """Sets start frequency, which will be sent to the device the next time
@@ -176,7 +181,7 @@ class VNAClass(BaseDevice):
         # TODO Can add feature that specifies allowed Trigger Sources
         self.New_Settings["GeneralSettings"]["Trigger_Edge"] = trigger_edge
 
-    def measurement_info(self):
+    def measurement_info(self, channel_name: str = ""):
         """Sets header information for the save file"""
         info_text = '\n!Measurements:'
         for Measurement in self.SParameters:
@@ -186,33 +191,38 @@ class VNAClass(BaseDevice):
     def create_extension(self, channel_name: str):
         # TODO make this actually check the SParameters to ensure that
         # the correct number of ports are used
-        ports = len(self.Settings[channel_name]["SParameters"]) ** 0.5
-        if ports == ports.__floor__():
-            return f"s{ports}p"
+        s_parameters = self.Settings.get(channel_name, {}).get(
+            "SParameters", self.SParameters)
+        ports = len(s_parameters) ** 0.5
+        if ports and ports == ports.__floor__():
+            return f"s{int(ports)}p"
         return "txt"
 
-    def create_data_text(self, channel_name: str):
-        """Creates table of Data for save file, excludes header info"""
-        data_text = '\n\n!Frequency'
-        index = 0
+    def data_table(self, channel_name: str):
+        """Returns the table of Data for save file, excludes header info"""
+        """Every row is a frequency followed by the real and imaginary part
+        of every S-parameter at that frequency"""
+        title = '\n\n!Frequency'
         if self.Settings["GeneralSettings"]["Data_Format"] != "ASC,0":
             data_list = self.data_format_conversion(self.Data)
             freq_list = self.data_format_conversion(self.Stimulus)
         else:
-            data_list = self.Data.split(',')
-            data_list = [float(i) for i in data_list]
-            freq_list = self.Stimulus.split(',')
-            freq_list = [float(i) for i in freq_list]
+            data_list = parse_ascii_values(self.Data)
+            freq_list = parse_ascii_values(self.Stimulus)
         for Measurement in self.SParameters:
-            data_text = "{}\t{}(real)\t{}(imaginary)".format(
-                data_text, Measurement, Measurement)
-        for frequency in freq_list:
-            data_text = "{}\n{}".format(data_text, frequency)
-            for _ in self.SParameters:
-                data_text = "{}\t{}\t{}".format(
-                    data_text, data_list[index], data_list[index + 1])
-                index = index + 2
-        return data_text
+            title = "{}\t{}(real)\t{}(imaginary)".format(
+                title, Measurement, Measurement)
+        values = 2 * len(self.SParameters)
+        if not values:
+            return title, [freq_list]
+        rows = len(freq_list)
+        if len(data_list) != rows * values:
+            raise ValueError(f"{len(data_list)} values were read for "
+                             f"{rows} frequencies of {values // 2} "
+                             f"S-parameters")
+        data_list = data_list.reshape(rows, values)
+        return title, [freq_list] + [data_list[:, column]
+                                     for column in range(values)]
 
     "Commands that MAY need to be overwritten"
 
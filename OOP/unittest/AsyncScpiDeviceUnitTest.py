@@ -0,0 +1,145 @@
+import asyncio
+import unittest
+
+from OOP.AsyncScpiDevice import AsyncScpiDevice
+from OOP.BaseDevice import BaseDevice
+
+
+class SmallDevice(BaseDevice):
+    """Driver with a few settings for the fake instrument"""
+
+    def __init__(self, address, is_usb_connection=False):
+        super().__init__(address, is_usb_connection)
+        self.Setting_Commands = {"Points": "SWE:POIN", "Output": "OUTP"}
+        self.Extra_Setting = {"Points": '', "Output": ''}
+        self.Settings_Format = {"Points": int, "Output": bool}
+        self.Settings = {"GeneralSettings": {"Points": 0, "Output": False}}
+
+
+class AsyncScpiDeviceUnitTest(unittest.IsolatedAsyncioTestCase):
+    """ This module is used to run unit testing on the AsyncScpiDevice class
+    against a fake instrument
+    """
+
+    async def asyncSetUp(self) -> None:
+        """ Starts a fake instrument that answers *IDN?, *OPT? and *OPC?, and
+        remembers the values written to other commands
+        """
+        self.values = {"SWE:POIN": "201", "OUTP": "0"}
+        # Commands the instrument ignores
+        self.fixed = set()
+        self.received = []
+        self.server = await asyncio.start_server(self.instrument,
+                                                 "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def instrument(self, reader, writer):
+        """ Answers the messages of one connection
+        """
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            self.received.append(line)
+            for command in line.decode().strip().split(";"):
+                command = command.lstrip(":")
+                if command == "*IDN?":
+                    writer.write(b"Fake Instruments,Small,1,1.0\n")
+                elif command == "*OPT?":
+                    writer.write(b"0,OPT1\n")
+                elif command == "*OPC?":
+                    writer.write(b"1\n")
+                elif command == "WAV:DATA?":
+                    # A #0 block with a termination in its data at the end
+                    # of the first write
+                    writer.write(b"#0\x01\x02\n")
+                    await writer.drain()
+                    await asyncio.sleep(0.03)
+                    writer.write(b"\x03\n")
+                elif command == "SILENT?":
+                    pass
+                elif command.endswith("?"):
+                    writer.write(f"{self.values[command[:-1]]}\n".encode())
+                else:
+                    name, value = command.split(" ")
+                    if name not in self.fixed:
+                        self.values[name] = value
+        writer.close()
+
+    async def test_settings_sync(self):
+        """ Test if the settings of the driver are read and sent over the
+        asyncio connection
+        """
+        device = await AsyncScpiDevice.open("127.0.0.1", self.port,
+                                            SmallDevice)
+        self.assertEqual((device.Make, device.Model), ("FakeInstruments",
+                                                       "Small"))
+        self.assertEqual(device.Options, ["OPT1"])
+        await device.initialize_values()
+        self.assertEqual(device.Settings["GeneralSettings"]["Points"], 201)
+        device.New_Settings["GeneralSettings"]["Points"] = 401
+        await device.send_all_settings()
+        self.assertEqual(self.values["SWE:POIN"], "401")
+        self.assertEqual(device.Settings["GeneralSettings"]["Points"], 401)
+        self.assertEqual(self.received[-2:],
+                         [b":SWE:POIN 401;*OPC?\n", b"SWE:POIN? \n"])
+        self.assertEqual(await device.read("OUTP"), "0")
+        await device.close()
+
+    async def test_failed_setting_stays_modified(self):
+        """ Test if a setting the instrument did not take is logged and sent
+        again by the next send_all_settings
+        """
+        self.fixed.add("OUTP")
+        device = await AsyncScpiDevice.open("127.0.0.1", self.port,
+                                            SmallDevice)
+        await device.initialize_values()
+        device.New_Settings["GeneralSettings"]["Output"] = True
+        with self.assertLogs(device.logger, "INFO") as logs:
+            await device.send_all_settings()
+        self.assertEqual(logs.records[-1].args,
+                         (["GeneralSettings: Output"],))
+        self.assertEqual(device.New_Settings["GeneralSettings"].Modified,
+                         {"Output"})
+        self.assertFalse(device.Settings["GeneralSettings"]["Output"])
+        await device.close()
+
+    async def test_many_devices(self):
+        """ Test if several devices can be used from one event loop at once
+        """
+        devices = await asyncio.gather(*[
+            AsyncScpiDevice.open("127.0.0.1", self.port, SmallDevice)
+            for _ in range(5)])
+        await asyncio.gather(*[device.initialize_values()
+                               for device in devices])
+        for device in devices:
+            self.assertEqual(device.Settings["GeneralSettings"]["Output"],
+                             False)
+            await device.close()
+
+    async def test_indefinite_block_and_timeout(self):
+        """ Test if a #0 block is not cut off at a termination in its data,
+        and a device that does not answer raises a timeout
+        """
+        device = await AsyncScpiDevice.open("127.0.0.1", self.port,
+                                            SmallDevice)
+        self.assertEqual(await device.read("WAV:DATA"), b"\x01\x02\n\x03")
+        self.assertEqual(device.DataHeader, "#0")
+        device.Timeout = 0.1
+        with self.assertRaises(asyncio.TimeoutError):
+            await device.read("SILENT")
+        await device.close()
+
+    async def test_driver_can_not_use_the_connection(self):
+        """ Test if a driver method that talks to the device raises instead
+        of treating the device as a test device
+        """
+        device = await AsyncScpiDevice.open("127.0.0.1", self.port,
+                                            SmallDevice)
+        with self.assertRaises(RuntimeError):
+            device.driver.get_all_settings()
+        await device.close()
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from Connect import Bench
+
+
+class BenchUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the Bench class
+    """
+
+    def test_devices_by_role(self):
+        """ Test if every device is connected, initialized and kept by role
+        """
+        with Bench({"pg": "TestPg", "sg": "TestSg", "pm": "TestPm"}) as bench:
+            self.assertEqual(type(bench["pg"]).__name__, "TestPg")
+            self.assertEqual(type(bench["sg"]).__name__, "TestSg")
+            self.assertIsNotNone(bench["pm"].New_Settings)
+            self.assertEqual(len(list(bench)), 3)
+        self.assertEqual(bench.Devices, {})
+
+    def test_addresses_as_roles(self):
+        """ Test if a list of addresses uses the addresses as roles
+        """
+        bench = Bench(["TestPg", "TestSg"], initialize=False)
+        bench.open()
+        self.assertEqual(set(bench.Devices), {"TestPg", "TestSg"})
+        bench.close()
+
+    def test_trace(self):
+        """ Test if the trace has a process per device and a track per thread
+        """
+        with Bench({"pm": "TestPm", "dmm": "TestDmm"}, initialize=False) \
+                as bench, tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "trace.json")
+            with bench.trace(filename):
+                worker = threading.Thread(target=bench["pm"].get_data,
+                                          name="Worker")
+                worker.start()
+                worker.join()
+                bench["dmm"].get_data()
+                bench["pm"].get_data()
+            bench["pm"].get_data()
+            with open(filename) as file:
+                events = json.load(file)["traceEvents"]
+        spans = [event for event in events if event["ph"] == "X"]
+        self.assertEqual([(event["name"], event["cat"]) for event in spans],
+                         [("get_data", "acquire")] * 3)
+        self.assertEqual(len({event["pid"] for event in spans}), 2)
+        self.assertEqual(len({event["tid"] for event in spans}), 2)
+        names = {event["args"]["name"] for event in events
+                 if event["name"] == "thread_name"}
+        self.assertIn("Worker", names)
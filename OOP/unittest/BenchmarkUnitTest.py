@@ -0,0 +1,28 @@
+import json
+import unittest
+
+import Benchmark
+
+
+class BenchmarkUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the benchmark suite
+    """
+
+    def test_run(self):
+        """ Test if every benchmark runs against the emulator and the report
+        can be written as JSON
+        """
+        report = json.loads(json.dumps(Benchmark.run((100,), (11,), 1)))
+        benchmarks = {(result["benchmark"], result["device"])
+                      for result in report["results"]}
+        self.assertEqual(benchmarks, {
+            ("read", "SA"), ("get_all_settings", "PNA"),
+            ("send_all_settings", "PNA"), ("data_format_conversion", "SA"),
+            ("save_data", "VNA"), ("save_data", "SA"), ("save_data", "PNA"),
+            ("save_data", "OSCOPE"), ("save_archive", "VNA"),
+            ("save_archive", "SA"), ("save_archive", "PNA"),
+            ("save_archive", "OSCOPE")})
+        settings = [result for result in report["results"]
+                    if result["benchmark"] == "get_all_settings"][0]
+        self.assertEqual(settings["round_trips"], 1)
+        self.assertEqual(settings["sends"], settings["settings"])
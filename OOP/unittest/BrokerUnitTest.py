@@ -0,0 +1,145 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from Broker import Broker, BrokerClient
+from Emulator import Emulator
+
+
+class BrokerUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the instrument broker
+    """
+
+    def setUp(self) -> None:
+        """ Starts a broker on a temporary Unix socket
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "broker.sock")
+        self.broker = Broker(self.path)
+        self.thread = threading.Thread(target=self.broker.serve_forever)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.broker.shutdown()
+        self.thread.join()
+        self.broker.server_close()
+        self.directory.cleanup()
+
+    def test_cached_identification(self):
+        """ Test if *IDN?, *OPT? and the settings come from the cache
+        """
+        client = BrokerClient("TestPg", self.path)
+        self.assertEqual(client.read("*IDN"),
+                         "TEST,PG,SerialNumber,Firmware")
+        self.assertEqual(client.read("*OPT?"), "Options,for,test,device")
+        self.assertEqual(client.settings()["WaveformSettings"]["Voltage_High"],
+                         0.05)
+        client.close()
+
+    def test_clients_share_one_connection(self):
+        """ Test if several clients use the same device, each getting its
+        own responses
+        """
+        results = []
+
+        def use_broker():
+            client = BrokerClient("TestPg", self.path)
+            for _ in range(20):
+                results.append(client.transaction([
+                    {"op": "write", "command": "FREQ", "value": 1000},
+                    {"op": "query", "command": "FREQ"}]))
+            client.close()
+
+        clients = [threading.Thread(target=use_broker) for _ in range(4)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        self.assertEqual(results, [[None, 0.0]] * 80)
+        self.assertEqual(list(self.broker.Workers), ["TestPg"])
+
+    def test_socket_is_private(self):
+        """ Test if only the user running the broker can use the socket
+        """
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_running_broker_is_kept(self):
+        """ Test if a second broker refuses the socket of a running one and
+        replaces the socket of one that is gone
+        """
+        with self.assertRaises(OSError):
+            Broker(self.path)
+        client = BrokerClient("TestPg", self.path)
+        self.assertEqual(client.read("*OPT?"), "Options,for,test,device")
+        client.close()
+        stale = os.path.join(self.directory.name, "stale.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as old:
+            old.bind(stale)
+        broker = Broker(stale)
+        broker.server_close()
+
+    def test_slow_connection_does_not_block_others(self):
+        """ Test if clients of one instrument are served while the broker is
+        still connecting to another
+        """
+        release = threading.Event()
+        create_worker = self.broker.create_worker
+
+        def slow_create_worker(address):
+            if address == "TestDmm":
+                release.wait()
+            return create_worker(address)
+
+        self.broker.create_worker = slow_create_worker
+        slow = BrokerClient("TestDmm", self.path)
+        waiting = threading.Thread(target=slow.identify)
+        waiting.start()
+        client = BrokerClient("TestPg", self.path)
+        self.assertEqual(client.read("*OPT?"), "Options,for,test,device")
+        self.assertTrue(waiting.is_alive())
+        release.set()
+        waiting.join()
+        client.close()
+        slow.close()
+
+    def test_device_without_driver(self):
+        """ Test if queries and commands of an instrument without a driver
+        are passed through
+        """
+        with Emulator("DMM", port=0) as emulator:
+            emulator.start()
+            client = BrokerClient(emulator.Address, self.path)
+            self.assertEqual(client.read("*OPT"), "DIG,MEM")
+            client.write("VOLT:RANG", 100)
+            self.assertEqual(client.read("VOLT:RANG"), "100")
+            with self.assertRaises(RuntimeError):
+                client.settings()
+            client.close()
+
+    def test_settings_follow_writes(self):
+        """ Test if the cached settings show the settings a client sent and
+        the commands a client wrote
+        """
+        with Emulator("PNA", port=0) as emulator:
+            emulator.start()
+            client = BrokerClient(emulator.Address, self.path)
+            settings = client.send_settings(
+                {"GeneralSettings": {"Sweep_Count": 5}})
+            self.assertEqual(settings["GeneralSettings"]["Sweep_Count"], 5)
+            self.assertEqual(
+                client.settings()["GeneralSettings"]["Sweep_Count"], 5)
+            self.assertEqual(client.read("SWE:COUN"), "5")
+            client.write("SWE:COUN", 7)
+            self.assertEqual(
+                client.settings()["GeneralSettings"]["Sweep_Count"], 7)
+            client.close()
+
+    def test_error_is_returned(self):
+        """ Test if an error on the broker is raised by the client
+        """
+        client = BrokerClient("TestPg", self.path)
+        with self.assertRaises(RuntimeError):
+            client.request({"op": "unknown"})
+        client.close()
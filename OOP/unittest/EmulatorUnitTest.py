@@ -0,0 +1,90 @@
+import time
+import unittest
+
+import numpy as np
+
+from Connect import connect
+from Emulator import Emulator
+
+
+class EmulatorUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the instrument emulator
+    """
+
+    def setUp(self) -> None:
+        """ Starts an emulated phase noise analyzer on a free port
+        """
+        self.emulator = Emulator("PNA", port=0, points=101)
+        self.emulator.start()
+        self.device = connect(self.emulator.Address)
+
+    def tearDown(self) -> None:
+        self.device.close()
+        self.emulator.stop()
+
+    def test_identified_by_driver(self):
+        """ Test if the emulator is identified like the instrument
+        """
+        self.assertEqual(type(self.device).__name__, "RohdeSchwarzFSPN26")
+        self.assertEqual(self.device.Options, ["B1", "B60"])
+
+    def test_ascii_and_binary_traces(self):
+        """ Test if the trace has the points that were set, as ASCII and as
+        a binary block
+        """
+        self.device.write("SWE:POIN", 11)
+        values = self.device.read("TRAC:DATA", "TRACE1").split(",")
+        self.assertEqual(len(values), 22)
+        self.device.write("FORM:DATA", "REAL,32")
+        block = self.device.read_block("TRAC:DATA", "TRACE1")
+        trace = np.frombuffer(block, "<f4")
+        np.testing.assert_allclose(trace, np.array(values, float), rtol=1e-6)
+
+    def test_settings_read_back(self):
+        """ Test if written settings are read back, with ON and OFF as 1 and
+        0, in one compound query
+        """
+        self.device.write("INIT:CONT", "OFF")
+        self.device.write("FREQ:CENT", 2e9)
+        self.assertEqual(self.device.read_compound(["INIT:CONT?",
+                                                    "FREQ:CENT?"]),
+                         ["0", "2000000000.0"])
+
+    def test_coupled_frequencies_and_latency(self):
+        """ Test if center and span follow start and stop, and responses
+        are delayed by the latency
+        """
+        with Emulator("SA", port=0, latency=0.05) as emulator:
+            emulator.start()
+            device = connect(emulator.Address)
+            self.assertEqual(type(device).__name__,
+                             "KeysightTechnologiesN9030a")
+            device.write("FREQ:STAR", 1e9)
+            device.write("FREQ:STOP", 2e9)
+            start = time.perf_counter()
+            self.assertEqual(float(device.read("FREQ:CENT")), 1.5e9)
+            self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+            self.assertEqual(float(device.read("FREQ:SPAN")), 1e9)
+            device.close()
+
+    def test_meter_and_supply_profiles(self):
+        """ Test if the multimeter and power meter return readings, and the
+        power supply keeps its outputs per channel
+        """
+        for profile, query, expected in (("DMM", "READ", 1), ("PM", "FETC",
+                                                              -10)):
+            with Emulator(profile, port=0) as emulator:
+                emulator.start()
+                device = connect(emulator.Address)
+                self.assertAlmostEqual(float(device.read(query)), expected,
+                                       places=1)
+                device.close()
+        with Emulator("DCPS", port=0) as emulator:
+            emulator.start()
+            device = connect(emulator.Address)
+            self.assertEqual(type(device).__name__,
+                             "KeysightTechnologiesN6700c")
+            device.write("SOUR:VOLT:LEV:IMM:AMPL 5, (@1,2)")
+            self.assertEqual(device.read("SOUR:VOLT:LEV:IMM:AMPL", "(@1,3)"),
+                             "5,0")
+            device.close()
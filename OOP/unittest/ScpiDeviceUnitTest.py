@@ -0,0 +1,582 @@
+import contextlib
+import io
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from OOP import ScpiDevice as scpi_device
+from OOP.ScpiDevice import ScpiDevice
+from OOP.Utils.Trace import TraceRecorder
+from OOP.Utils.TrackedSettings import TrackedSettings
+
+
+class ScpiDeviceUnitTest(unittest.TestCase):
+    """ This module is used to run unit testing on the socket handling of the
+    ScpiDevice class
+    """
+
+    def setUp(self) -> None:
+        """ Function in unittest.TestCase that is initialized
+        everytime a test case function is executed.
+        The device is connected to one end of a socket pair, the other end
+        plays the part of the instrument.
+        """
+        self.test = ScpiDevice("TestScpi")
+        self.test.Device, self.instrument = socket.socketpair()
+        self.test.Device.settimeout(2)
+
+    def tearDown(self) -> None:
+        """ Closes both ends of the socket pair
+        """
+        self.test.close()
+        self.instrument.close()
+
+    def respond(self, response: bytes, piece_size: int = 0):
+        """ Sends the response from the instrument side of the socket pair,
+        optionally split into pieces to mimic a slow network
+        """
+        if piece_size == 0:
+            self.instrument.sendall(response)
+            return
+        for index in range(0, len(response), piece_size):
+            self.instrument.sendall(response[index:index + piece_size])
+
+    def test_ascii_read(self):
+        """ Test if an ASCII response is returned without the termination
+        """
+        self.respond(b"1.0,2.0,3.0\n")
+        self.assertEqual(self.test.read("TRAC:DATA"), "1.0,2.0,3.0")
+        self.assertEqual(self.instrument.recv(100), b"TRAC:DATA? \n")
+
+    def test_ascii_read_in_pieces(self):
+        """ Test if an ASCII response that arrives in pieces is put back
+        together
+        """
+        values = ",".join(str(i) for i in range(20000))
+        writer = threading.Thread(target=self.respond,
+                                  args=(f"{values}\n".encode(), 997))
+        writer.start()
+        self.assertEqual(self.test.read("TRAC:DATA"), values)
+        writer.join()
+
+    def test_leftover_bytes_are_kept(self):
+        """ Test if bytes received after the termination are used for the
+        next response
+        """
+        self.respond(b"first\nsecond\n")
+        self.assertEqual(self.test.read("FIRS"), "first")
+        self.assertEqual(self.test.read("SEC"), "second")
+
+    def test_binary_block_read(self):
+        """ Test if a #NB binary block is read, including the data header and
+        the termination after the block
+        """
+        data = bytes(range(256)) * 40
+        self.respond(b"#510240" + data + b"\n" + b"next\n", 1000)
+        self.assertEqual(self.test.read("TRAC:DATA"), data)
+        self.assertEqual(self.test.DataHeader, "#510240")
+        self.assertEqual(self.test.read("NEXT"), "next")
+
+    def test_read_block_into_new_buffer(self):
+        """ Test if read_block allocates a buffer of the block size and the
+        data format conversion uses it without copying
+        """
+        data = np.arange(5000, dtype='<f4')
+        self.respond(b"#520000" + data.tobytes() + b"\n", 4096)
+        block = self.test.read_block("TRAC:DATA")
+        self.assertIsInstance(block, bytearray)
+        self.test.Endian = '<'
+        self.test.Data_Format = {"REAL,32": 32}
+        self.test.Data_Types = {"REAL,32": "f4"}
+        self.test.Settings = {"GeneralSettings": {"Data_Format": "REAL,32"}}
+        converted = self.test.data_format_conversion(block)
+        self.assertTrue(np.array_equal(converted, data))
+        self.assertTrue(np.shares_memory(converted,
+                                         np.frombuffer(block, 'u1')))
+
+    def test_read_block_into_numpy_array(self):
+        """ Test if read_block fills a caller supplied NumPy array and returns
+        the filled part of it
+        """
+        data = np.arange(100, dtype='<f8')
+        buffer = np.zeros(256, dtype='<f8')
+        self.respond(b"#3800" + data.tobytes() + b"\n")
+        block = self.test.read_block("TRAC:DATA", buffer=buffer)
+        self.assertTrue(np.shares_memory(block, buffer))
+        self.assertTrue(np.array_equal(block, data))
+
+    def test_read_block_buffer_too_small(self):
+        """ Test if a buffer smaller than the block is rejected
+        """
+        self.respond(b"#216" + bytes(16) + b"\n")
+        with self.assertRaises(ValueError):
+            self.test.read_block("TRAC:DATA", buffer=bytearray(8))
+
+    def test_read_stream_definite_block(self):
+        """ Test if read_stream yields fixed size pieces of a #NB block
+        """
+        data = bytes(range(256)) * 10
+        self.respond(b"#42560" + data + b"\n", 300)
+        chunks = list(self.test.read_stream("TRAC:DATA", 1000))
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 560])
+        self.assertEqual(b"".join(chunks), data)
+
+    def test_read_stream_indefinite_block(self):
+        """ Test if read_stream and read handle the #0 indefinite block
+        """
+        data = b"\x00\x01\n\x02" * 500
+        self.respond(b"#0" + data + b"\n")
+        chunks = list(self.test.read_stream("TRAC:DATA", 512))
+        self.assertEqual(b"".join(chunks), data)
+        self.assertTrue(all(len(chunk) == 512 for chunk in chunks[:-1]))
+        self.respond(b"#0" + data + b"\n")
+        self.assertEqual(self.test.read("TRAC:DATA"), data)
+        self.assertEqual(self.test.DataHeader, "#0")
+
+    def test_indefinite_block_with_termination_at_receive(self):
+        """ Test if a #0 block whose data has a termination character at
+        the end of a receive is not cut off there
+        """
+        self.respond(b"#0\x01\x02\n")
+        timer = threading.Timer(0.03, self.respond, (b"\x03\x04\n",))
+        timer.start()
+        self.assertEqual(self.test.read("WAV:DATA"), b"\x01\x02\n\x03\x04")
+        timer.join()
+        self.respond(b"#0\n\n\x05\n")
+        self.assertEqual(b"".join(self.test.read_stream("WAV:DATA", 2)),
+                         b"\n\n\x05")
+
+    def test_read_stream_ascii(self):
+        """ Test if read_stream yields an ASCII response without the
+        termination
+        """
+        values = ",".join(str(i) for i in range(5000)).encode()
+        self.respond(values + b"\n", 1024)
+        self.assertEqual(b"".join(self.test.read_stream("TRAC", 100)), values)
+
+    def test_read_stream_stopped_early(self):
+        """ Test if the rest of a stream is discarded when the caller stops
+        reading, so the next query gets its own response
+        """
+        self.respond(b"#41000" + bytes(1000) + b"\n" + b"next\n")
+        stream = self.test.read_stream("TRAC:DATA", 100)
+        self.assertEqual(len(next(stream)), 100)
+        stream.close()
+        self.assertEqual(self.test.read("NEXT"), "next")
+
+    def test_read_stream_holds_lock_until_closed(self):
+        """ Test if other threads wait for a stream that was stopped early
+        until it is closed, and then get their own response
+        """
+        self.test.enable_locking()
+        self.respond(b"#41000" + bytes(1000) + b"\n" + b"next\n")
+        responses = []
+        with contextlib.closing(self.test.read_stream("TRAC:DATA",
+                                                      100)) as stream:
+            self.assertEqual(len(next(stream)), 100)
+            other = threading.Thread(
+                target=lambda: responses.append(self.test.read("NEXT")))
+            other.start()
+            other.join(0.2)
+            self.assertTrue(other.is_alive())
+        other.join(1)
+        self.assertEqual(responses, ["next"])
+
+    def test_adopt_identified_device(self):
+        """ Test if a device created from an identified device takes over its
+        connection and identification without talking to the instrument
+        """
+        self.test.Receive_Buffer += b"left"
+        connection = self.test.Device
+        device = ScpiDevice(self.test)
+        self.assertIs(device.Device, connection)
+        self.assertIsNone(self.test.Device)
+        self.assertEqual(device.Receive_Buffer, b"left")
+        self.assertEqual((device.Make, device.Model), ("TEST", "SCPI"))
+        self.assertEqual(device.Options, self.test.Options)
+        self.instrument.setblocking(False)
+        with self.assertRaises(BlockingIOError):
+            self.instrument.recv(100)
+        self.test = device
+
+    def test_read_all_pipelined(self):
+        """ Test if read_all sends queries ahead of the responses and returns
+        the responses in order
+        """
+        self.test.Max_Queries_In_Flight = 2
+        self.respond(b"1\n#13abc\n3\n")
+        queries = [("FREQ:STAR", '', -1), ("TRAC", '', -1),
+                   ("SENS{}:FREQ:STOP", '', 2)]
+        self.assertEqual(self.test.read_all(queries), ["1", b"abc", "3"])
+        self.assertEqual(self.instrument.recv(100),
+                         b"FREQ:STAR? \nTRAC? \nSENS2:FREQ:STOP? \n")
+
+    def test_read_all_compound(self):
+        """ Test if read_all joins the queries into compound queries and
+        splits the responses
+        """
+        self.test.Compound_Queries = True
+        self.test.Max_Queries_In_Flight = 2
+        self.respond(b"1;0\nOPT\n")
+        queries = [("FREQ:STAR", '', -1), ("OUTP", '', -1), ("*OPT", '', -1)]
+        self.assertEqual(self.test.read_all(queries), ["1", "0", "OPT"])
+        self.assertEqual(self.instrument.recv(100),
+                         b":FREQ:STAR?;:OUTP?\n*OPT?\n")
+
+    def test_write_all_batches(self):
+        """ Test if write_all joins commands into lines no longer than
+        Max_Command_Length and waits for one *OPC? at the end
+        """
+        self.test.Max_Command_Length = 40
+        self.respond(b"1\n")
+        self.test.write_all([("FREQ:STAR", 1000), ("FREQ:STOP", 2000),
+                             ("SENS{}:SWE:POIN", 201, 2), ("OUTP", True),
+                             ("*CLS",)])
+        self.assertEqual(self.instrument.recv(200),
+                         b":FREQ:STAR 1000;:FREQ:STOP 2000\n"
+                         b":SENS2:SWE:POIN 201;:OUTP 1;*CLS;*OPC?\n")
+        self.assertEqual(self.test.Receive_Buffer, b"")
+
+    def use_settings(self):
+        """ Gives the device a few settings in two groups
+        """
+        self.test.Setting_Commands = {
+            "Points": "SWE:POIN", "Start_Frequency": "FREQ:STAR",
+            "Frequency_Span": "FREQ:SPAN", "Output": "OUTP"}
+        self.test.Extra_Setting = dict.fromkeys(self.test.Setting_Commands, '')
+        self.test.Settings_Format = {"Points": int, "Start_Frequency": float,
+                                     "Frequency_Span": float, "Output": bool}
+        self.test.Settings = {
+            "GeneralSettings": {"Points": 201, "Start_Frequency": 1e6,
+                                "Frequency_Span": 1e9},
+            "OutputSettings": {"Output": False}}
+        self.test.New_Settings = {key: TrackedSettings(settings) for key,
+                                  settings in self.test.Settings.items()}
+
+    def test_send_all_settings_confirms_written_settings(self):
+        """ Test if send_all_settings only sends the modified settings and
+        only queries them and their coupled settings again
+        """
+        self.use_settings()
+        self.test.New_Settings["GeneralSettings"]["Points"] = 401
+        self.test.New_Settings["OutputSettings"]["Output"] = False
+        self.respond(b"1\n401\n")
+        self.test.send_all_settings()
+        self.assertEqual(self.instrument.recv(200),
+                         b":SWE:POIN 401;*OPC?\nSWE:POIN? \n")
+        self.assertEqual(self.test.Settings["GeneralSettings"]["Points"], 401)
+        self.assertEqual(self.test.New_Settings["OutputSettings"].Modified,
+                         set())
+        self.assertEqual(self.test.coupled_settings(
+            [("GeneralSettings", "Start_Frequency")]),
+            [("GeneralSettings", "Start_Frequency"),
+             ("GeneralSettings", "Frequency_Span")])
+
+    def test_send_all_settings_keeps_failed_settings(self):
+        """ Test if a setting the device did not confirm stays modified and
+        is sent again by the next send_all_settings
+        """
+        self.use_settings()
+        self.test.New_Settings["GeneralSettings"]["Points"] = 401
+        self.test.New_Settings["OutputSettings"]["Output"] = False
+        self.respond(b"1\n201\n")
+        self.test.send_all_settings()
+        self.instrument.recv(200)
+        self.assertEqual(self.test.New_Settings["GeneralSettings"].Modified,
+                         {"Points"})
+        self.assertEqual(self.test.New_Settings["OutputSettings"].Modified,
+                         set())
+        self.respond(b"1\n401\n")
+        self.test.send_all_settings()
+        self.assertEqual(self.instrument.recv(200),
+                         b":SWE:POIN 401;*OPC?\nSWE:POIN? \n")
+        self.assertEqual(self.test.New_Settings["GeneralSettings"].Modified,
+                         set())
+
+    def test_trace_sync_contains_transactions(self):
+        """ Test if the trace of a settings sync holds the pipelined reads
+        and batched writes made during it
+        """
+        self.use_settings()
+        recorder = TraceRecorder()
+        recorder.attach([self.test])
+        self.respond(b"201\n1e6\n1e9\n0\n")
+        self.test.get_all_settings()
+        self.test.New_Settings["GeneralSettings"]["Points"] = 401
+        self.respond(b"1\n401\n")
+        self.test.send_all_settings()
+        recorder.detach([self.test])
+        spans = {}
+        for event in recorder.trace()["traceEvents"]:
+            if event["ph"] == "X":
+                spans.setdefault(event["name"], event)
+        for sync, inner in (("get_all_settings", "read_pipelined"),
+                            ("get_all_settings", "send_message"),
+                            ("send_all_settings", "write_messages")):
+            self.assertGreaterEqual(spans[inner]["ts"], spans[sync]["ts"])
+            self.assertLessEqual(spans[inner]["ts"] + spans[inner]["dur"],
+                                 spans[sync]["ts"] + spans[sync]["dur"])
+        self.assertEqual(spans["read_pipelined"]["cat"], "read")
+
+    def test_settings_schema(self):
+        """ Test if the compiled settings format their commands and queries,
+        and a value outside the range of a setting is not sent
+        """
+        self.use_settings()
+        self.test.Settings["ChannelSettings"] = {"channel": 2, "Points": 11}
+        self.test.Setting_Commands["channel"] = "CHAN{}"
+        self.test.Extra_Setting["channel"] = ''
+        self.test.Settings_Format["channel"] = int
+        schema = self.test.settings_schema()
+        self.assertIs(self.test.settings_schema(), schema)
+        self.assertEqual(schema[("OutputSettings", "Output")].serialize(True),
+                         "OUTP 1")
+        self.assertEqual(schema[("OutputSettings", "Output")].parse("OFF"),
+                         False)
+        self.test.Setting_Commands["Points"] = "SENS{}:SWE:POIN"
+        self.test.invalidate_schema()
+        self.assertEqual(self.test.settings_schema()[
+            ("ChannelSettings", "Points")].query, "SENS2:SWE:POIN? ")
+        self.test.Settings_Range = {"Points": (2, 100001)}
+        self.test.invalidate_schema()
+        self.test.New_Settings["GeneralSettings"]["Points"] = 1
+        with self.assertRaises(ValueError):
+            self.test.send_all_settings()
+
+    def test_settings_schema_follows_settings(self):
+        """ Test if the schema is compiled again when a group of settings is
+        replaced or a setting is added to a group
+        """
+        self.use_settings()
+        self.test.Setting_Commands["Stop_Frequency"] = "FREQ:STOP"
+        self.test.Extra_Setting["Stop_Frequency"] = ''
+        self.test.Settings_Format["Stop_Frequency"] = float
+        schema = self.test.settings_schema()
+        self.test.Settings["GeneralSettings"] = {"Points": 201,
+                                                 "Stop_Frequency": 2e9}
+        self.assertEqual(self.test.settings_schema()[
+            ("GeneralSettings", "Stop_Frequency")].query, "FREQ:STOP? ")
+        self.assertIsNot(self.test.settings_schema(), schema)
+        schema = self.test.settings_schema()
+        self.test.Settings["OutputSettings"]["Points"] = 11
+        self.assertEqual(self.test.settings_schema()[
+            ("OutputSettings", "Points")].query, "SWE:POIN? ")
+        self.assertIsNot(self.test.settings_schema(), schema)
+
+    def echo(self):
+        """ Answers every query of the device with the query itself
+        """
+        buffer = b""
+        while True:
+            try:
+                data = self.instrument.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                self.instrument.sendall(line.split(b"?")[0] + b"\n")
+
+    def test_locking_between_threads(self):
+        """ Test if queries from several threads get their own responses and
+        a transaction keeps other threads out until it is done
+        """
+        self.test.enable_locking()
+        threading.Thread(target=self.echo, daemon=True).start()
+        errors = []
+
+        def query(name):
+            for index in range(200):
+                if self.test.read(f"{name}{index}") != f"{name}{index}":
+                    errors.append(name)
+
+        workers = [threading.Thread(target=query, args=(f"Q{worker}:",))
+                   for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        order = []
+        with self.test.transaction():
+            other = threading.Thread(
+                target=lambda: order.append(self.test.read("OTHER")))
+            other.start()
+            other.join(0.2)
+            order.append(self.test.read("FIRST"))
+        other.join()
+        self.assertEqual(order, ["FIRST", "OTHER"])
+
+    def test_logging(self):
+        """ Test if queries are not printed, initialize_logger opens every log
+        file once, background logging writes the file and the file is
+        written directly once background logging stops
+        """
+        output = io.StringIO()
+        self.respond(b"1\n")
+        with contextlib.redirect_stdout(output):
+            self.test.read("FREQ")
+        self.assertEqual(output.getvalue(), "")
+        with tempfile.TemporaryDirectory() as directory:
+            self.test.initialize_logger(directory, "Scpi", background=True)
+            self.test.initialize_logger(directory, "Scpi", background=True)
+            self.assertEqual(logging.getLogger("Scpi").handlers[1:],
+                             [scpi_device.Console_Handler])
+            self.assertNotIn(scpi_device.Console_Handler,
+                             logging.getLogger().handlers)
+            self.test.log_info("%s points", 201)
+            scpi_device.stop_background_logging()
+            handler = scpi_device.Log_Handlers[directory + "/Scpi"]
+            self.assertIsInstance(handler, logging.FileHandler)
+            self.assertIn(handler, self.test.logger.handlers)
+            self.test.log_warning("done")
+            with open(os.path.join(directory, "Scpi")) as log_file:
+                self.assertEqual(log_file.read(),
+                                 "INFO:Scpi:Scpi\nINFO:Scpi:Scpi\n"
+                                 "INFO:Scpi:201 points\nWARNING:Scpi:done\n")
+            del scpi_device.Log_Handlers[directory + "/Scpi"]
+            self.test.logger.removeHandler(handler)
+            self.test.logger.removeHandler(scpi_device.Console_Handler)
+            handler.close()
+
+    def test_parallel_loggers(self):
+        """ Test if devices initialized in parallel open their log file once
+        """
+        created = []
+        file_handler = logging.FileHandler
+
+        def slow_file_handler(*args, **kwargs):
+            time.sleep(0.05)
+            created.append(file_handler(*args, **kwargs))
+            return created[-1]
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(logging, "FileHandler", slow_file_handler):
+            threads = [threading.Thread(
+                target=self.test.initialize_logger,
+                args=(directory, "Parallel", False)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            logger = logging.getLogger("Parallel")
+            self.assertEqual(len(created), 1)
+            self.assertEqual(logger.handlers,
+                             [created[0], scpi_device.Console_Handler])
+            del scpi_device.Log_Handlers[directory + "/Parallel"]
+            logger.removeHandler(created[0])
+            logger.removeHandler(scpi_device.Console_Handler)
+            created[0].close()
+
+    def test_stats(self):
+        """ Test if the latency of every command is counted by phase once
+        stats are enabled
+        """
+        self.respond(b"1\n")
+        self.test.read("FREQ")
+        self.assertEqual(self.test.stats(), {"commands": {}, "phases": {}})
+        self.test.enable_stats()
+        self.respond(b"1\n2\n3.5\n")
+        self.test.read("FREQ")
+        self.test.read("FREQ")
+        self.test.read("POW")
+        self.test.write("FREQ", 1e9)
+        report = self.test.stats()
+        frequency = report["commands"]["read"]["FREQ"]
+        self.assertEqual(frequency["count"], 2)
+        self.assertEqual(frequency["bytes"], 2)
+        self.assertLessEqual(frequency["p50"], frequency["p95"])
+        self.assertLessEqual(frequency["p95"], frequency["p99"])
+        self.assertEqual(report["commands"]["read"]["POW"]["bytes"], 3)
+        self.assertEqual(report["commands"]["write"]["FREQ"]["count"], 1)
+        self.assertEqual(set(report["phases"]), {"read", "write"})
+        self.assertIn("FREQ", str(self.test.Stats))
+
+    def test_stats_of_batches_and_streams(self):
+        """ Test if pipelined, compound and streamed reads and batched
+        writes are counted, with the sending of the messages left out of the
+        phase totals
+        """
+        self.test.enable_stats()
+        self.respond(b"1\n22\n")
+        self.test.read_all([("FREQ", '', -1), ("POW", '', -1)])
+        self.test.Compound_Queries = True
+        self.respond(b"1;0\n")
+        self.test.read_all([("FREQ", '', -1), ("OUTP", '', -1)])
+        self.respond(b"1\n")
+        self.test.write_all([("FREQ", 1000), ("OUTP", True)])
+        self.respond(b"#15abcde\n")
+        self.assertEqual(b"".join(self.test.read_stream("TRAC:DATA", 2)),
+                         b"abcde")
+        report = self.test.stats()
+        commands = report["commands"]
+        self.assertEqual(commands["read"]["read_pipelined"]["bytes"], 3)
+        self.assertEqual(commands["read"]["read_compound"]["bytes"], 2)
+        self.assertEqual(commands["read"]["TRAC:DATA"]["bytes"], 5)
+        self.assertEqual(commands["write"]["write_messages"]["count"], 1)
+        self.assertEqual(commands["send"]["send_message"]["count"], 3)
+        self.assertEqual(set(report["phases"]), {"read", "write"})
+
+    def test_parse_ascii_values(self):
+        values = scpi_device.parse_ascii_values(" +1.0E+09, -2.5E-01 ,3\n")
+        np.testing.assert_array_equal(values, [1e9, -0.25, 3])
+        values = scpi_device.parse_ascii_values(b"1,,2,", dtype=np.float32)
+        self.assertEqual(values.dtype, np.float32)
+        np.testing.assert_array_equal(values, [1, 2])
+        self.assertEqual(scpi_device.parse_ascii_values("").size, 0)
+        pairs = scpi_device.parse_ascii_values("1E6,-90,2E6,-95", columns=2)
+        np.testing.assert_array_equal(pairs, [[1e6, -90], [2e6, -95]])
+        with self.assertRaises(ValueError):
+            scpi_device.parse_ascii_values("1E6,-90,2E6", columns=2)
+
+    def test_parse_ascii_values_blank_entries(self):
+        """ Test if a trailing comma before the termination and whitespace
+        only entries are left out instead of being read as -1
+        """
+        for data in ("1,2,\n", "1,2,\r\n", "1, ,2", " ,1,2", b"1,\t,2\n"):
+            np.testing.assert_array_equal(
+                scpi_device.parse_ascii_values(data), [1, 2], repr(data))
+
+    def test_data_format_conversion_types(self):
+        self.test.Endian = '>'
+        self.test.Data_Types = {"INT,32": "i4", "WORD": "i2"}
+        self.test.Settings = {"GeneralSettings": {"Data_Format": "INT,32"}}
+        converted = self.test.data_format_conversion(
+            np.array([-90, 7], dtype='>i4').tobytes())
+        self.assertEqual(converted.dtype, np.dtype('>i4'))
+        np.testing.assert_array_equal(converted, [-90, 7])
+        self.test.Settings["GeneralSettings"]["Data_Format"] = "WORD"
+        converted = self.test.data_format_conversion(b"\xff\xfe")
+        np.testing.assert_array_equal(converted, [-2])
+        self.assertIs(self.test.data_types(), self.test.data_types())
+        self.test.Settings["GeneralSettings"]["Data_Format"] = "ASC,0"
+        self.assertEqual(self.test.data_format_conversion("1,2"), "1,2")
+        self.test.Data_Types = {"WORD": "u2"}
+        self.test.Settings["GeneralSettings"]["Data_Format"] = "WORD"
+        np.testing.assert_array_equal(
+            self.test.data_format_conversion(b"\xff\xfe"), [65534])
+        self.test.Data_Types["WORD"] = "i2"
+        np.testing.assert_array_equal(
+            self.test.data_format_conversion(b"\xff\xfe"), [-2])
+
+    def test_format_table(self):
+        frequencies = [1e9, 1.5e9, 2e9]
+        values = np.array([-90.5, 0.1, 7], dtype=np.float32)
+        expected = "\n\n!Frequency\tPower" + "".join(
+            "\n{}\t{}".format(frequency, value)
+            for frequency, value in zip(frequencies, values))
+        text = "".join(scpi_device.format_table(
+            "\n\n!Frequency\tPower", [frequencies, values], 2))
+        self.assertEqual(text, expected)
+        with self.assertRaises(ValueError):
+            next(scpi_device.format_table("\n\n!Frequency\tPower",
+                                          [frequencies, values[:2]]))